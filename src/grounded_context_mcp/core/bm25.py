@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple
+
+from .catalog import PersistentDerived, open_derived
+
+# "heuristic" (score_match, the default) or "bm25".
+Ranking = Literal["heuristic", "bm25"]
+
+# Identifier-ish terms; path components are indexed too so "auth" finds auth.py.
+_TERM_RE = re.compile(r"[a-z0-9_]+")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return _TERM_RE.findall(text.lower())
+
+
+class Bm25Index(PersistentDerived):
+    """
+    Per-root BM25 corpus statistics: term -> {doc: tf}, document lengths and
+    document frequencies. Queries are scored from postings alone, no file
+    reads. Kept up to date incrementally by FileCatalog.sync().
+    """
+
+    VERSION = 1
+    FILENAME = "bm25_index.json"
+
+    def __init__(self, root: Path, *, respect_gitignore: bool = False):
+        super().__init__(root, respect_gitignore=respect_gitignore)
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.doc_terms: Dict[str, List[str]] = {}
+        self.total_len = 0
+
+    # -- query -------------------------------------------------------------
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_len)
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def score(self, query: str) -> Dict[str, float]:
+        """rel -> BM25 score for every doc containing at least one query term."""
+        terms = tokenize(query)
+        if not terms or not self.n_docs:
+            return {}
+
+        avgdl = self.total_len / self.n_docs or 1.0
+        scores: Dict[str, float] = {}
+        for term, qtf in Counter(terms).items():
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self.idf(term)
+            for rel, tf in posting.items():
+                norm = tf + BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_len[rel] / avgdl)
+                scores[rel] = scores.get(rel, 0.0) + qtf * idf * tf * (BM25_K1 + 1.0) / norm
+        return scores
+
+    def iter_docs(self) -> Iterator[Tuple[str, Path]]:
+        """Yield (rel, abs_path) for indexed docs, in catalog walk order."""
+        order = self.catalog.order if self.catalog is not None else list(self.doc_len)
+        for rel in order:
+            if rel in self.doc_len:
+                yield rel, self.root / rel
+
+    # -- Derived protocol --------------------------------------------------
+
+    def reset(self) -> None:
+        self.postings = {}
+        self.doc_len = {}
+        self.doc_terms = {}
+        self.total_len = 0
+
+    def discard(self, rel: str) -> None:
+        if rel not in self.doc_len:
+            return
+        self.total_len -= self.doc_len.pop(rel)
+        for term in self.doc_terms.pop(rel, ()):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(rel, None)
+                if not posting:
+                    del self.postings[term]
+
+    def update(self, rel: str, text: Optional[str]) -> None:
+        self.discard(rel)
+        if text is None:
+            return  # unreadable: iter_text_files would skip it too
+
+        terms = tokenize(text) + tokenize(rel)
+        self.doc_len[rel] = len(terms)
+        self.total_len += len(terms)
+        counts = Counter(terms)
+        self.doc_terms[rel] = list(counts)
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[rel] = tf
+
+    # -- persistence -------------------------------------------------------
+
+    def _dump(self) -> Dict[str, Any]:
+        docs = list(self.doc_len)
+        ids = {rel: i for i, rel in enumerate(docs)}
+        return {
+            "docs": [[rel, self.doc_len[rel]] for rel in docs],
+            "postings": {
+                term: [[ids[rel], tf] for rel, tf in posting.items()]
+                for term, posting in self.postings.items()
+            },
+        }
+
+    def _restore(self, data: Dict[str, Any]) -> None:
+        docs = []
+        for rel, length in data["docs"]:
+            docs.append(rel)
+            self.doc_len[rel] = int(length)
+            self.total_len += int(length)
+        for term, pairs in data["postings"].items():
+            self.postings[term] = {docs[i]: int(tf) for i, tf in pairs}
+            for i, _ in pairs:
+                self.doc_terms.setdefault(docs[i], []).append(term)
+
+
+def open_bm25(
+    root: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[Bm25Index]:
+    """
+    Up-to-date BM25 statistics for root (built once, then synced incrementally);
+    None if the build was still unfinished at the deadline.
+    """
+    return open_derived(Bm25Index, root, respect_gitignore=respect_gitignore, deadline=deadline)
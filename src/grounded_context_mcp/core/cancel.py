@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Set while a call runs via run_offloaded; the event fires when the awaiting
+# task is cancelled (e.g. the client abandoned the request).
+_TOKEN: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "grounded_context_cancel", default=None
+)
+
+
+class OperationCancelled(Exception):
+    """Raised at a checkpoint once the request that started the work is gone."""
+
+
+def cancelled() -> bool:
+    token = _TOKEN.get()
+    return token is not None and token.is_set()
+
+
+def check_cancelled() -> None:
+    """
+    Cancellation checkpoint for long loops (scans, catalog refreshes, blob
+    streams). A no-op outside run_offloaded.
+    """
+    if cancelled():
+        raise OperationCancelled()
+
+
+async def run_offloaded(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run blocking fn on a worker thread so the event loop keeps serving other
+    requests. Threads can't be interrupted: if the awaiting task is
+    cancelled, fn is signalled and stops at its next check_cancelled().
+    """
+    token = threading.Event()
+
+    def _call() -> T:
+        _TOKEN.set(token)
+        return fn(*args, **kwargs)
+
+    try:
+        return await asyncio.to_thread(_call)
+    except asyncio.CancelledError:
+        token.set()
+        raise
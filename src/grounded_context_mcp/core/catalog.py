@@ -0,0 +1,520 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Set, Tuple, Type, TypeVar
+
+from .cancel import check_cancelled
+from .content_cache import content_cache
+from .fs import FileRecord, iter_candidate_files, load_file, max_file_bytes, read_file_safe
+from .locks import root_lock
+from .storage import cache_dir_for, deferred_saver, load_json, mode_filename, save_json_atomic
+
+CATALOG_VERSION = 2
+CATALOG_FILENAME = "catalog.json"
+
+# How many deltas to keep; derived structures older than this rebuild fully.
+JOURNAL_LIMIT = 256
+# A refresh walk stopped at a deadline and not continued for this long
+# starts over (what it saw so far is too old to call fresh).
+STALE_WALK_S = 600.0
+
+_CATALOGS: Dict[str, "FileCatalog"] = {}
+_CATALOGS_LOCK = threading.Lock()
+
+_DERIVED: Dict[str, "PersistentDerived"] = {}
+_DERIVED_LOCKS: Dict[str, threading.Lock] = {}
+_DERIVED_LOCK = threading.Lock()
+
+# Catalog keys already refreshed in the current tool call (see one_refresh_per_call).
+_REFRESHED: ContextVar[Optional[Set[str]]] = ContextVar("grounded_context_refreshed", default=None)
+
+D = TypeVar("D", bound="PersistentDerived")
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    path: str  # root-relative, posix separators
+    size: int
+    mtime_ns: int
+    inode: int
+    sha1: str  # "" when the file could not be read or is binary; hash of the kept prefix
+    binary: bool = False
+
+    @property
+    def stat_key(self) -> Tuple[int, int, int]:
+        return self.size, self.mtime_ns, self.inode
+
+
+@dataclass
+class CatalogDelta:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def to_json(self) -> dict:
+        return {"added": self.added, "changed": self.changed, "removed": self.removed}
+
+
+class Derived(Protocol):
+    """
+    A structure computed from file contents (index, symbol table, ...).
+
+    FileCatalog.sync() drives it: reset() before a full rebuild, discard()
+    for removed paths, update() with fresh text for added/changed paths
+    (text is None for unreadable files). `pending` lists paths a sync cut
+    short by its deadline has yet to update.
+    """
+
+    catalog_id: str
+    generation: int
+    pending: List[str]
+
+    def reset(self) -> None: ...
+
+    def discard(self, rel: str) -> None: ...
+
+    def update(self, rel: str, text: Optional[str]) -> None: ...
+
+
+class _Walk:
+    """A refresh in progress: the stat walk iterator and what it found so far."""
+
+    def __init__(self, records: Iterator[FileRecord]):
+        self.records = records
+        self.started = time.monotonic()
+        self.delta = CatalogDelta()
+        self.stat_only = False
+        self.entries: Dict[str, CatalogEntry] = {}
+        self.order: List[str] = []
+
+
+class FileCatalog:
+    """
+    (path, size, mtime_ns, inode, content hash) for every file that
+    iter_text_files would yield, plus a bounded journal of deltas.
+
+    refresh() re-stats the tree and only reads files whose stat key moved;
+    a file that was touched but not modified (same hash) is not a change.
+    Files are read through fs.load_file, so binary files are skipped and
+    oversized ones contribute only their capped prefix (the cap is part of
+    the catalog's identity).
+    Each non-empty refresh bumps `generation`, so derived structures can
+    replay exactly the deltas they missed. A refresh stopped at a deadline
+    is continued by the next one; the catalog keeps its previous snapshot
+    until the walk completes.
+    """
+
+    def __init__(self, root: Path, *, respect_gitignore: bool = False):
+        self.root = root.resolve()
+        self.respect_gitignore = respect_gitignore
+        self.catalog_id = uuid.uuid4().hex
+        self.max_file_bytes = max_file_bytes()
+        self.generation = 0
+        self.entries: Dict[str, CatalogEntry] = {}
+        # Walk order; ties in rankings follow it.
+        self.order: List[str] = []
+        self.journal: List[Tuple[int, CatalogDelta]] = []
+        self.lock = threading.RLock()
+        self._walk: Optional[_Walk] = None
+
+    # -- change detection --------------------------------------------------
+
+    def refresh(self, deadline: Optional[float] = None) -> Optional[CatalogDelta]:
+        """
+        Re-stat the tree and return what changed. With a time.monotonic()
+        deadline, a walk still unfinished when it passes stops and returns
+        None; the next refresh() continues it.
+        """
+        with self.lock:
+            walk = self._walk
+            if walk is None or time.monotonic() - walk.started > STALE_WALK_S:
+                walk = self._walk = _Walk(
+                    iter_candidate_files(self.root, respect_gitignore=self.respect_gitignore)
+                )
+            try:
+                for rec in walk.records:
+                    self._visit(walk, rec)
+                    check_cancelled()
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return None
+            except BaseException:
+                # Where the walk stopped is unknown: start over next time.
+                self._walk = None
+                raise
+            self._walk = None
+
+            delta = walk.delta
+            delta.removed = [rel for rel in self.order if rel not in walk.entries]
+
+            self.entries = walk.entries
+            self.order = walk.order
+
+            if delta:
+                self.generation += 1
+                self.journal.append((self.generation, delta))
+                del self.journal[:-JOURNAL_LIMIT]
+
+            if delta or walk.stat_only:
+                self.save()
+            return delta
+
+    def _visit(self, walk: _Walk, rec: FileRecord) -> None:
+        rel = rec.rel
+        old = self.entries.get(rel)
+        key = (rec.size, rec.mtime_ns, rec.inode)
+
+        if old is not None and old.stat_key == key:
+            entry = old
+        else:
+            loaded = load_file(Path(rec.path))
+            version = (rec.mtime_ns, rec.size)
+            sha1 = ""
+            if loaded is not None and loaded.binary:
+                content_cache.mark_binary(Path(rec.path), version)
+            elif loaded is not None:
+                sha1 = hashlib.sha1(loaded.data).hexdigest()
+                # Derived structures will ask for this text next.
+                content_cache.put(
+                    Path(rec.path),
+                    version,
+                    loaded.text,
+                    cost=len(loaded.data),
+                    truncated=loaded.truncated,
+                )
+            binary = loaded is not None and loaded.binary
+            entry = CatalogEntry(rel, rec.size, rec.mtime_ns, rec.inode, sha1, binary)
+            if old is None:
+                walk.delta.added.append(rel)
+            elif old.sha1 != sha1 or not sha1:
+                walk.delta.changed.append(rel)
+            else:
+                walk.stat_only = True
+
+        walk.entries[rel] = entry
+        walk.order.append(rel)
+
+    def changes_since(self, generation: int) -> Optional[CatalogDelta]:
+        """
+        Net delta between `generation` and now, or None when the journal no
+        longer reaches back that far (caller must rebuild from scratch).
+        """
+        with self.lock:
+            if generation == self.generation:
+                return CatalogDelta()
+            if generation > self.generation:
+                return None
+            if not self.journal or self.journal[0][0] > generation + 1:
+                return None
+
+            touched: Dict[str, None] = {}
+            for gen, delta in self.journal:
+                if gen <= generation:
+                    continue
+                for rel in (*delta.added, *delta.changed, *delta.removed):
+                    touched[rel] = None
+
+            out = CatalogDelta()
+            for rel in touched:
+                if rel in self.entries:
+                    out.changed.append(rel)
+                else:
+                    out.removed.append(rel)
+            return out
+
+    def read_report(self) -> Dict[str, int]:
+        """Files skipped (binary/unreadable) or only partially indexed (over the cap)."""
+        with self.lock:
+            report = {"skipped_binary": 0, "skipped_unreadable": 0, "truncated": 0}
+            for e in self.entries.values():
+                if e.binary:
+                    report["skipped_binary"] += 1
+                elif not e.sha1:
+                    report["skipped_unreadable"] += 1
+                elif e.size > self.max_file_bytes:
+                    report["truncated"] += 1
+            report["max_file_bytes"] = self.max_file_bytes
+            return report
+
+    # -- derived structures ------------------------------------------------
+
+    def read_text(self, rel: str) -> Optional[str]:
+        return read_file_safe(self.root / rel)
+
+    def sync(self, derived: Derived, deadline: Optional[float] = None) -> bool:
+        """
+        Bring `derived` up to date, re-reading only files that changed since
+        it was last synced. Returns True if anything was applied. With a
+        deadline, stops once it passes and leaves the rest in
+        derived.pending; the next sync applies those first.
+        """
+        with self.lock:
+            delta = None
+            if derived.catalog_id == self.catalog_id:
+                delta = self.changes_since(derived.generation)
+
+            if delta is None:
+                derived.reset()
+                removed: List[str] = []
+                updated = list(self.order)
+            else:
+                removed = delta.removed
+                # Paths removed since a cut-short sync are no longer pending.
+                updated = [
+                    rel
+                    for rel in dict.fromkeys([*derived.pending, *delta.added, *delta.changed])
+                    if rel in self.entries
+                ]
+
+            for rel in removed:
+                derived.discard(rel)
+            derived.catalog_id = self.catalog_id
+            derived.generation = self.generation
+            derived.pending = updated
+            for i, rel in enumerate(updated):
+                if i and deadline is not None and time.monotonic() >= deadline:
+                    derived.pending = updated[i:]
+                    return True
+                try:
+                    check_cancelled()
+                except BaseException:
+                    derived.pending = updated[i:]
+                    raise
+                derived.update(rel, self.read_text(rel))
+            derived.pending = []
+            return bool(removed or updated)
+
+    # -- persistence -------------------------------------------------------
+
+    def to_json(self) -> dict:
+        return {
+            "version": CATALOG_VERSION,
+            "root": str(self.root),
+            "catalog_id": self.catalog_id,
+            "max_file_bytes": self.max_file_bytes,
+            "generation": self.generation,
+            "entries": [
+                [e.path, e.size, e.mtime_ns, e.inode, e.sha1, int(e.binary)]
+                for e in (self.entries[rel] for rel in self.order)
+            ],
+            "journal": [[gen, d.to_json()] for gen, d in self.journal],
+        }
+
+    @classmethod
+    def from_json(
+        cls, root: Path, data: object, *, respect_gitignore: bool = False
+    ) -> Optional["FileCatalog"]:
+        if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION:
+            return None
+        cat = cls(root, respect_gitignore=respect_gitignore)
+        if data.get("root") != str(cat.root) or data.get("max_file_bytes") != cat.max_file_bytes:
+            return None
+        try:
+            cat.catalog_id = str(data["catalog_id"])
+            cat.generation = int(data["generation"])
+            for path, size, mtime_ns, inode, sha1, binary in data["entries"]:
+                cat.entries[path] = CatalogEntry(
+                    path, int(size), int(mtime_ns), int(inode), sha1, bool(binary)
+                )
+                cat.order.append(path)
+            for gen, d in data["journal"]:
+                cat.journal.append((int(gen), CatalogDelta(d["added"], d["changed"], d["removed"])))
+        except Exception:
+            return None
+        return cat
+
+    def save(self) -> bool:
+        return save_json_atomic(
+            cache_dir_for(self.root) / mode_filename(CATALOG_FILENAME, self.respect_gitignore), self.to_json()
+        )
+
+    @classmethod
+    def load(cls, root: Path, *, respect_gitignore: bool = False) -> Optional["FileCatalog"]:
+        return cls.from_json(
+            root,
+            load_json(cache_dir_for(root) / mode_filename(CATALOG_FILENAME, respect_gitignore)),
+            respect_gitignore=respect_gitignore,
+        )
+
+
+@contextmanager
+def one_refresh_per_call() -> Iterator[None]:
+    """
+    Scope of one tool call (its offloaded steps inherit it): each catalog is
+    stat-walked at most once inside it, so the fingerprint and every derived
+    index a query opens share a single refresh.
+    """
+    token = _REFRESHED.set(set())
+    try:
+        yield
+    finally:
+        _REFRESHED.reset(token)
+
+
+def get_catalog(
+    root: Path, *, refresh: bool = True, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[FileCatalog]:
+    """
+    Process-wide catalog for (root, mode), loaded from disk once, optionally
+    refreshed (once per one_refresh_per_call scope). None if the refresh
+    walk was still unfinished at the deadline.
+    """
+    root = root.resolve()
+    key = f"{root}|{int(respect_gitignore)}"
+    with _CATALOGS_LOCK:
+        cat = _CATALOGS.get(key)
+        if cat is not None and cat.max_file_bytes != max_file_bytes():
+            # The cap changed: cached prefixes and catalog hashes are stale.
+            content_cache.clear()
+            cat = None
+        if cat is None:
+            cat = (
+                FileCatalog.load(root, respect_gitignore=respect_gitignore)
+                or FileCatalog(root, respect_gitignore=respect_gitignore)
+            )
+            _CATALOGS[key] = cat
+
+    if refresh:
+        scope = _REFRESHED.get()
+        if scope is None or key not in scope:
+            if cat.refresh(deadline) is None:
+                return None
+            if scope is not None:
+                scope.add(key)
+    return cat
+
+
+class PersistentDerived(ABC):
+    """
+    Base for catalog-derived structures that persist under the cache dir.
+
+    Subclasses set VERSION/FILENAME, implement the Derived protocol
+    (reset/discard/update) and _dump()/_restore(); open_derived() handles
+    loading, incremental sync and (throttled) saving. A subclass missing
+    any of them can't be instantiated. Large structures can keep _dump()
+    to a cheap snapshot and do the heavy conversion in _encode().
+    """
+
+    VERSION = 1
+    FILENAME = "derived.json"
+
+    def __init__(self, root: Path, *, respect_gitignore: bool = False):
+        self.root = root.resolve()
+        self.respect_gitignore = respect_gitignore
+        self.catalog_id = ""
+        self.generation = -1
+        self.pending: List[str] = []
+        self.catalog: Optional[FileCatalog] = None
+
+    @abstractmethod
+    def reset(self) -> None: ...
+
+    @abstractmethod
+    def discard(self, rel: str) -> None: ...
+
+    @abstractmethod
+    def update(self, rel: str, text: Optional[str]) -> None: ...
+
+    @abstractmethod
+    def _dump(self) -> Dict[str, Any]: ...
+
+    @abstractmethod
+    def _restore(self, data: Dict[str, Any]) -> None: ...
+
+    @property
+    def cache_path(self) -> Path:
+        return cache_dir_for(self.root) / mode_filename(self.FILENAME, self.respect_gitignore)
+
+    def _encode(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON-ready form of a _dump() snapshot; runs without the root lock."""
+        return snapshot
+
+    def save(self) -> bool:
+        # Deferred saves run on other threads: snapshot under the read lock so
+        # no sync runs mid-dump, then encode and write without blocking writers.
+        with root_lock(self.root).read():
+            if self.pending:
+                return False  # incomplete: the loaded copy would claim otherwise
+            header = {
+                "version": self.VERSION,
+                "root": str(self.root),
+                "catalog_id": self.catalog_id,
+                "generation": self.generation,
+            }
+            snapshot = self._dump()
+        return save_json_atomic(self.cache_path, {**header, **self._encode(snapshot)})
+
+    @classmethod
+    def load(cls: Type[D], root: Path, *, respect_gitignore: bool = False) -> Optional[D]:
+        obj = cls(root, respect_gitignore=respect_gitignore)
+        data = load_json(obj.cache_path)
+        if not isinstance(data, dict) or data.get("version") != cls.VERSION:
+            return None
+        if data.get("root") != str(obj.root):
+            return None
+        try:
+            obj.catalog_id = str(data["catalog_id"])
+            obj.generation = int(data["generation"])
+            obj._restore(data)
+        except Exception:
+            return None
+        return obj
+
+
+def open_derived(
+    cls: Type[D], root: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[D]:
+    """
+    Return an up-to-date `cls` instance for (root, mode), or None if the
+    catalog walk or the sync was still unfinished at the deadline (the
+    progress is kept; call again to continue).
+
+    Loads from memory, then from the on-disk cache, and applies only the
+    catalog deltas it missed (a full build happens once per root and mode).
+    The catalog refresh only swaps the catalog's own snapshot, so it runs
+    without the root lock; the write lock is taken only to sync an instance
+    that is behind. Query the result under root_lock(root).read() so a
+    concurrent sync can't change it mid-query.
+    """
+    root = root.resolve()
+    key = f"{cls.__name__}|{root}|{int(respect_gitignore)}"
+
+    with _DERIVED_LOCK:
+        lock = _DERIVED_LOCKS.setdefault(key, threading.Lock())
+
+    catalog = get_catalog(root, respect_gitignore=respect_gitignore, deadline=deadline)
+    if catalog is None:
+        return None
+    with lock:
+        obj = _DERIVED.get(key)
+        if obj is None:
+            obj = cls.load(root, respect_gitignore=respect_gitignore) or cls(
+                root, respect_gitignore=respect_gitignore
+            )
+            _DERIVED[key] = obj
+
+        with catalog.lock:
+            current = not obj.pending and (obj.catalog_id, obj.generation) == (
+                catalog.catalog_id,
+                catalog.generation,
+            )
+        if not current:
+            with root_lock(root).write():
+                full = obj.catalog_id != catalog.catalog_id
+                if catalog.sync(obj, deadline) and not obj.pending:
+                    if full:
+                        obj.save()
+                    else:
+                        deferred_saver.mark(str(obj.cache_path), obj.save)
+        obj.catalog = catalog
+        return None if obj.pending else obj  # type: ignore[return-value]
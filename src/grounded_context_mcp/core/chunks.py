@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Literal, NamedTuple, Optional, Sequence, Tuple
+
+from .catalog import PersistentDerived, open_derived
+from .content_cache import compute_line_starts
+from .scoring import TokenMatcher
+from .snippets import slice_lines
+
+# "files" (prefixes of the top files, the default), "chunks" (best chunks
+# across files) or "hunks" (changed hunks from git diff, for debugging).
+ContextMode = Literal["files", "chunks", "hunks"]
+
+# Chunks longer than this are split into fixed windows.
+MAX_CHUNK_LINES = 80
+WINDOW_LINES = 40
+
+_PY_DEF_RE = re.compile(r"^([ \t]*)(?:async[ \t]+def|def|class)[ \t]+(\w+)")
+_PY_DECORATOR_RE = re.compile(r"^[ \t]*@")
+_MD_HEADING_RE = re.compile(r"^#{1,6}[ \t]+(.*?)[ \t#]*$")
+_MD_FENCE_RE = re.compile(r"^[ \t]*(```|~~~)")
+# Declarations at (nearly) top level in brace languages.
+_CODE_DEF_RE = re.compile(
+    r"^([ \t]*)(?:export[ \t]+)?(?:default[ \t]+)?(?:pub(?:\([\w:]+\))?[ \t]+)?(?:async[ \t]+)?"
+    r"(?:function\*?|class|interface|enum|struct|impl|trait|func|fn|type)[ \t]+(?:\([^)]*\)[ \t]*)?(\w+)"
+)
+
+_CODE_EXTS = {".js", ".ts", ".tsx", ".go", ".rs", ".c", ".cpp", ".h", ".hpp"}
+_MD_EXTS = {".md"}
+
+
+class Chunk(NamedTuple):
+    start_line: int  # 1-based, inclusive
+    end_line: int
+    kind: str  # "code", "section", "module" (text before the first boundary) or "window"
+    name: str
+
+
+class ScoredChunk(NamedTuple):
+    score: float
+    rel: str
+    chunk: Chunk
+    text: str
+
+
+def _indent_width(indent: str) -> int:
+    return len(indent.expandtabs(4))
+
+
+def _boundaries(ext: str, lines: List[str]) -> List[Tuple[int, str, str]]:
+    """(1-based line, kind, name) where a new structural chunk starts."""
+    out: List[Tuple[int, str, str]] = []
+    if ext == ".py":
+        for i, line in enumerate(lines):
+            m = _PY_DEF_RE.match(line)
+            # Top-level definitions and methods; nested helpers stay in their parent.
+            if m and _indent_width(m.group(1)) <= 4:
+                start = i
+                while start > 0 and _PY_DECORATOR_RE.match(lines[start - 1]):
+                    start -= 1
+                out.append((start + 1, "code", m.group(2)))
+    elif ext in _MD_EXTS:
+        in_fence = False
+        for i, line in enumerate(lines):
+            if _MD_FENCE_RE.match(line):
+                in_fence = not in_fence
+                continue
+            m = None if in_fence else _MD_HEADING_RE.match(line)
+            if m:
+                out.append((i + 1, "section", m.group(1)))
+    elif ext in _CODE_EXTS:
+        for i, line in enumerate(lines):
+            m = _CODE_DEF_RE.match(line)
+            if m and _indent_width(m.group(1)) <= 4:
+                out.append((i + 1, "code", m.group(2)))
+    return out
+
+
+def _windows(start: int, end: int, kind: str, name: str) -> List[Chunk]:
+    return [
+        Chunk(s, min(end, s + WINDOW_LINES - 1), kind, name)
+        for s in range(start, end + 1, WINDOW_LINES)
+    ]
+
+
+def split_chunks(rel: str, text: str) -> List[Chunk]:
+    """
+    Split a file into structural chunks: functions/classes for code,
+    heading sections for markdown, fixed line windows otherwise. Oversized
+    chunks are split into windows; blank chunks are dropped.
+    """
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()  # trailing newline, not a line of its own
+    n = len(lines)
+    if not n:
+        return []
+
+    ext = os.path.splitext(rel)[1].lower()
+    spans: List[Tuple[int, int, str, str]] = []
+    bounds = _boundaries(ext, lines)
+    if bounds:
+        if bounds[0][0] > 1:
+            spans.append((1, bounds[0][0] - 1, "module", ""))
+        for (start, kind, name), nxt in zip(bounds, bounds[1:] + [(n + 1, "", "")]):
+            if nxt[0] > start:
+                spans.append((start, nxt[0] - 1, kind, name))
+    else:
+        spans.append((1, n, "window", ""))
+
+    chunks: List[Chunk] = []
+    for start, end, kind, name in spans:
+        if not any(lines[i].strip() for i in range(start - 1, end)):
+            continue
+        if end - start + 1 > MAX_CHUNK_LINES or kind == "window":
+            chunks.extend(_windows(start, end, kind, name))
+        else:
+            chunks.append(Chunk(start, end, kind, name))
+    return chunks
+
+
+class ChunkIndex(PersistentDerived):
+    """
+    Per-root chunk boundaries (line spans) for the default text-file set.
+    Only spans are stored; chunk text comes from the content cache at query
+    time. Kept up to date incrementally by FileCatalog.sync().
+    """
+
+    VERSION = 1
+    FILENAME = "chunk_index.json"
+
+    def __init__(self, root: Path, *, respect_gitignore: bool = False):
+        super().__init__(root, respect_gitignore=respect_gitignore)
+        self.chunks: Dict[str, List[Chunk]] = {}
+
+    def chunks_of(self, rel: str) -> Optional[List[Chunk]]:
+        return self.chunks.get(rel)
+
+    # -- Derived protocol --------------------------------------------------
+
+    def reset(self) -> None:
+        self.chunks = {}
+
+    def discard(self, rel: str) -> None:
+        self.chunks.pop(rel, None)
+
+    def update(self, rel: str, text: Optional[str]) -> None:
+        if text is None:
+            self.discard(rel)
+        else:
+            self.chunks[rel] = split_chunks(rel, text)
+
+    # -- persistence -------------------------------------------------------
+
+    def _dump(self) -> Dict[str, Any]:
+        return {"chunks": {rel: [list(c) for c in cs] for rel, cs in self.chunks.items()}}
+
+    def _restore(self, data: Dict[str, Any]) -> None:
+        for rel, cs in data["chunks"].items():
+            self.chunks[rel] = [Chunk(int(s), int(e), str(k), str(nm)) for s, e, k, nm in cs]
+
+
+def open_chunks(
+    root: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[ChunkIndex]:
+    """
+    Up-to-date chunk spans for root (built once, then synced incrementally);
+    None if the build was still unfinished at the deadline.
+    """
+    return open_derived(ChunkIndex, root, respect_gitignore=respect_gitignore, deadline=deadline)
+
+
+def score_chunks(
+    matcher: TokenMatcher,
+    rel: str,
+    path: Path,
+    text: str,
+    chunks: Sequence[Chunk],
+    line_starts: Optional[Sequence[int]] = None,
+) -> List[ScoredChunk]:
+    """
+    Score each chunk on its own text (content hits plus the file's path
+    hits; the per-file structure bonus is left out since nearly every code
+    chunk would get it). Chunks without content hits are dropped, except
+    that a path-matched file keeps its first chunk.
+    """
+    starts = line_starts if line_starts is not None else compute_line_starts(text)
+    n_lines = len(starts)
+    out: List[ScoredChunk] = []
+    fallback: Optional[ScoredChunk] = None
+    for chunk in chunks:
+        if chunk.start_line > n_lines:
+            break  # spans are from an older version of the file
+        chunk = chunk._replace(end_line=min(chunk.end_line, n_lines))
+        body = slice_lines(text, starts, chunk.start_line, chunk.end_line)
+        m = matcher.match(path, body)
+        s = m.breakdown["content"] + m.breakdown["path"]
+        if any(m.counts.values()):
+            out.append(ScoredChunk(s, rel, chunk, body))
+        elif fallback is None and s > 0:
+            fallback = ScoredChunk(s, rel, chunk, body)
+    if not out and fallback is not None:
+        out.append(fallback)
+    return out
+
+
+def pack_chunks(scored: Iterable[ScoredChunk], max_chars: int) -> List[ScoredChunk]:
+    """
+    Greedily fill max_chars with the best chunks (stable: ties keep their
+    offered order). Chunks that don't fit are skipped so smaller relevant
+    ones can still be packed; if even the best chunk is too large it is cut
+    at a line boundary.
+    """
+    ranked = sorted(scored, key=lambda c: c.score, reverse=True)
+    packed: List[ScoredChunk] = []
+    total = 0
+    for c in ranked:
+        remaining = max_chars - total
+        if remaining <= 0:
+            break
+        if len(c.text) <= remaining:
+            packed.append(c)
+            total += len(c.text)
+        elif not packed:
+            cut = c.text[:remaining]
+            if not cut.endswith("\n") and "\n" in cut:
+                cut = cut[: cut.rindex("\n") + 1]
+            end = c.chunk.start_line + cut[:-1].count("\n")
+            packed.append(c._replace(chunk=c.chunk._replace(end_line=end), text=cut))
+            total += len(cut)
+    return packed
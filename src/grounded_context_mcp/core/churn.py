@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .git import GitCommandError, is_git_failure, iter_git_lines, run_git
+from .git_objects import GitRepoReader
+from .ignore import find_repo_top
+from .storage import cache_dir_for, load_json, save_json_atomic
+
+CHURN_VERSION = 1
+CHURN_FILENAME = "churn.json"
+
+CHURN_COMMITS_ENV = "GROUNDED_CONTEXT_CHURN_COMMITS"
+CHURN_DAYS_ENV = "GROUNDED_CONTEXT_CHURN_DAYS"
+DEFAULT_CHURN_COMMITS = 500
+DEFAULT_CHURN_DAYS = 180
+
+# A commit's contribution to hotness halves every this many days.
+HOTNESS_HALF_LIFE_DAYS = 14.0
+_DECAY_PER_S = math.log(2) / (HOTNESS_HALF_LIFE_DAYS * 86400)
+
+_CHURN: Dict[str, "ChurnIndex"] = {}
+# Per repository: a slow `git log` in one repo must not block the others.
+_CHURN_LOCKS: Dict[str, threading.Lock] = {}
+_CHURN_LOCK = threading.Lock()
+
+# (sha, commit time, author, files)
+Commit = Tuple[str, int, str, List[str]]
+
+
+class PathChurn(NamedTuple):
+    commits: int
+    last_ts: int
+    authors: int
+    hotness: float  # at ChurnIndex.ref_ts; see ChurnIndex.hotness()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+def _read_log(top: Path, rev: str, max_commits: int, days: int) -> List[Commit]:
+    """One streaming `git log --name-only` pass; newest commit first."""
+    commits: List[Commit] = []
+    cur: Optional[Commit] = None
+    for line in iter_git_lines(
+        top,
+        [
+            "-c", "core.quotePath=false",
+            "log", "--name-only", "--no-renames", "--format=%x00%H %ct %an",
+            f"--max-count={max_commits}", f"--since={days}.days.ago", rev, "--",
+        ],
+    ):
+        if line.startswith("\0"):
+            sha, ts, author = (line[1:].split(" ", 2) + ["", ""])[:3]
+            cur = (sha, int(ts or 0), author, [])
+            commits.append(cur)
+        elif line and cur is not None:
+            cur[3].append(line)
+    return commits
+
+
+class ChurnIndex:
+    """
+    Per-repository change history over the last N commits / days: commit
+    count, last change, distinct authors and a recency-decayed hotness per
+    path (repo-relative, posix). Lookups are O(1).
+
+    Cached on disk by HEAD sha; when HEAD moves forward only the new
+    commits are read (`git log old..new`), otherwise it is rebuilt.
+    """
+
+    def __init__(self, top: Path):
+        self.top = top
+        self.head = ""
+        self.commits: List[Commit] = []
+        self.paths: Dict[str, PathChurn] = {}
+        self.ref_ts = 0
+
+    # -- query -------------------------------------------------------------
+
+    def get(self, rel: str) -> Optional[PathChurn]:
+        return self.paths.get(rel)
+
+    def hotness(self, rel: str, now: Optional[float] = None) -> float:
+        """Sum over commits touching rel of 0.5 ** (age / half-life), at `now`."""
+        pc = self.paths.get(rel)
+        if pc is None:
+            return 0.0
+        now = time.time() if now is None else now
+        # Every term decays at the same rate, so one factor rescales the sum.
+        return pc.hotness * math.exp(-_DECAY_PER_S * max(0.0, now - self.ref_ts))
+
+    def hottest(self, limit: int = 5) -> List[Tuple[str, PathChurn]]:
+        ranked = sorted(self.paths.items(), key=lambda kv: (-kv[1].hotness, kv[0]))
+        return ranked[:limit]
+
+    # -- build -------------------------------------------------------------
+
+    def _aggregate(self) -> None:
+        self.ref_ts = self.commits[0][1] if self.commits else 0
+        counts: Dict[str, int] = {}
+        last: Dict[str, int] = {}
+        authors: Dict[str, set] = {}
+        hot: Dict[str, float] = {}
+        for _, ts, author, files in self.commits:
+            weight = math.exp(-_DECAY_PER_S * max(0, self.ref_ts - ts))
+            for rel in files:
+                counts[rel] = counts.get(rel, 0) + 1
+                last[rel] = max(last.get(rel, 0), ts)
+                authors.setdefault(rel, set()).add(author)
+                hot[rel] = hot.get(rel, 0.0) + weight
+        self.paths = {
+            rel: PathChurn(counts[rel], last[rel], len(authors[rel]), hot[rel]) for rel in counts
+        }
+
+    def update(self, head: str) -> bool:
+        """Bring the index to `head`; returns True if anything changed."""
+        if head == self.head:
+            return False
+        max_commits = _env_int(CHURN_COMMITS_ENV, DEFAULT_CHURN_COMMITS)
+        days = _env_int(CHURN_DAYS_ENV, DEFAULT_CHURN_DAYS)
+
+        old = self.head
+        forward = bool(old) and not is_git_failure(
+            run_git(self.top, ["merge-base", "--is-ancestor", old, head], timeout_s=5.0)
+        )
+        if forward:
+            commits = _read_log(self.top, f"{old}..{head}", max_commits, days) + self.commits
+        else:
+            commits = _read_log(self.top, head, max_commits, days)
+
+        cutoff = time.time() - days * 86400
+        self.commits = [c for c in commits[:max_commits] if c[1] >= cutoff]
+        self.head = head
+        self._aggregate()
+        return True
+
+    # -- persistence -------------------------------------------------------
+
+    @property
+    def cache_path(self) -> Path:
+        return cache_dir_for(self.top) / CHURN_FILENAME
+
+    def save(self) -> bool:
+        return save_json_atomic(
+            self.cache_path,
+            {
+                "version": CHURN_VERSION,
+                "top": str(self.top),
+                "head": self.head,
+                "commits": [list(c) for c in self.commits],
+            },
+        )
+
+    @classmethod
+    def load(cls, top: Path) -> Optional["ChurnIndex"]:
+        obj = cls(top)
+        data = load_json(obj.cache_path)
+        if not isinstance(data, dict) or data.get("version") != CHURN_VERSION:
+            return None
+        if data.get("top") != str(top):
+            return None
+        try:
+            obj.head = str(data["head"])
+            obj.commits = [(str(s), int(t), str(a), list(f)) for s, t, a, f in data["commits"]]
+        except Exception:
+            return None
+        obj._aggregate()
+        return obj
+
+
+def _head_sha(top: Path) -> Optional[str]:
+    reader = GitRepoReader.open(top)
+    sha = reader.head()[1] if reader is not None else None
+    if sha:
+        return sha
+    out = run_git(top, ["rev-parse", "HEAD"], timeout_s=2.0)
+    return None if is_git_failure(out) else out.strip() or None
+
+
+def open_churn(root: Path) -> Optional[ChurnIndex]:
+    """
+    Up-to-date churn index for the repository containing root, or None
+    outside a repository / before the first commit. When HEAD hasn't moved
+    this reads .git files only and spawns no processes.
+    """
+    top = find_repo_top(root.resolve())
+    if top is None:
+        return None
+    head = _head_sha(top)
+    if head is None:
+        return None
+
+    key = str(top)
+    with _CHURN_LOCK:
+        lock = _CHURN_LOCKS.setdefault(key, threading.Lock())
+
+    with lock:
+        idx = _CHURN.get(key)
+        if idx is None:
+            idx = ChurnIndex.load(top) or ChurnIndex(top)
+            _CHURN[key] = idx
+        try:
+            if idx.update(head):
+                idx.save()
+        except GitCommandError:
+            return None
+        return idx
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+import stat
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+CONTENT_CACHE_BYTES_ENV = "GROUNDED_CONTEXT_CONTENT_CACHE_BYTES"
+DEFAULT_CONTENT_CACHE_BYTES = 64 * 1024 * 1024
+
+# (mtime_ns, size) identifies a file version; the path is the dict key.
+VersionKey = Tuple[int, int]
+
+
+def compute_line_starts(text: str) -> "array[int]":
+    """Offsets of the first character of every line (line N starts at [N-1])."""
+    starts = array("q", [0])
+    find = text.find
+    pos = find("\n")
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = find("\n", pos + 1)
+    return starts
+
+
+class _Entry:
+    __slots__ = ("version", "text", "cost", "truncated", "line_starts")
+
+    def __init__(self, version: VersionKey, text: str, *, cost: int, truncated: bool = False):
+        self.version = version
+        self.text = text
+        self.cost = cost
+        self.truncated = truncated
+        self.line_starts: "Optional[array[int]]" = None
+
+
+def _default_max_bytes() -> int:
+    try:
+        return max(0, int(os.environ.get(CONTENT_CACHE_BYTES_ENV, DEFAULT_CONTENT_CACHE_BYTES)))
+    except ValueError:
+        return DEFAULT_CONTENT_CACHE_BYTES
+
+
+class ContentCache:
+    """
+    Process-wide LRU of decoded file text keyed by (path, mtime_ns, size).
+
+    Cost is the number of bytes kept (the on-disk size, or the prefix for
+    files over the per-file cap), bounded by max_bytes. Only the latest
+    version of a path is kept, so edited files never leave stale copies
+    behind. Line-offset tables are computed lazily and cached with the text.
+    Files sniffed as binary are remembered (by version) and read as None.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = _default_max_bytes() if max_bytes is None else max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._binary: Dict[str, VersionKey] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, path: Path, version: VersionKey) -> Optional[_Entry]:
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def get(self, path: Path, version: VersionKey) -> Optional[str]:
+        entry = self._lookup(path, version)
+        return entry.text if entry is not None else None
+
+    def put(
+        self,
+        path: Path,
+        version: VersionKey,
+        text: str,
+        *,
+        cost: Optional[int] = None,
+        truncated: bool = False,
+    ) -> None:
+        cost = version[1] if cost is None else cost
+        self._insert(path, _Entry(version, text, cost=cost, truncated=truncated))
+
+    def mark_binary(self, path: Path, version: VersionKey) -> None:
+        with self._lock:
+            self._binary[str(path)] = version
+
+    def is_binary(self, path: Path) -> bool:
+        """True if the last version seen of path was sniffed as binary."""
+        with self._lock:
+            return str(path) in self._binary
+
+    def _insert(self, path: Path, entry: _Entry) -> None:
+        cost = entry.cost
+        key = str(path)
+        with self._lock:
+            self._binary.pop(key, None)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.cost
+            if cost > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += cost
+            self._evict_over_budget()
+
+    def _evict_over_budget(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.cost
+            self.evictions += 1
+
+    def _read_entry(self, path: Path, version: Optional[VersionKey]) -> Optional[_Entry]:
+        if version is None:
+            try:
+                st = path.stat()
+            except OSError:
+                return None
+            if not stat.S_ISREG(st.st_mode):
+                return None
+            version = (st.st_mtime_ns, st.st_size)
+
+        entry = self._lookup(path, version)
+        if entry is not None:
+            return entry
+        with self._lock:
+            if self._binary.get(str(path)) == version:
+                return None
+
+        from .fs import load_file  # fs imports this module
+
+        loaded = load_file(path)
+        if loaded is None:
+            return None
+        if loaded.binary:
+            self.mark_binary(path, version)
+            return None
+        entry = _Entry(version, loaded.text, cost=len(loaded.data), truncated=loaded.truncated)
+        self._insert(path, entry)
+        return entry
+
+    def read(self, path: Path, version: Optional[VersionKey] = None) -> Optional[str]:
+        """
+        Read through the cache; None if missing, not a file, unreadable or
+        binary. Files over the per-file cap yield a prefix (see fs.load_file).
+        Pass `version` when the caller already has stat info (e.g. a walk).
+        """
+        entry = self._read_entry(path, version)
+        return entry.text if entry is not None else None
+
+    def read_with_lines(self, path: Path) -> Optional[Tuple[str, "array[int]"]]:
+        """Text plus its line-start table; the table is cached with the text."""
+        entry = self._read_entry(path, None)
+        if entry is None:
+            return None
+        if entry.line_starts is None:
+            entry.line_starts = compute_line_starts(entry.text)
+        return entry.text, entry.line_starts
+
+    def resize(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max(0, max_bytes)
+            self._evict_over_budget()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._binary.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+content_cache = ContentCache()
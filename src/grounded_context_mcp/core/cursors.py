@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Generator, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from .scan import ReaderPool, tracked_pools
+from .topk import TopK
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+CURSOR_TTL_ENV = "GROUNDED_CONTEXT_CURSOR_TTL"
+DEFAULT_CURSOR_TTL_S = 600.0
+MAX_CURSORS = 64
+
+# Ranked hits kept per scan, so later pages are served without rescanning.
+PAGE_POOL = 1000
+
+# Deadline of the ScanState.advance() running in this context.
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("grounded_context_scan_deadline", default=None)
+
+
+def deadline_after(ms: Optional[int]) -> Optional[float]:
+    """time.monotonic() deadline for a per-call budget in milliseconds."""
+    return None if ms is None else time.monotonic() + max(0, ms) / 1000.0
+
+
+def until_ready(open_fn: Callable[[Optional[float]], Optional[R]]) -> Generator[Tuple[float, Any], None, R]:
+    """
+    For score streams run by ScanState: call open_fn (e.g. an index open
+    that returns None when its build runs past the deadline) with the
+    current advance's deadline until it succeeds, pausing the scan after
+    each attempt that ran out of time. Use as `x = yield from until_ready(f)`.
+    """
+    while True:
+        out = open_fn(_DEADLINE.get())
+        if out is not None:
+            return out
+        yield 0.0, None
+
+
+class ScanState(Generic[T]):
+    """
+    A ranking scan that can stop at a deadline and be resumed by a later
+    call: the remaining (score, item) stream plus the best hits so far.
+    `request` holds whatever the tool needs to build a response from it.
+    The stream may yield (0.0, None) while it is still preparing (see
+    until_ready); reader pools it starts are shut down while suspended.
+    """
+
+    def __init__(self, tool: str, request: Any, scores: Iterator[Tuple[float, T]], keep: int):
+        self.tool = tool
+        self.request = request
+        self.scores: Optional[Iterator[Tuple[float, T]]] = scores
+        self.top: TopK[T] = TopK(max(keep, PAGE_POOL))
+        self.scanned = 0
+        self.failed = False
+        self.lock = threading.Lock()
+        self.cursor_id: Optional[str] = None
+        self.pools: List[ReaderPool] = []
+
+    def advance(self, deadline: Optional[float]) -> Tuple[bool, List[Tuple[float, T]]]:
+        """
+        Score until the stream ends or deadline passes. Returns (complete,
+        ranked hits so far). A failed, cancelled or closed scan can't be
+        resumed and never reports complete.
+        """
+        with self.lock:
+            if self.scores is not None:
+                token = _DEADLINE.set(deadline)
+                try:
+                    with tracked_pools(self.pools):
+                        stopped = False
+                        for s, item in self.scores:
+                            if item is not None:
+                                self.scanned += 1
+                                if s > 0:
+                                    self.top.push(s, item)
+                            if deadline is not None and time.monotonic() >= deadline:
+                                stopped = True
+                                break
+                        if not stopped:
+                            self.scores = None
+                except BaseException:
+                    self.scores = None
+                    self.failed = True
+                    raise
+                finally:
+                    _DEADLINE.reset(token)
+                    # A suspended scan keeps no reader threads alive.
+                    for pool in self.pools:
+                        pool.suspend()
+            return self.scores is None and not self.failed, self.top.results()
+
+    def close(self) -> None:
+        """
+        Stop a suspended scan (releases its reader threads). A finished scan
+        holds only its ranked hits and stays usable for paging.
+        """
+        if self.lock.acquire(blocking=False):
+            try:
+                if self.scores is not None:
+                    close = getattr(self.scores, "close", None)
+                    if close is not None:
+                        close()
+                    self.scores = None
+                    self.failed = True
+            finally:
+                self.lock.release()
+
+
+class CursorStore:
+    """
+    Server-side scan states behind opaque cursors "<id>.<offset>". Bounded
+    (oldest evicted first) and expiring after GROUNDED_CONTEXT_CURSOR_TTL
+    seconds without use; evicted scans are closed.
+    """
+
+    def __init__(self, max_entries: int = MAX_CURSORS):
+        self.max_entries = max_entries
+        self._states: "OrderedDict[str, Tuple[float, ScanState]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ttl(self) -> float:
+        try:
+            return float(os.environ.get(CURSOR_TTL_ENV, DEFAULT_CURSOR_TTL_S))
+        except ValueError:
+            return DEFAULT_CURSOR_TTL_S
+
+    def _expire(self, now: float) -> List[ScanState]:
+        ttl = self._ttl()
+        dropped = []
+        while self._states:
+            sid, (used, state) = next(iter(self._states.items()))
+            if len(self._states) <= self.max_entries and (ttl <= 0 or now - used < ttl):
+                break
+            del self._states[sid]
+            dropped.append(state)
+        return dropped
+
+    def issue(self, state: ScanState, offset: int) -> str:
+        now = time.monotonic()
+        with self._lock:
+            sid = state.cursor_id = state.cursor_id or secrets.token_hex(8)
+            self._states[sid] = (now, state)
+            self._states.move_to_end(sid)
+            dropped = self._expire(now)
+        for s in dropped:
+            s.close()
+        return f"{sid}.{offset}"
+
+    def resolve(self, cursor: str, tool: str) -> Optional[Tuple[ScanState, int]]:
+        """(state, offset) for a cursor issued by `tool`, or None if unknown/expired."""
+        sid, _, offset = cursor.partition(".")
+        now = time.monotonic()
+        with self._lock:
+            dropped = self._expire(now)
+            entry = self._states.get(sid)
+            if entry is not None:
+                self._states[sid] = (now, entry[1])
+                self._states.move_to_end(sid)
+        for s in dropped:
+            s.close()
+        if entry is None or entry[1].tool != tool or entry[1].failed or not offset.isdigit():
+            return None
+        return entry[1], int(offset)
+
+    def clear(self) -> None:
+        with self._lock:
+            states = [s for _, s in self._states.values()]
+            self._states.clear()
+        for s in states:
+            s.close()
+
+
+cursor_store = CursorStore()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from .git import GitCommandError, iter_git_lines
+
+DIFF_MAX_BYTES_ENV = "GROUNDED_CONTEXT_DIFF_MAX_BYTES"
+# git diff output beyond this is not read (the process is killed).
+DEFAULT_DIFF_MAX_BYTES = 1024 * 1024
+
+# Unchanged lines git keeps around each change.
+DIFF_CONTEXT_LINES = 3
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$")
+
+_DIFF_ARGS = ["-c", "core.quotePath=false", "diff", "--no-color", "--no-ext-diff", "--relative"]
+
+
+class Hunk(NamedTuple):
+    path: str  # root-relative; the old path for deleted files
+    old_start: int
+    old_lines: int
+    new_start: int
+    new_lines: int
+    section: str  # enclosing function/heading git found for the hunk, or ""
+    text: str  # the "@@" header line followed by the hunk body
+
+
+class DiffHunks(NamedTuple):
+    source: str  # "worktree" (vs HEAD), "last_commit" (HEAD~1..HEAD) or "" (none)
+    hunks: List[Hunk]
+    truncated: bool  # output hit the byte cap; the last hunk may be incomplete
+
+
+def diff_max_bytes() -> int:
+    try:
+        return max(1, int(os.environ.get(DIFF_MAX_BYTES_ENV, DEFAULT_DIFF_MAX_BYTES)))
+    except ValueError:
+        return DEFAULT_DIFF_MAX_BYTES
+
+
+def _strip_prefix(name: str, prefix: str) -> Optional[str]:
+    name = name.rstrip("\t")
+    if name == "/dev/null":
+        return None
+    return name[len(prefix):] if name.startswith(prefix) else name
+
+
+def parse_unified_diff(lines: Iterable[str]) -> List[Hunk]:
+    """
+    Hunks of `git diff` output. Body lines are consumed by the counts in
+    each hunk header, so removed lines that look like "--- x" are safe.
+    """
+    hunks: List[Hunk] = []
+    old_path: Optional[str] = None
+    new_path: Optional[str] = None
+    cur: Optional[List[str]] = None
+    head: Optional[Tuple[int, int, int, int, str]] = None
+    old_left = new_left = 0
+
+    def _close() -> None:
+        nonlocal cur
+        if cur is not None and head is not None:
+            path = new_path or old_path or ""
+            hunks.append(Hunk(path, *head, "\n".join(cur) + "\n"))
+        cur = None
+
+    for line in lines:
+        if cur is not None and (old_left > 0 or new_left > 0 or line.startswith("\\")):
+            cur.append(line)
+            tag = line[:1]
+            if tag in (" ", ""):
+                old_left -= 1
+                new_left -= 1
+            elif tag == "-":
+                old_left -= 1
+            elif tag == "+":
+                new_left -= 1
+            continue
+
+        m = _HUNK_RE.match(line)
+        if m:
+            _close()
+            os_, ol, ns, nl, section = m.groups()
+            old_left = 1 if ol is None else int(ol)
+            new_left = 1 if nl is None else int(nl)
+            head = (int(os_), old_left, int(ns), new_left, section.strip())
+            cur = [line]
+        elif line.startswith("diff --git "):
+            _close()
+            old_path = new_path = None
+        elif line.startswith("--- "):
+            old_path = _strip_prefix(line[4:], "a/")
+        elif line.startswith("+++ "):
+            new_path = _strip_prefix(line[4:], "b/")
+    _close()
+    return hunks
+
+
+def _read_diff(root: Path, args: List[str], max_bytes: int) -> Tuple[List[str], bool]:
+    """Stream diff output, stopping (and killing git) at max_bytes."""
+    lines: List[str] = []
+    used = 0
+    stream = iter_git_lines(root, _DIFF_ARGS + args)
+    try:
+        for line in stream:
+            used += len(line.encode("utf-8", errors="replace")) + 1
+            if used > max_bytes:
+                return lines, True
+            lines.append(line)
+    finally:
+        stream.close()
+    return lines, False
+
+
+def changed_hunks(
+    root: Path,
+    *,
+    context_lines: int = DIFF_CONTEXT_LINES,
+    max_bytes: Optional[int] = None,
+) -> DiffHunks:
+    """
+    Hunks under root for uncommitted changes (staged and unstaged, vs
+    HEAD); when the work tree is clean, for the last commit instead.
+    Outside a repository, or if git fails, no hunks are returned.
+    """
+    max_bytes = diff_max_bytes() if max_bytes is None else max_bytes
+    unified = f"--unified={max(0, context_lines)}"
+    for source, args in (
+        ("worktree", [unified, "HEAD", "--"]),
+        ("last_commit", [unified, "HEAD~1", "HEAD", "--"]),
+    ):
+        try:
+            lines, truncated = _read_diff(root, args, max_bytes)
+        except GitCommandError:
+            continue  # no HEAD yet, root commit, not a repository
+        hunks = parse_unified_diff(lines)
+        if hunks or truncated:  # a capped diff still means this source has changes
+            return DiffHunks(source, hunks, truncated)
+    return DiffHunks("", [], False)
@@ -1,46 +1,281 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import Iterator, Optional, List, Tuple
+import mmap
+import os
+import stat
+from pathlib import Path, PurePath
+from typing import AbstractSet, Iterator, List, NamedTuple, Optional, Tuple
+
+from .content_cache import content_cache
+from .git import git_list_files
+from .ignore import IgnoreRule, is_ignored, load_gitignore, outer_rules
 
 DEFAULT_IGNORES = {
     ".git", ".venv", "venv", "__pycache__", ".pytest_cache", ".mypy_cache",
     "node_modules", "dist", "build"
 }
 
+MAX_FILE_BYTES_ENV = "GROUNDED_CONTEXT_MAX_FILE_BYTES"
+DEFAULT_MAX_FILE_BYTES = 2 * 1024 * 1024
+
+# Binary detection looks at this much of the file.
+SNIFF_BYTES = 8192
+# Files at least this large are read through mmap (only the kept prefix is copied).
+MMAP_MIN_BYTES = 256 * 1024
+
+# Bytes expected in text: printable ASCII/UTF-8 plus common whitespace and ESC.
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7F})
+
 TEXT_EXTS = {
     ".py", ".md", ".txt", ".toml", ".yaml", ".yml", ".json", ".js", ".ts", ".tsx",
     ".html", ".css", ".cpp", ".c", ".h", ".hpp", ".go", ".rs"
 }
 
 
-def iter_text_files(root: Path, file_globs: Optional[List[str]] = None) -> Iterator[Tuple[Path, str]]:
+class FileRecord(NamedTuple):
+    """Cheap walk result: stat info comes from the DirEntry, no Path objects."""
+
+    path: str  # absolute
+    rel: str  # root-relative, posix separators
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+def walk_files(
+    root: Path,
+    *,
+    ignores: AbstractSet[str] = DEFAULT_IGNORES,
+    max_depth: Optional[int] = None,
+    gitignore: bool = False,
+) -> Iterator[FileRecord]:
+    """
+    os.scandir walk that prunes ignored directory names before descending.
+
+    Entries are visited in sorted name order (files of a directory, then its
+    subdirectories) so the walk order is deterministic across platforms.
+    Symlinked directories are not followed; max_depth=0 means root only.
+    With gitignore=True, .gitignore files (and rules inherited from above
+    root) are honored as well.
+    """
     root = root.resolve()
-    for p in root.rglob("*"):
-        if any(part in DEFAULT_IGNORES for part in p.parts):
-            continue
-        if not p.is_file():
+    base_rules: List[IgnoreRule] = outer_rules(root) if gitignore else []
+    stack: List[Tuple[str, str, int, List[IgnoreRule]]] = [(str(root), "", 0, base_rules)]
+    while stack:
+        dir_path, rel_prefix, depth, rules = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
             continue
 
+        if gitignore and any(e.name == ".gitignore" for e in entries):
+            rules = rules + load_gitignore(Path(dir_path) / ".gitignore", strip=rel_prefix)
+
+        subdirs: List[Tuple[str, str, int, List[IgnoreRule]]] = []
+        for entry in entries:
+            if entry.name in ignores:
+                continue
+            rel = rel_prefix + entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if rules and is_ignored(rules, rel, True):
+                        continue
+                    if max_depth is None or depth < max_depth:
+                        subdirs.append((entry.path, rel + "/", depth + 1, rules))
+                    continue
+                if not entry.is_file():
+                    continue
+                if rules and is_ignored(rules, rel, False):
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            yield FileRecord(entry.path, rel, st.st_size, st.st_mtime_ns, st.st_ino)
+
+        stack.extend(reversed(subdirs))
+
+
+def _walk_order_key(rel: str) -> List[Tuple[int, str]]:
+    # Same order as walk_files: within a directory, files before subdirectories.
+    parts = rel.split("/")
+    return [(1, d) for d in parts[:-1]] + [(0, parts[-1])]
+
+
+def git_files(
+    root: Path,
+    *,
+    ignores: AbstractSet[str] = DEFAULT_IGNORES,
+    max_depth: Optional[int] = None,
+) -> Optional[Iterator[FileRecord]]:
+    """
+    Records for the files `git ls-files --cached --others --exclude-standard`
+    lists under root, or None when root is not a usable git work tree.
+    """
+    root = root.resolve()
+    listed = git_list_files(root)
+    if listed is None:
+        return None
+
+    def _records() -> Iterator[FileRecord]:
+        for rel in sorted(listed, key=_walk_order_key):
+            parts = rel.split("/")
+            if any(part in ignores for part in parts):
+                continue
+            if max_depth is not None and len(parts) - 1 > max_depth:
+                continue
+            path = os.path.join(str(root), *parts)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # tracked but deleted in the work tree
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            yield FileRecord(path, rel, st.st_size, st.st_mtime_ns, st.st_ino)
+
+    return _records()
+
+
+def iter_candidate_files(
+    root: Path,
+    file_globs: Optional[List[str]] = None,
+    *,
+    ignores: AbstractSet[str] = DEFAULT_IGNORES,
+    max_depth: Optional[int] = None,
+    respect_gitignore: bool = False,
+) -> Iterator[FileRecord]:
+    """
+    Yield records for the files iter_text_files would read, without reading them.
+
+    respect_gitignore=True takes the file list from git when root is inside a
+    repository, and falls back to a local .gitignore matcher otherwise.
+    """
+    records: Optional[Iterator[FileRecord]] = None
+    if respect_gitignore:
+        records = git_files(root, ignores=ignores, max_depth=max_depth)
+    if records is None:
+        records = walk_files(root, ignores=ignores, max_depth=max_depth, gitignore=respect_gitignore)
+
+    for rec in records:
         if file_globs:
+            p = PurePath(rec.path)
             if not any(p.match(g) for g in file_globs):
                 continue
         else:
-            if p.suffix.lower() not in TEXT_EXTS:
+            if os.path.splitext(rec.rel)[1].lower() not in TEXT_EXTS:
                 continue
 
-        try:
-            text = p.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
+        yield rec
+
+
+def iter_text_files(
+    root: Path,
+    file_globs: Optional[List[str]] = None,
+    *,
+    ignores: AbstractSet[str] = DEFAULT_IGNORES,
+    max_depth: Optional[int] = None,
+    respect_gitignore: bool = False,
+) -> Iterator[Tuple[Path, str]]:
+    for rec in iter_candidate_files(
+        root,
+        file_globs,
+        ignores=ignores,
+        max_depth=max_depth,
+        respect_gitignore=respect_gitignore,
+    ):
+        p = Path(rec.path)
+        text = content_cache.read(p, version=(rec.mtime_ns, rec.size))
+        if text is None:
             continue
 
         yield p, text
 
 
-def read_file_safe(path: Path) -> Optional[str]:
+def decode_text(data: bytes) -> str:
+    """
+    Decode raw bytes exactly like read_text(encoding="utf-8", errors="ignore"),
+    including universal-newline translation.
+    """
+    text = data.decode("utf-8", errors="ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def max_file_bytes() -> int:
+    """Per-file read cap (GROUNDED_CONTEXT_MAX_FILE_BYTES); larger files are partially indexed."""
+    try:
+        return max(1, int(os.environ.get(MAX_FILE_BYTES_ENV, DEFAULT_MAX_FILE_BYTES)))
+    except ValueError:
+        return DEFAULT_MAX_FILE_BYTES
+
+
+def looks_binary(block: bytes) -> bool:
+    """Cheap sniff of a leading block: NUL bytes or >30% control characters."""
+    if not block:
+        return False
+    if b"\x00" in block:
+        return True
+    return len(block.translate(None, _TEXT_BYTES)) / len(block) > 0.30
+
+
+def is_partial(path: Path) -> bool:
+    """True if only a prefix of path is indexed (it exceeds max_file_bytes())."""
     try:
-        if not path.exists() or not path.is_file():
-            return None
-        return path.read_text(encoding="utf-8", errors="ignore")
-    except Exception:
+        return path.stat().st_size > max_file_bytes()
+    except OSError:
+        return False
+
+
+class LoadedFile(NamedTuple):
+    data: bytes  # bytes kept: a prefix ending at a line break when truncated
+    text: str
+    truncated: bool
+    binary: bool  # sniffed as binary; data/text are empty
+
+
+def _cap(buf, limit: int) -> bytes:
+    if len(buf) <= limit:
+        return buf[:]
+    nl = buf.rfind(b"\n", 0, limit)
+    return buf[: nl + 1 if nl != -1 else limit]
+
+
+def load_file(path: Path) -> Optional[LoadedFile]:
+    """
+    Read a file for indexing/scoring: binary files are detected from the
+    first block and skipped, files over max_file_bytes() keep only a
+    line-aligned prefix. Large files are mapped, so only the kept prefix
+    is ever copied. None if missing or unreadable.
+    """
+    limit = max_file_bytes()
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_MIN_BYTES:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if looks_binary(mm[:SNIFF_BYTES]):
+                        return LoadedFile(b"", "", False, True)
+                    data = _cap(mm, limit)
+                    size = len(mm)
+            else:
+                return load_bytes(f.read())
+    except (OSError, ValueError):
         return None
+    return LoadedFile(data, decode_text(data), len(data) < size, False)
+
+
+def load_bytes(raw: bytes) -> LoadedFile:
+    """load_file() for content already in memory, e.g. a git blob."""
+    if looks_binary(raw[:SNIFF_BYTES]):
+        return LoadedFile(b"", "", False, True)
+    data = _cap(raw, max_file_bytes())
+    return LoadedFile(data, decode_text(data), len(data) < len(raw), False)
+
+
+def read_file_safe(path: Path) -> Optional[str]:
+    """
+    Read text through the shared content cache (None if missing, unreadable
+    or binary; only a prefix for files over max_file_bytes()).
+    """
+    return content_cache.read(path)
@@ -64,11 +64,21 @@
 #         return f"[git timeout] cmd={cmd} timeout_s={timeout_s}"
 
 from __future__ import annotations
+import asyncio
+import atexit
 import os
 import subprocess
+import threading
 import time
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cancel import check_cancelled
+from .ignore import find_repo_top
+
+CAT_FILE_IDLE_ENV = "GROUNDED_CONTEXT_GIT_BATCH_IDLE_S"
+# A `git cat-file --batch` process exits after this many idle seconds.
+DEFAULT_CAT_FILE_IDLE_S = 30.0
 
 
 def _kill_process_tree_windows(pid: int) -> None:
@@ -125,3 +135,422 @@ def run_git(root: Path, args: List[str], timeout_s: float = 2.0) -> str:
 
     except Exception as e:
         return f"[git error] {type(e).__name__}: {e}"
+
+
+class GitCommandError(Exception):
+    pass
+
+
+def iter_git_lines(root: Path, args: List[str], timeout_s: float = 30.0) -> Iterator[str]:
+    """
+    Stream stdout lines of a git command as they are produced, so large
+    outputs (e.g. log) are parsed without buffering them whole. Raises
+    GitCommandError on a non-zero exit or when timeout_s elapses.
+    """
+    env = os.environ.copy()
+    env.setdefault("GIT_TERMINAL_PROMPT", "0")
+    try:
+        p = subprocess.Popen(
+            ["git", *args],
+            cwd=str(root),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    except Exception as e:
+        raise GitCommandError(f"{type(e).__name__}: {e}") from e
+
+    timed_out = threading.Event()
+
+    def _kill() -> None:
+        timed_out.set()
+        p.kill()
+
+    timer = threading.Timer(timeout_s, _kill)
+    timer.start()
+    try:
+        assert p.stdout is not None
+        for line in p.stdout:
+            check_cancelled()
+            yield line.rstrip("\n")
+        rc = p.wait()
+        if timed_out.is_set():
+            raise GitCommandError(f"timeout after {timeout_s}s")
+        if rc != 0:
+            raise GitCommandError(f"rc={rc}")
+    finally:
+        timer.cancel()
+        if p.poll() is None:
+            p.kill()
+            p.wait()
+        if p.stdout is not None:
+            p.stdout.close()
+
+
+class BatchObject(NamedTuple):
+    type: str  # "blob", "tree", "commit", "tag"
+    data: bytes
+
+
+def _is_oid(token: bytes) -> bool:
+    return len(token) in (40, 64) and all(c in b"0123456789abcdef" for c in token)
+
+
+def _cat_file_idle_s() -> float:
+    try:
+        return float(os.environ.get(CAT_FILE_IDLE_ENV, DEFAULT_CAT_FILE_IDLE_S))
+    except ValueError:
+        return DEFAULT_CAT_FILE_IDLE_S
+
+
+class CatFileBatch:
+    """
+    A long-lived `git cat-file --batch` process for one repository.
+
+    read() pipelines its requests: a feeder thread writes every object name
+    while the replies are read back in order, so N objects cost one round
+    trip on one process. A process that died since its last use is
+    restarted transparently; an idle one is shut down after idle_s.
+    """
+
+    def __init__(self, top: Path, idle_s: Optional[float] = None):
+        self.top = top
+        self.idle_s = _cat_file_idle_s() if idle_s is None else idle_s
+        self.spawns = 0
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._last_used = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _start(self) -> subprocess.Popen:
+        env = os.environ.copy()
+        env.setdefault("GIT_TERMINAL_PROMPT", "0")
+        self._proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"],
+            cwd=str(self.top),
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.spawns += 1
+        return self._proc
+
+    def _stop(self) -> None:
+        p, self._proc = self._proc, None
+        if p is None:
+            return
+        for stream in (p.stdin, p.stdout):
+            try:
+                if stream is not None:
+                    stream.close()
+            except OSError:
+                pass
+        if p.poll() is None:
+            p.kill()
+        p.wait()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._stop()
+
+    def _idle_check(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._last_used >= self.idle_s:
+                self._stop()
+
+    def _exchange(self, p: subprocess.Popen, names: Sequence[str], timeout_s: float) -> List[Optional[BatchObject]]:
+        assert p.stdin is not None and p.stdout is not None
+        stdin, stdout = p.stdin, p.stdout
+        payload = "".join(f"{n}\n" for n in names).encode("utf-8")
+
+        def _feed() -> None:
+            try:
+                stdin.write(payload)
+                stdin.flush()
+            except (OSError, ValueError):
+                pass  # the reader sees EOF
+
+        feeder = threading.Thread(target=_feed, daemon=True)
+        watchdog = threading.Timer(timeout_s, p.kill)
+        feeder.start()
+        watchdog.start()
+        try:
+            out: List[Optional[BatchObject]] = []
+            for _ in names:
+                header = stdout.readline()
+                if not header.endswith(b"\n"):
+                    raise GitCommandError("cat-file --batch exited")
+                # "<name> missing" / "<name> ambiguous"; the name may contain spaces.
+                if header.endswith((b" missing\n", b" ambiguous\n")):
+                    out.append(None)
+                    continue
+                parts = header.rstrip(b"\n").rsplit(b" ", 2)  # "<oid> <type> <size>"
+                if len(parts) != 3 or not _is_oid(parts[0]) or not parts[2].isdigit():
+                    raise GitCommandError(f"unexpected cat-file --batch header {header!r}")
+                size = int(parts[2])
+                data = stdout.read(size + 1)
+                if len(data) != size + 1:
+                    raise GitCommandError("cat-file --batch exited")
+                out.append(BatchObject(parts[1].decode("ascii"), data[:size]))
+            return out
+        finally:
+            watchdog.cancel()
+            feeder.join()
+
+    def read(self, names: Sequence[str], timeout_s: float = 30.0) -> List[Optional[BatchObject]]:
+        """
+        Objects for names such as "HEAD:src/a.py" or "<sha>", in order; None
+        for names git cannot resolve. Raises GitCommandError if git fails.
+        """
+        # A newline would split one request into two.
+        valid = [i for i, n in enumerate(names) if n and "\n" not in n]
+        out: List[Optional[BatchObject]] = [None] * len(names)
+        if not valid:
+            return out
+
+        with self._lock:
+            for attempt in range(2):
+                fresh = not self.running
+                try:
+                    p = self._start() if fresh else self._proc
+                    assert p is not None
+                    got = self._exchange(p, [names[i] for i in valid], timeout_s)
+                    break
+                except (OSError, ValueError, GitCommandError) as e:
+                    self._stop()
+                    # Retry once only if the failure came from a reused process.
+                    if fresh or attempt:
+                        if isinstance(e, GitCommandError):
+                            raise
+                        raise GitCommandError(f"{type(e).__name__}: {e}") from e
+            self._last_used = time.monotonic()
+            if self.idle_s > 0:
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._timer = threading.Timer(self.idle_s, self._idle_check)
+                self._timer.daemon = True
+                self._timer.start()
+
+        for i, obj in zip(valid, got):
+            out[i] = obj
+        return out
+
+
+_BATCHES: Dict[str, CatFileBatch] = {}
+_BATCHES_LOCK = threading.Lock()
+
+
+def cat_file_batch(root: Path) -> Optional[CatFileBatch]:
+    """The shared CatFileBatch for the repository containing root (None outside one)."""
+    top = find_repo_top(root.resolve())
+    if top is None:
+        return None
+    with _BATCHES_LOCK:
+        batch = _BATCHES.get(str(top))
+        if batch is None:
+            batch = _BATCHES[str(top)] = CatFileBatch(top)
+        return batch
+
+
+@atexit.register
+def close_cat_file_batches() -> None:
+    with _BATCHES_LOCK:
+        batches = list(_BATCHES.values())
+        _BATCHES.clear()
+    for batch in batches:
+        batch.close()
+
+
+def is_git_failure(out: str) -> bool:
+    return out.startswith(("[git error]", "[git timeout]"))
+
+
+async def run_git_async(root: Path, args: List[str], timeout_s: float = 2.0) -> str:
+    """
+    asyncio version of run_git (same return convention), so independent
+    git commands can run concurrently without blocking an event loop.
+    """
+    cmd = ["git", *args]
+    env = os.environ.copy()
+    env.setdefault("GIT_TERMINAL_PROMPT", "0")
+    try:
+        p = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(root),
+            env=env,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except Exception as e:
+        return f"[git error] {type(e).__name__}: {e}"
+
+    try:
+        out_b, err_b = await asyncio.wait_for(p.communicate(), timeout=timeout_s)
+    except asyncio.CancelledError:
+        # The request was abandoned: don't leave git running behind it.
+        if p.returncode is None:
+            p.kill()
+        raise
+    except asyncio.TimeoutError:
+        try:
+            if os.name == "nt":
+                _kill_process_tree_windows(p.pid)
+            else:
+                p.kill()
+            await p.wait()
+        except Exception:
+            pass
+        return f"[git timeout] cmd={cmd} timeout_s={timeout_s}"
+
+    out = out_b.decode("utf-8", errors="replace")
+    if p.returncode != 0:
+        err = err_b.decode("utf-8", errors="replace")
+        return f"[git error] rc={p.returncode} stdout={out.strip()!r} stderr={err.strip()!r}"
+    return out
+
+
+def resolve_git_dir(root: Path) -> Optional[Path]:
+    """
+    The .git directory for root (or an ancestor), following "gitdir:" files
+    used by worktrees and submodules. None when root is not in a repository.
+    """
+    for d in (root, *root.parents):
+        dot_git = d / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            try:
+                line = dot_git.read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+            if not line.startswith("gitdir:"):
+                return None
+            target = Path(line[len("gitdir:"):].strip())
+            return target if target.is_absolute() else (d / target).resolve()
+    return None
+
+
+def common_git_dir(git_dir: Path) -> Path:
+    """Where shared refs/objects live (differs from git_dir for linked worktrees)."""
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+    except OSError:
+        return git_dir
+    p = Path(common)
+    return p if p.is_absolute() else (git_dir / p).resolve()
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def git_state_key(root: Path) -> Optional[Tuple[object, ...]]:
+    """
+    Cheap fingerprint of repository state from file metadata only: HEAD
+    (content and mtime), the ref it points to, packed-refs and the index.
+    Commits, checkouts, staging and resets all change it. None outside a repo.
+    """
+    git_dir = resolve_git_dir(root)
+    if git_dir is None:
+        return None
+    common = common_git_dir(git_dir)
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+    ref_mtime = None
+    if head.startswith("ref:"):
+        ref_mtime = _mtime_ns(common / head[4:].strip())
+    return (
+        str(git_dir),
+        head,
+        _mtime_ns(git_dir / "HEAD"),
+        ref_mtime,
+        _mtime_ns(common / "packed-refs"),
+        _mtime_ns(git_dir / "index"),
+    )
+
+
+class StatusV2(NamedTuple):
+    branch: str  # "HEAD" when detached, like rev-parse --abbrev-ref
+    head_oid: str  # "" before the first commit
+    upstream: str
+    ahead: int
+    behind: int
+    entries: List[Tuple[str, str]]  # (v1-style XY, path); "??" for untracked
+
+
+def parse_status_v2(out: str) -> StatusV2:
+    """Parse `git status --porcelain=v2 --branch -z` output."""
+    branch = head_oid = upstream = ""
+    ahead = behind = 0
+    entries: List[Tuple[str, str]] = []
+
+    records = out.split("\0")
+    i = 0
+    while i < len(records):
+        rec = records[i]
+        i += 1
+        if not rec:
+            continue
+        if rec.startswith("# "):
+            key, _, value = rec[2:].partition(" ")
+            if key == "branch.oid":
+                head_oid = "" if value == "(initial)" else value
+            elif key == "branch.head":
+                branch = "HEAD" if value == "(detached)" else value
+            elif key == "branch.upstream":
+                upstream = value
+            elif key == "branch.ab":
+                a, _, b = value.partition(" ")
+                ahead, behind = abs(int(a or 0)), abs(int(b or 0))
+            continue
+
+        kind = rec[0]
+        if kind == "?":
+            entries.append(("??", rec[2:]))
+        elif kind in "12u":
+            # 1: 8 fields before the path, 2: 9 (+ original path record), u: 10
+            n_fields = {"1": 8, "2": 9, "u": 10}[kind]
+            parts = rec.split(" ", n_fields)
+            if len(parts) > n_fields:
+                entries.append((parts[1].replace(".", " "), parts[n_fields]))
+            if kind == "2":
+                i += 1
+
+    return StatusV2(branch, head_oid, upstream, ahead, behind, entries)
+
+
+def git_list_files(root: Path, timeout_s: float = 10.0) -> Optional[List[str]]:
+    """
+    Files git would consider part of the work tree under root:
+    tracked plus untracked-but-not-ignored, relative to root (posix).
+    Returns None when git is unavailable or root is not inside a repository.
+    """
+    out = run_git(
+        root,
+        ["ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+        timeout_s=timeout_s,
+    )
+    if is_git_failure(out):
+        return None
+
+    # Unmerged paths are listed once per stage; keep the first occurrence.
+    return list(dict.fromkeys(p for p in out.split("\0") if p))
@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import mmap
+import os
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .git import common_git_dir, resolve_git_dir
+
+# Pack object types (gitformat-pack).
+_OBJ_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+_OFS_DELTA = 6
+_REF_DELTA = 7
+
+_IDX_MAGIC = b"\xfftOc"
+_TREE_MODE = "40000"
+_INFLATE_CHUNK = 64 * 1024
+_MAX_DELTA_DEPTH = 64
+# Abbreviated sha lengths, as in git: the core.abbrev=auto floor and the
+# smallest length core.abbrev accepts.
+_DEFAULT_ABBREV = 7
+_MIN_ABBREV = 4
+
+
+class UnsupportedRepo(Exception):
+    """Layout or object this reader doesn't handle; callers fall back to `git`."""
+
+
+@dataclass(frozen=True)
+class CommitInfo:
+    sha: str
+    short: str  # unique abbreviation, like `git log --format=%h`
+    subject: str
+    author: str
+    parents: List[str]
+    tree: str
+    files: Optional[List[str]]  # changed vs first parent; None for merges
+
+
+def _read_text(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+
+class GitRepoReader:
+    """
+    Read-only access to refs and objects of a repository without spawning
+    git: HEAD, loose refs, packed-refs, loose objects and v2 pack indexes
+    (including ofs/ref deltas). Anything else raises UnsupportedRepo.
+    """
+
+    def __init__(self, git_dir: Path):
+        self.git_dir = git_dir
+        self.common_dir = common_git_dir(git_dir)
+        self.objects_dir = self.common_dir / "objects"
+        config = self._config = _read_text(self.common_dir / "config") or ""
+        if "objectformat" in config.replace(" ", "").lower():
+            raise UnsupportedRepo("non-sha1 object format")
+        self._packs: Optional[List[Tuple[Path, Path]]] = None
+        self._packed_refs: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def open(cls, root: Path) -> Optional["GitRepoReader"]:
+        git_dir = resolve_git_dir(root.resolve())
+        if git_dir is None:
+            return None
+        try:
+            return cls(git_dir)
+        except UnsupportedRepo:
+            return None
+
+    # -- refs --------------------------------------------------------------
+
+    def packed_refs(self) -> Dict[str, str]:
+        if self._packed_refs is None:
+            refs: Dict[str, str] = {}
+            text = _read_text(self.common_dir / "packed-refs") or ""
+            for line in text.splitlines():
+                if not line or line[0] in "#^":
+                    continue
+                sha, _, name = line.partition(" ")
+                refs[name.strip()] = sha
+            self._packed_refs = refs
+        return self._packed_refs
+
+    def resolve_ref(self, ref: str) -> Optional[str]:
+        """Follow symbolic refs, then loose refs, then packed-refs."""
+        for _ in range(10):
+            base = self.git_dir if ref == "HEAD" else self.common_dir
+            value = _read_text(base / ref)
+            if value is None:
+                return self.packed_refs().get(ref)
+            if value.startswith("ref:"):
+                ref = value[4:].strip()
+                continue
+            return value
+        return None
+
+    def head(self) -> Tuple[Optional[str], Optional[str]]:
+        """(branch name or None when detached, HEAD sha or None before the first commit)."""
+        value = _read_text(self.git_dir / "HEAD")
+        if value is None:
+            return None, None
+        if value.startswith("ref:"):
+            ref = value[4:].strip()
+            branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+            return branch, self.resolve_ref(ref)
+        return None, value
+
+    # -- objects -----------------------------------------------------------
+
+    def _pack_files(self) -> List[Tuple[Path, Path]]:
+        if self._packs is None:
+            pack_dir = self.objects_dir / "pack"
+            try:
+                names = sorted(os.listdir(pack_dir))
+            except OSError:
+                names = []
+            self._packs = [
+                (pack_dir / n, pack_dir / (n[:-4] + ".pack"))
+                for n in names
+                if n.endswith(".idx") and (pack_dir / (n[:-4] + ".pack")).exists()
+            ]
+        return self._packs
+
+    def read_object(self, sha: str, _depth: int = 0) -> Tuple[str, bytes]:
+        """(type, raw content) of an object, loose or packed."""
+        if _depth > _MAX_DELTA_DEPTH:
+            raise UnsupportedRepo("delta chain too deep")
+
+        loose = self.objects_dir / sha[:2] / sha[2:]
+        try:
+            raw = zlib.decompress(loose.read_bytes())
+        except FileNotFoundError:
+            pass
+        except (OSError, zlib.error) as e:
+            raise UnsupportedRepo(f"unreadable loose object {sha}: {e}")
+        else:
+            header, _, body = raw.partition(b"\0")
+            kind, _, _ = header.decode("ascii", "replace").partition(" ")
+            return kind, body
+
+        binsha = bytes.fromhex(sha)
+        for idx_path, pack_path in self._pack_files():
+            offset = _idx_lookup(idx_path, binsha)
+            if offset is not None:
+                return self._read_packed(pack_path, offset, _depth)
+        raise UnsupportedRepo(f"object {sha} not found")
+
+    def _read_packed(self, pack_path: Path, offset: int, depth: int) -> Tuple[str, bytes]:
+        if depth > _MAX_DELTA_DEPTH:
+            raise UnsupportedRepo("delta chain too deep")
+        with open(pack_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            kind, pos = _entry_header(mm, offset)
+            if kind in _OBJ_TYPES:
+                return _OBJ_TYPES[kind], _inflate(mm, pos)
+            if kind == _OFS_DELTA:
+                c = mm[pos]
+                pos += 1
+                back = c & 0x7F
+                while c & 0x80:
+                    c = mm[pos]
+                    pos += 1
+                    back = ((back + 1) << 7) | (c & 0x7F)
+                delta = _inflate(mm, pos)
+                base_offset = offset - back
+            elif kind == _REF_DELTA:
+                base_sha = mm[pos:pos + 20].hex()
+                delta = _inflate(mm, pos + 20)
+                base_offset = None
+            else:
+                raise UnsupportedRepo(f"pack object type {kind}")
+
+        if base_offset is not None:
+            base_kind, base = self._read_packed(pack_path, base_offset, depth + 1)
+        else:
+            base_kind, base = self.read_object(base_sha, depth + 1)
+        return base_kind, _apply_delta(base, delta)
+
+    def _abbrev_setting(self) -> Optional[int]:
+        """core.abbrev from the repository config: a length, or None for auto."""
+        section = ""
+        value = None
+        for line in self._config.splitlines():
+            line = line.split("#", 1)[0].split(";", 1)[0].strip()
+            if line.startswith("["):
+                section = line.strip("[]").strip().lower()
+            elif section == "core" and "=" in line:
+                key, _, v = line.partition("=")
+                if key.strip().lower() == "abbrev":
+                    value = v.strip().strip('"').lower()
+        if value is None or value == "auto":
+            return None
+        if value in ("no", "false", "off"):
+            return 40
+        try:
+            return min(40, max(_MIN_ABBREV, int(value)))
+        except ValueError:
+            return None
+
+    def abbrev(self, sha: str) -> str:
+        """
+        Shortest prefix of sha that is unique among the repository's objects
+        and at least core.abbrev long (auto: 7, growing with the packed object
+        count), matching git's %h.
+        """
+        binsha = bytes.fromhex(sha)
+        length = self._abbrev_setting()
+        neighbours: List[bytes] = []
+        packed = 0
+        for idx_path, _ in self._pack_files():
+            count, near = _idx_neighbours(idx_path, binsha)
+            packed += count
+            neighbours.extend(near)
+        if length is None:
+            length = max(_DEFAULT_ABBREV, (packed.bit_length() + 1) // 2)
+        try:
+            loose = os.listdir(self.objects_dir / sha[:2])
+        except OSError:
+            loose = []
+        for name in loose:
+            if len(name) == 38 and name != sha[2:]:
+                neighbours.append(bytes.fromhex(sha[:2] + name))
+        for other in neighbours:
+            other_hex = other.hex()
+            common = 0
+            while common < 40 and other_hex[common] == sha[common]:
+                common += 1
+            length = max(length, common + 1)
+        return sha[:min(length, 40)]
+
+    # -- commits -----------------------------------------------------------
+
+    def commit(self, sha: str) -> Tuple[Dict[str, List[str]], str]:
+        kind, body = self.read_object(sha)
+        if kind != "commit":
+            raise UnsupportedRepo(f"{sha} is a {kind}")
+        text = body.decode("utf-8", errors="replace")
+        head, _, message = text.partition("\n\n")
+        headers: Dict[str, List[str]] = {}
+        for line in head.splitlines():
+            if line.startswith(" "):
+                continue  # continuation (e.g. gpgsig)
+            key, _, value = line.partition(" ")
+            headers.setdefault(key, []).append(value)
+        return headers, message
+
+    def tree_entries(self, sha: str) -> Dict[str, Tuple[str, str]]:
+        """name -> (mode, sha); mode "40000" is a subtree."""
+        kind, body = self.read_object(sha)
+        if kind != "tree":
+            raise UnsupportedRepo(f"{sha} is a {kind}")
+        out: Dict[str, Tuple[str, str]] = {}
+        pos = 0
+        while pos < len(body):
+            sp = body.index(b" ", pos)
+            nul = body.index(b"\0", sp)
+            name = body[sp + 1:nul].decode("utf-8", errors="surrogateescape")
+            out[name] = (body[pos:sp].decode("ascii"), body[nul + 1:nul + 21].hex())
+            pos = nul + 21
+        return out
+
+    def _all_files(self, tree: str, prefix: str, out: List[str]) -> None:
+        for name, (mode, sha) in self.tree_entries(tree).items():
+            if mode == _TREE_MODE:
+                self._all_files(sha, f"{prefix}{name}/", out)
+            else:
+                out.append(prefix + name)
+
+    def diff_trees(self, old: Optional[str], new: str, prefix: str = "") -> List[str]:
+        """
+        Sorted paths whose content or mode differs between two trees, like
+        `git diff-tree -r --name-only` (old=None: every file in new).
+        """
+        out: List[str] = []
+        if old is None:
+            self._all_files(new, prefix, out)
+        elif old != new:
+            a = self.tree_entries(old)
+            b = self.tree_entries(new)
+            for name in a.keys() | b.keys():
+                ea, eb = a.get(name), b.get(name)
+                if ea == eb:
+                    continue
+                path = prefix + name
+                a_dir = ea is not None and ea[0] == _TREE_MODE
+                b_dir = eb is not None and eb[0] == _TREE_MODE
+                if a_dir and b_dir:
+                    out.extend(self.diff_trees(ea[1], eb[1], path + "/"))  # type: ignore[index]
+                    continue
+                if a_dir:
+                    self._all_files(ea[1], path + "/", out)  # type: ignore[index]
+                if b_dir:
+                    self._all_files(eb[1], path + "/", out)  # type: ignore[index]
+                if (ea is not None and not a_dir) or (eb is not None and not b_dir):
+                    out.append(path)
+        return sorted(set(out))
+
+    def head_commit(self) -> Optional[CommitInfo]:
+        _, sha = self.head()
+        if not sha:
+            return None
+        headers, message = self.commit(sha)
+
+        author_line = (headers.get("author") or [""])[0]
+        author = author_line.split(" <", 1)[0]
+        # %s: the first paragraph of the message, joined into one line.
+        subject = " ".join(ln.strip() for ln in message.strip("\n").split("\n\n", 1)[0].splitlines())
+
+        parents = headers.get("parent", [])
+        tree = (headers.get("tree") or [""])[0]
+        files: Optional[List[str]] = None
+        if len(parents) <= 1:
+            parent_tree = None
+            if parents:
+                parent_tree = (self.commit(parents[0])[0].get("tree") or [""])[0]
+            files = self.diff_trees(parent_tree, tree)
+        return CommitInfo(sha, self.abbrev(sha), subject, author, parents, tree, files)
+
+
+def _idx_lookup(idx_path: Path, binsha: bytes) -> Optional[int]:
+    """Offset of binsha in a v2 pack index, or None."""
+    with open(idx_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:4] != _IDX_MAGIC or int.from_bytes(mm[4:8], "big") != 2:
+            raise UnsupportedRepo(f"unsupported pack index {idx_path.name}")
+        fanout = 8
+        first = binsha[0]
+        lo = int.from_bytes(mm[fanout + 4 * (first - 1):fanout + 4 * first], "big") if first else 0
+        hi = int.from_bytes(mm[fanout + 4 * first:fanout + 4 * first + 4], "big")
+        n = int.from_bytes(mm[fanout + 4 * 255:fanout + 4 * 256], "big")
+
+        shas = fanout + 4 * 256
+        while lo < hi:
+            mid = (lo + hi) // 2
+            cur = mm[shas + 20 * mid:shas + 20 * mid + 20]
+            if cur < binsha:
+                lo = mid + 1
+            elif cur > binsha:
+                hi = mid
+            else:
+                offsets = shas + 20 * n + 4 * n
+                off = int.from_bytes(mm[offsets + 4 * mid:offsets + 4 * mid + 4], "big")
+                if off & 0x80000000:
+                    large = offsets + 4 * n + 8 * (off & 0x7FFFFFFF)
+                    off = int.from_bytes(mm[large:large + 8], "big")
+                return off
+        return None
+
+
+def _idx_neighbours(idx_path: Path, binsha: bytes) -> Tuple[int, List[bytes]]:
+    """
+    (object count, the entries sorted just before and after binsha) of a v2
+    pack index; only those can share a longer prefix with it.
+    """
+    with open(idx_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:4] != _IDX_MAGIC or int.from_bytes(mm[4:8], "big") != 2:
+            raise UnsupportedRepo(f"unsupported pack index {idx_path.name}")
+        fanout = 8
+        n = int.from_bytes(mm[fanout + 4 * 255:fanout + 4 * 256], "big")
+        shas = fanout + 4 * 256
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mm[shas + 20 * mid:shas + 20 * mid + 20] < binsha:
+                lo = mid + 1
+            else:
+                hi = mid
+        after = lo + 1 if lo < n and mm[shas + 20 * lo:shas + 20 * lo + 20] == binsha else lo
+        near = [mm[shas + 20 * i:shas + 20 * i + 20] for i in (lo - 1, after) if 0 <= i < n]
+        return n, near
+
+
+def _entry_header(mm: mmap.mmap, offset: int) -> Tuple[int, int]:
+    """(type, position after the variable-length size header)."""
+    c = mm[offset]
+    kind = (c >> 4) & 7
+    pos = offset + 1
+    while c & 0x80:
+        c = mm[pos]
+        pos += 1
+    return kind, pos
+
+
+def _inflate(mm: mmap.mmap, pos: int) -> bytes:
+    d = zlib.decompressobj()
+    out = []
+    while not d.eof:
+        chunk = mm[pos:pos + _INFLATE_CHUNK]
+        if not chunk:
+            raise UnsupportedRepo("truncated pack")
+        out.append(d.decompress(chunk))
+        pos += len(chunk)
+    return b"".join(out)
+
+
+def _varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        c = data[pos]
+        pos += 1
+        value |= (c & 0x7F) << shift
+        shift += 7
+        if not c & 0x80:
+            return value, pos
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    _, pos = _varint(delta, 0)  # source size
+    size, pos = _varint(delta, pos)
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            off = n = 0
+            for i in range(4):
+                if op & (1 << i):
+                    off |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (1 << (4 + i)):
+                    n |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[off:off + (n or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise UnsupportedRepo("invalid delta opcode")
+    if len(out) != size:
+        raise UnsupportedRepo("delta size mismatch")
+    return bytes(out)
+
+
+def head_commit(root: Path) -> Optional[CommitInfo]:
+    """HEAD commit read straight from .git; None if unavailable or unsupported."""
+    reader = GitRepoReader.open(root)
+    if reader is None:
+        return None
+    try:
+        return reader.head_commit()
+    except (UnsupportedRepo, OSError, ValueError, IndexError, zlib.error):
+        return None
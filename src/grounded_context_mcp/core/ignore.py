@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+
+class IgnoreRule(NamedTuple):
+    regex: "re.Pattern[str]"
+    negate: bool
+    dir_only: bool
+    basename_only: bool
+    # Rules are written relative to the directory of their .gitignore.
+    # strip: root-relative prefix of that directory (rules inside root)
+    # prepend: path from that directory down to root (rules above root)
+    strip: str
+    prepend: str
+
+
+def _glob_to_regex(pat: str) -> str:
+    out: List[str] = []
+    i, n = 0, len(pat)
+    while i < n:
+        c = pat[i]
+        if pat.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pat.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = i + 1
+            if j < n and pat[j] in "!^":
+                j += 1
+            if j < n and pat[j] == "]":
+                j += 1
+            j = pat.find("]", j)
+            if j == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pat[i + 1:j]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = j + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pat[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def parse_gitignore(text: str, *, strip: str = "", prepend: str = "") -> List[IgnoreRule]:
+    """Compile .gitignore lines (gitignore(5) subset: !, trailing /, anchoring, **)."""
+    rules: List[IgnoreRule] = []
+    for raw in text.splitlines():
+        line = raw.rstrip("\r")
+        if not line or line.startswith("#"):
+            continue
+        # Trailing spaces are ignored unless escaped.
+        while line.endswith(" ") and not line.endswith("\\ "):
+            line = line[:-1]
+        if not line:
+            continue
+
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+
+        anchored = "/" in line
+        line = line.lstrip("/")
+
+        regex = re.compile("^" + _glob_to_regex(line) + "$")
+        rules.append(IgnoreRule(regex, negate, dir_only, not anchored, strip, prepend))
+    return rules
+
+
+def load_gitignore(path: Path, *, strip: str = "", prepend: str = "") -> List[IgnoreRule]:
+    try:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return []
+    return parse_gitignore(text, strip=strip, prepend=prepend)
+
+
+def is_ignored(rules: List[IgnoreRule], rel: str, is_dir: bool) -> bool:
+    """Last matching rule wins; rel is root-relative with posix separators."""
+    ignored = False
+    name = rel.rsplit("/", 1)[-1]
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if not rel.startswith(rule.strip):
+            continue
+        target = name if rule.basename_only else rule.prepend + rel[len(rule.strip):]
+        if rule.regex.match(target):
+            ignored = not rule.negate
+    return ignored
+
+
+def find_repo_top(root: Path) -> Optional[Path]:
+    for d in (root, *root.parents):
+        if (d / ".git").exists():
+            return d
+    return None
+
+
+def outer_rules(root: Path) -> List[IgnoreRule]:
+    """
+    Rules that apply to root but live above it: .git/info/exclude and the
+    .gitignore files of ancestor directories up to the repository top.
+    root's own .gitignore is loaded by the walker like any other directory.
+    """
+    root = root.resolve()
+    top = find_repo_top(root)
+    if top is None:
+        return []
+
+    rules: List[IgnoreRule] = []
+    down = root.relative_to(top).as_posix()
+    prefix = "" if down == "." else down + "/"
+    rules += load_gitignore(top / ".git" / "info" / "exclude", prepend=prefix)
+
+    ancestor = top
+    while ancestor != root:
+        rel_down = os.path.relpath(root, ancestor).replace(os.sep, "/") + "/"
+        rules += load_gitignore(ancestor / ".gitignore", prepend=rel_down)
+        ancestor = ancestor / root.relative_to(ancestor).parts[0]
+    return rules
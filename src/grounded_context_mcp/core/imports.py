@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import ast
+import os
+import posixpath
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .catalog import PersistentDerived, open_derived
+
+_JS_EXTS = (".ts", ".tsx", ".js")
+_JS_IMPORT_RE = re.compile(
+    r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*)["'](\.{1,2}/[^"'\s]*)["']"""
+)
+# Python files the regex fallback can still read (no AST, e.g. mid-edit).
+_PY_IMPORT_RE = re.compile(r"^[ \t]*(?:from[ \t]+([.\w]+)[ \t]+import[ \t]+([\w, \t]+)|import[ \t]+([\w., \t]+))", re.M)
+
+# Specs: "py:<dotted.module>" (absolute Python import) or "rel:<path stem>"
+# (relative import, already resolved against the importing file).
+_PY = "py:"
+_REL = "rel:"
+
+
+def _py_relative_base(rel: str, level: int) -> Optional[str]:
+    """Directory a level-N relative import starts from (None if above root)."""
+    base = posixpath.dirname(rel)
+    for _ in range(level - 1):
+        if not base:
+            return None
+        base = posixpath.dirname(base)
+    return base
+
+
+def _py_specs_from(rel: str, module: Optional[str], names: List[str], level: int) -> List[str]:
+    if level == 0:
+        assert module is not None
+        return [_PY + module] + [f"{_PY}{module}.{n}" for n in names]
+    base = _py_relative_base(rel, level)
+    if base is None:
+        return []
+    stem = posixpath.join(base, *module.split(".")) if module else base
+    out = [_REL + stem] if module else []
+    return out + [_REL + posixpath.join(stem, n) for n in names]
+
+
+def _py_imports(rel: str, text: str) -> List[str]:
+    specs: List[str] = []
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        for m in _PY_IMPORT_RE.finditer(text):
+            if m.group(1):
+                module = m.group(1)
+                level = len(module) - len(module.lstrip("."))
+                names = [n.strip() for n in m.group(2).split(",") if n.strip()]
+                specs += _py_specs_from(rel, module.lstrip(".") or None, names, level)
+            else:
+                specs += [_PY + n.strip().split()[0] for n in m.group(3).split(",") if n.strip()]
+        return specs
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            specs += [_PY + a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [a.name for a in node.names if a.name != "*"]
+            if node.level == 0 and not node.module:
+                continue
+            specs += _py_specs_from(rel, node.module, names, node.level)
+    return specs
+
+
+def _js_imports(rel: str, text: str) -> List[str]:
+    base = posixpath.dirname(rel)
+    specs = []
+    for m in _JS_IMPORT_RE.finditer(text):
+        stem = posixpath.normpath(posixpath.join(base, m.group(1)))
+        if not stem.startswith(".."):
+            specs.append(_REL + stem)
+    return specs
+
+
+def extract_imports(rel: str, text: str) -> List[str]:
+    """Import specs of one file (Python imports, relative JS/TS imports)."""
+    ext = os.path.splitext(rel)[1].lower()
+    if ext == ".py":
+        specs = _py_imports(rel, text)
+    elif ext in _JS_EXTS:
+        specs = _js_imports(rel, text)
+    else:
+        return []
+    return list(dict.fromkeys(specs))
+
+
+class ImportGraph(PersistentDerived):
+    """
+    Per-root import graph over Python and JS/TS files. Raw import specs are
+    stored per file (synced incrementally by FileCatalog.sync()); they are
+    resolved to files on first query after a change, since whether
+    "pkg.mod" is a local module depends on the rest of the tree.
+    """
+
+    VERSION = 1
+    FILENAME = "import_graph.json"
+
+    def __init__(self, root: Path, *, respect_gitignore: bool = False):
+        super().__init__(root, respect_gitignore=respect_gitignore)
+        self.specs: Dict[str, List[str]] = {}
+        self._edges: Optional[Tuple[Dict[str, List[str]], Dict[str, List[str]]]] = None
+
+    # -- query -------------------------------------------------------------
+
+    def imports_of(self, rel: str) -> List[str]:
+        return self._resolved()[0].get(rel, [])
+
+    def importers_of(self, rel: str) -> List[str]:
+        return self._resolved()[1].get(rel, [])
+
+    def _module_map(self) -> Dict[str, str]:
+        """Dotted module name -> file, from each file's import root."""
+        files = self.specs.keys()
+        modules: Dict[str, str] = {}
+        for rel in sorted(files):
+            if not rel.endswith(".py"):
+                continue
+            parts = rel[:-3].split("/")
+            if parts[-1] == "__init__":
+                parts.pop()
+            # The import root is the first ancestor that is not a package.
+            i = len(parts) - 1
+            while i > 0 and "/".join(parts[:i]) + "/__init__.py" in files:
+                i -= 1
+            for j in dict.fromkeys((i, 0)):
+                name = ".".join(parts[j:])
+                if name:
+                    modules.setdefault(name, rel)
+        return modules
+
+    def _resolve(self, spec: str, modules: Dict[str, str]) -> Optional[str]:
+        if spec.startswith(_PY):
+            return modules.get(spec[len(_PY):])
+        stem = spec[len(_REL):]
+        for cand in (
+            stem,
+            stem + ".py",
+            *(stem + ext for ext in _JS_EXTS),
+            stem + "/__init__.py",
+            *(f"{stem}/index{ext}" for ext in _JS_EXTS),
+        ):
+            if cand in self.specs:
+                return cand
+        return None
+
+    def _resolved(self) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        if self._edges is None:
+            modules = self._module_map()
+            out: Dict[str, List[str]] = {}
+            into: Dict[str, List[str]] = {}
+            for rel, specs in self.specs.items():
+                seen: Set[str] = set()
+                for spec in specs:
+                    dst = self._resolve(spec, modules)
+                    if dst is not None and dst != rel and dst not in seen:
+                        seen.add(dst)
+                        out.setdefault(rel, []).append(dst)
+                        into.setdefault(dst, []).append(rel)
+            for dsts in out.values():
+                # Package __init__ files (usually thin) after real modules.
+                dsts.sort(key=lambda d: d.endswith("/__init__.py"))
+            for srcs in into.values():
+                srcs.sort()
+            self._edges = (out, into)
+        return self._edges
+
+    # -- Derived protocol --------------------------------------------------
+
+    def reset(self) -> None:
+        self.specs = {}
+        self._edges = None
+
+    def discard(self, rel: str) -> None:
+        if self.specs.pop(rel, None) is not None:
+            self._edges = None
+
+    def update(self, rel: str, text: Optional[str]) -> None:
+        ext = os.path.splitext(rel)[1].lower()
+        if text is None or (ext != ".py" and ext not in _JS_EXTS):
+            self.discard(rel)
+            return
+        specs = extract_imports(rel, text)
+        if self.specs.get(rel) != specs:
+            self.specs[rel] = specs
+            self._edges = None
+
+    # -- persistence -------------------------------------------------------
+
+    def _dump(self) -> Dict[str, Any]:
+        return {"specs": self.specs}
+
+    def _restore(self, data: Dict[str, Any]) -> None:
+        self.specs = {str(rel): [str(s) for s in specs] for rel, specs in data["specs"].items()}
+
+
+def open_imports(
+    root: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[ImportGraph]:
+    """
+    Up-to-date import graph for root (built once, then synced incrementally);
+    None if the build was still unfinished at the deadline.
+    """
+    return open_derived(ImportGraph, root, respect_gitignore=respect_gitignore, deadline=deadline)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .catalog import PersistentDerived, open_derived
+from .scoring import has_structure
+
+
+def trigrams(s: str) -> Set[str]:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class TrigramIndex(PersistentDerived):
+    """
+    Persistent trigram postings over the default text-file set of a root.
+
+    Postings are built on lowercased text, so any file whose lowercased text
+    contains a query (len >= 3) is guaranteed to be in candidates(query).
+    Callers still verify candidates with the real scorer; the index only
+    rules files out, it never changes scores.
+
+    Kept up to date incrementally by FileCatalog.sync().
+    """
+
+    VERSION = 3
+    FILENAME = "trigram_index.json"
+
+    def __init__(self, root: Path, *, respect_gitignore: bool = False):
+        super().__init__(root, respect_gitignore=respect_gitignore)
+
+        # doc id -> rel (None for freed slots, reused on the next add)
+        self.docs: List[Optional[str]] = []
+        self.ids: Dict[str, int] = {}
+        self.doc_trigrams: Dict[int, List[str]] = {}
+        self.structural: Set[str] = set()
+        # Listed but unreadable: iter_text_files would skip these too.
+        self.unreadable: Set[str] = set()
+        self.postings: Dict[str, Set[int]] = {}
+        self._free: List[int] = []
+
+    # -- query -------------------------------------------------------------
+
+    def candidates(self, query: str) -> Optional[Set[str]]:
+        """
+        Relative paths whose text may contain query (case-insensitive).
+        Returns None when the query is too short to narrow anything.
+        """
+        q = query.strip().lower()
+        if len(q) < 3:
+            return None
+
+        ids: Optional[Set[int]] = None
+        # Rarest trigram first keeps the intersection small.
+        for tri in sorted(trigrams(q), key=lambda t: len(self.postings.get(t, ()))):
+            posting = self.postings.get(tri)
+            if not posting:
+                return set()
+            ids = set(posting) if ids is None else ids & posting
+            if not ids:
+                return set()
+
+        return {self.docs[i] for i in ids or ()}  # type: ignore[misc]
+
+    def is_structural(self, rel: str) -> bool:
+        return rel in self.structural
+
+    def size_of(self, rel: str) -> int:
+        entry = self.catalog.entries.get(rel) if self.catalog is not None else None
+        return entry.size if entry is not None else 0
+
+    def iter_docs(self) -> Iterator[Tuple[str, Path]]:
+        """Yield (rel, abs_path) for readable docs, in catalog walk order."""
+        order = self.catalog.order if self.catalog is not None else self.docs
+        for rel in order:
+            if rel is not None and rel in self.ids and rel not in self.unreadable:
+                yield rel, self.root / rel
+
+    # -- Derived protocol --------------------------------------------------
+
+    def reset(self) -> None:
+        self.docs = []
+        self.ids = {}
+        self.doc_trigrams = {}
+        self.structural = set()
+        self.unreadable = set()
+        self.postings = {}
+        self._free = []
+
+    def discard(self, rel: str) -> None:
+        doc_id = self.ids.pop(rel, None)
+        if doc_id is None:
+            return
+        for tri in self.doc_trigrams.pop(doc_id, ()):
+            posting = self.postings.get(tri)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self.postings[tri]
+        self.structural.discard(rel)
+        self.unreadable.discard(rel)
+        self.docs[doc_id] = None
+        self._free.append(doc_id)
+
+    def update(self, rel: str, text: Optional[str]) -> None:
+        self.discard(rel)
+
+        if self._free:
+            doc_id = self._free.pop()
+            self.docs[doc_id] = rel
+        else:
+            doc_id = len(self.docs)
+            self.docs.append(rel)
+        self.ids[rel] = doc_id
+
+        if text is None:
+            self.unreadable.add(rel)
+            return
+
+        hay = text.lower()
+        if has_structure(hay):
+            self.structural.add(rel)
+        tris = trigrams(hay)
+        self.doc_trigrams[doc_id] = list(tris)
+        for tri in tris:
+            self.postings.setdefault(tri, set()).add(doc_id)
+
+    # -- persistence -------------------------------------------------------
+
+    def _dump(self) -> Dict[str, Any]:
+        # Per-doc trigram lists are replaced on update, never mutated, so
+        # sharing them is a consistent snapshot at O(docs) cost.
+        return {
+            "docs": [
+                None if rel is None else [rel, rel in self.structural, rel in self.unreadable]
+                for rel in self.docs
+            ],
+            "trigrams": [self.doc_trigrams.get(i) for i in range(len(self.docs))],
+        }
+
+    def _encode(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        # Each doc's trigrams concatenated into one string (every trigram is
+        # exactly 3 characters): far smaller than postings lists of doc ids.
+        return {
+            "docs": snapshot["docs"],
+            "trigrams": ["".join(tris) if tris else "" for tris in snapshot["trigrams"]],
+        }
+
+    def _restore(self, data: Dict[str, Any]) -> None:
+        for doc_id, (doc, packed) in enumerate(zip(data["docs"], data["trigrams"])):
+            if doc is None:
+                self.docs.append(None)
+                self._free.append(doc_id)
+                continue
+            rel, structural, unreadable = doc
+            self.docs.append(rel)
+            self.ids[rel] = doc_id
+            if structural:
+                self.structural.add(rel)
+            if unreadable:
+                self.unreadable.add(rel)
+            if packed:
+                tris = [packed[i:i + 3] for i in range(0, len(packed), 3)]
+                self.doc_trigrams[doc_id] = tris
+                for tri in tris:
+                    self.postings.setdefault(tri, set()).add(doc_id)
+
+def open_index(
+    root: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[TrigramIndex]:
+    """
+    Up-to-date trigram index for root (built once, then synced incrementally);
+    None if the build was still unfinished at the deadline.
+    """
+    return open_derived(TrigramIndex, root, respect_gitignore=respect_gitignore, deadline=deadline)
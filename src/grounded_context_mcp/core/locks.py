@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+_ROOT_LOCKS: Dict[str, "RWLock"] = {}
+_ROOT_LOCKS_LOCK = threading.Lock()
+
+
+class RWLock:
+    """
+    Many readers or one writer. Waiting writers block new readers, so a
+    rebuild isn't starved by a stream of queries. Both sides are re-entrant
+    per thread and a writer may also read; a reader may not upgrade.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    def _reads_held(self) -> int:
+        return getattr(self._local, "reads", 0)
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        nested = self._reads_held() > 0 or self._writer == me
+        if not nested:
+            with self._cond:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+        self._local.reads = self._reads_held() + 1
+        try:
+            yield
+        finally:
+            self._local.reads -= 1
+            if not nested:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                if self._reads_held():
+                    raise RuntimeError("cannot take a write lock while holding a read lock")
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+            self._write_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+def root_lock(root: Path) -> RWLock:
+    """
+    Per-root lock: catalog refreshes and index syncs write, queries over
+    the derived indexes read.
+    """
+    key = str(root.resolve())
+    with _ROOT_LOCKS_LOCK:
+        lock = _ROOT_LOCKS.get(key)
+        if lock is None:
+            lock = _ROOT_LOCKS[key] = RWLock()
+        return lock
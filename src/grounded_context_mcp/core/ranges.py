@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import codecs
+import mmap
+import re
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from .content_cache import compute_line_starts, content_cache
+from .fs import SNIFF_BYTES, decode_text, looks_binary, max_file_bytes
+from .snippets import slice_lines
+
+# Files at least this large are served with seek/mmap instead of a full decode.
+RANGE_DIRECT_MIN_BYTES = 1024 * 1024
+
+# UTF-8 never needs more than this many bytes per decoded character.
+_MAX_BYTES_PER_CHAR = 4
+
+# "path#L10-L40", "path#L10-40", "path#L10", "path#L10-" (to EOF), "path#B0-2048"
+_RANGE_RE = re.compile(r"^(?:L(\d+)(?:(-)L?(\d*))?|B(\d+)-(\d*))$")
+
+
+class ReadRange(NamedTuple):
+    unit: str  # "lines" (1-based, inclusive) or "bytes" (0-based, end exclusive)
+    start: int
+    end: Optional[int]  # None: to end of file
+
+    def __str__(self) -> str:
+        end = "" if self.end is None else str(self.end)
+        if self.unit == "bytes":
+            return f"B{self.start}-{end}"
+        return f"L{self.start}-L{end}" if end else f"L{self.start}-"
+
+
+class RangeText(NamedTuple):
+    text: str
+    start: int  # lines: first line; bytes: first byte
+    end: int  # lines: last line included; bytes: offset after the last byte read
+    truncated: bool  # cut short by max_chars
+
+
+def split_path_range(spec: str) -> Tuple[str, Optional[ReadRange]]:
+    """
+    Split "path#<range>" into (path, ReadRange). Strings without a valid
+    range suffix are returned unchanged as a plain path.
+    """
+    path, sep, suffix = spec.rpartition("#")
+    if not sep:
+        return spec, None
+    m = _RANGE_RE.match(suffix)
+    if not m:
+        return spec, None
+
+    l_start, dash, l_end, b_start, b_end = m.groups()
+    if l_start is not None:
+        start = max(1, int(l_start))
+        if not dash:
+            return path, ReadRange("lines", start, start)
+        return path, ReadRange("lines", start, int(l_end) if l_end else None)
+    return path, ReadRange("bytes", int(b_start), int(b_end) if b_end else None)
+
+
+def estimate_chars(path: Path, rng: Optional[ReadRange]) -> Optional[int]:
+    """Upper bound on the decoded size of a (range of a) file; None if missing."""
+    try:
+        size = path.stat().st_size
+    except Exception:
+        return None
+    return _range_size(size, rng)
+
+
+def estimate_blob_chars(data: bytes, rng: Optional[ReadRange]) -> int:
+    """estimate_chars() for content held in memory."""
+    return _range_size(len(data), rng)
+
+
+def _range_size(size: int, rng: Optional[ReadRange]) -> int:
+    if rng is not None and rng.unit == "bytes":
+        end = size if rng.end is None else min(rng.end, size)
+        return max(0, end - rng.start)
+    return size
+
+
+def _cached(size: int) -> bool:
+    """Small files come whole from the content cache (it only caps larger ones)."""
+    return size < RANGE_DIRECT_MIN_BYTES and size <= max_file_bytes()
+
+
+def _sniff_binary(path: Path) -> bool:
+    with open(path, "rb") as f:
+        return looks_binary(f.read(SNIFF_BYTES))
+
+
+def _cut(text: str, max_chars: int) -> Tuple[str, bool]:
+    if len(text) <= max_chars:
+        return text, False
+    return text[:max_chars], True
+
+
+def read_prefix(path: Path, max_chars: int) -> Optional[Tuple[str, bool]]:
+    """
+    First max_chars characters of a file and whether more follow. Large
+    files are read incrementally, never decoded in full.
+    """
+    try:
+        size = path.stat().st_size
+    except Exception:
+        return None
+
+    if _cached(size):
+        text = content_cache.read(path)
+        return None if text is None else _cut(text, max_chars)
+
+    try:
+        if _sniff_binary(path):
+            return None
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read(max_chars)
+            return text, bool(f.read(1))
+    except Exception:
+        return None
+
+
+def _line_span_direct(path: Path, start: int, end: Optional[int], max_bytes: int) -> Optional[bytes]:
+    """Raw bytes of lines [start, end] located with mmap.find, capped at max_bytes."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            for _ in range(start - 1):
+                pos = mm.find(b"\n", pos)
+                if pos == -1:
+                    return None
+                pos += 1
+            if pos >= len(mm):
+                return None
+
+            begin = pos
+            stop = len(mm) if end is None else None
+            line = start
+            while stop is None:
+                nxt = mm.find(b"\n", pos)
+                if nxt == -1:
+                    stop = len(mm)
+                elif line == end or nxt + 1 - begin >= max_bytes:
+                    stop = nxt + 1
+                else:
+                    pos = nxt + 1
+                    line += 1
+            return mm[begin:min(stop, begin + max_bytes)]
+
+
+def _lines_of_text(text: str, starts: Sequence[int], rng: ReadRange, max_chars: int) -> RangeText:
+    n_lines = len(starts) - (1 if text.endswith("\n") else 0)
+    if rng.start > n_lines:
+        return RangeText("", rng.start, rng.start - 1, False)
+    end = n_lines if rng.end is None else min(rng.end, n_lines)
+    body = slice_lines(text, starts, rng.start, end) if end >= rng.start else ""
+    return _line_result(body, rng, max_chars)
+
+
+def _line_result(body: str, rng: ReadRange, max_chars: int) -> RangeText:
+    body, truncated = _cut(body, max_chars)
+    last = rng.start + body[:-1].count("\n") if body else rng.start - 1
+    return RangeText(body, rng.start, last, truncated)
+
+
+def _read_lines(path: Path, rng: ReadRange, max_chars: int) -> Optional[RangeText]:
+    size = path.stat().st_size
+    if _cached(size):
+        loaded = content_cache.read_with_lines(path)
+        if loaded is None:
+            return None
+        return _lines_of_text(*loaded, rng, max_chars)
+    elif _sniff_binary(path):
+        return None
+    else:
+        # +1 char so an exact fit is not reported as truncated
+        raw = _line_span_direct(path, rng.start, rng.end, (max_chars + 1) * _MAX_BYTES_PER_CHAR)
+        if raw is None:
+            return RangeText("", rng.start, rng.start - 1, False)
+        body = decode_text(raw)
+    return _line_result(body, rng, max_chars)
+
+
+def _byte_span(size: int, rng: ReadRange, max_chars: int) -> Tuple[int, int, int]:
+    """(start, end, bytes worth reading) of a byte range in a file of size bytes."""
+    start = min(rng.start, size)
+    end = size if rng.end is None else min(max(rng.end, start), size)
+    return start, end, min(end - start, (max_chars + 1) * _MAX_BYTES_PER_CHAR)
+
+
+def _raw_len(raw: bytes, chars: int) -> int:
+    """
+    Bytes of raw that decode_text() turns into its first `chars` characters,
+    so a truncated read resumes exactly after what it served. CRLF counts as
+    one character and undecodable bytes as none.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    produced = 0
+    i = 0
+    while i < len(raw) and produced < chars:
+        byte = raw[i:i + 1]
+        i += 1
+        out = decoder.decode(byte)
+        produced += len(out)
+        if byte == b"\r" and raw[i:i + 1] == b"\n":
+            i += 1
+    return i
+
+
+def _byte_result(raw: bytes, start: int, end: int, max_chars: int) -> RangeText:
+    body, truncated = _cut(decode_text(raw), max_chars)
+    if truncated:
+        end = start + _raw_len(raw, len(body))
+    elif start + len(raw) < end:
+        # Undecodable bytes shrank the text below max_chars before the range ended.
+        end, truncated = start + len(raw), True
+    return RangeText(body, start, end, truncated)
+
+
+def _read_bytes(path: Path, rng: ReadRange, max_chars: int) -> Optional[RangeText]:
+    size = path.stat().st_size
+    if _sniff_binary(path):
+        return None
+    start, end, want = _byte_span(size, rng, max_chars)
+    with open(path, "rb") as f:
+        f.seek(start)
+        raw = f.read(want)
+    return _byte_result(raw, start, end, max_chars)
+
+
+def read_range(path: Path, rng: ReadRange, max_chars: int) -> Optional[RangeText]:
+    """
+    Read a line or byte range without decoding the whole file (large files
+    use mmap/seek; small ones are served from the content cache). Returns
+    None if the file is missing, unreadable or binary.
+    """
+    try:
+        if rng.unit == "bytes":
+            return _read_bytes(path, rng, max_chars)
+        return _read_lines(path, rng, max_chars)
+    except (OSError, ValueError):
+        return None
+
+
+def blob_prefix(data: bytes, max_chars: int) -> Optional[Tuple[str, bool]]:
+    """read_prefix() for content held in memory (e.g. a git blob); None if binary."""
+    if looks_binary(data[:SNIFF_BYTES]):
+        return None
+    return _cut(decode_text(data), max_chars)
+
+
+def blob_range(data: bytes, rng: ReadRange, max_chars: int) -> Optional[RangeText]:
+    """read_range() for content held in memory; None if binary."""
+    if looks_binary(data[:SNIFF_BYTES]):
+        return None
+    if rng.unit == "bytes":
+        start, end, want = _byte_span(len(data), rng, max_chars)
+        return _byte_result(data[start:start + want], start, end, max_chars)
+    text = decode_text(data)
+    return _lines_of_text(text, compute_line_starts(text), rng, max_chars)
+
+
+def fair_shares(sizes: Sequence[int], budget: int) -> List[int]:
+    """
+    Max-min fair split of budget: every entry gets min(size, cap) where cap
+    is raised until the budget is used, so small entries are served in full
+    and their leftover is redistributed to larger ones.
+    """
+    shares = [0] * len(sizes)
+    pending = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    remaining = max(0, budget)
+    while pending and remaining > 0:
+        cap = remaining // len(pending)
+        i = pending[0]
+        if sizes[i] <= cap:
+            shares[i] = sizes[i]
+            remaining -= sizes[i]
+            pending.pop(0)
+            continue
+        # Everyone left is larger than an even split: give each the cap,
+        # and hand the remainder out one char at a time in request order.
+        extra = remaining - cap * len(pending)
+        for j in sorted(pending):
+            shares[j] = cap + (1 if extra > 0 else 0)
+            extra -= 1
+        break
+    return shares
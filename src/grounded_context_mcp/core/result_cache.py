@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, NamedTuple, Optional, Tuple
+
+from .catalog import get_catalog
+from .git import git_state_key
+
+RESULT_CACHE_TTL_ENV = "GROUNDED_CONTEXT_RESULT_CACHE_TTL"
+RESULT_CACHE_SIZE_ENV = "GROUNDED_CONTEXT_RESULT_CACHE_SIZE"
+# Files outside root (still part of the repo's git status) aren't in the
+# catalog, so git-derived fields may lag by up to this many seconds.
+# <= 0 keeps entries until the fingerprint changes.
+DEFAULT_RESULT_CACHE_TTL_S = 300.0
+# 0 disables the cache.
+DEFAULT_RESULT_CACHE_SIZE = 128
+
+Fingerprint = Tuple[Hashable, ...]
+
+
+class CacheHit(NamedTuple):
+    value: dict  # a private copy
+    age_s: float
+    # Attached as-is (not copied), e.g. (finished scan, next page offset) so
+    # a hit can hand out a fresh cursor instead of a cached one.
+    pages: Any
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def repo_fingerprint(
+    root: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[Fingerprint]:
+    """
+    Cheap state of root: the catalog's identity and generation (bumped by any
+    content change found by its stat walk) plus the git state key (HEAD,
+    current ref, packed-refs, index). No git processes, no content reads
+    for unchanged files, and no root lock. Inside one_refresh_per_call the
+    walk is the call's only one: derived indexes opened next sync to it.
+    None if the walk was still unfinished at the deadline.
+    """
+    root = root.resolve()
+    catalog = get_catalog(root, respect_gitignore=respect_gitignore, deadline=deadline)
+    if catalog is None:
+        return None
+    with catalog.lock:
+        generation = (catalog.catalog_id, catalog.generation)
+    return (generation, git_state_key(root))
+
+
+class ResultCache:
+    """
+    Size-bounded LRU of tool results with a TTL. An entry is only served
+    while the repository fingerprint it was computed at is unchanged; a
+    mismatch drops it. Values are copied in and out.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[Hashable, Tuple[Fingerprint, float, dict, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _size(self) -> int:
+        return max(0, int(_env_float(RESULT_CACHE_SIZE_ENV, DEFAULT_RESULT_CACHE_SIZE)))
+
+    def get(self, key: Hashable, fingerprint: Fingerprint) -> Optional[CacheHit]:
+        ttl = _env_float(RESULT_CACHE_TTL_ENV, DEFAULT_RESULT_CACHE_TTL_S)
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[1] if entry is not None else 0.0
+            if entry is None or entry[0] != fingerprint or (ttl > 0 and age >= ttl):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value, pages = entry[2], entry[3]
+        return CacheHit(copy.deepcopy(value), age, pages)
+
+    def put(self, key: Hashable, fingerprint: Fingerprint, value: dict, pages: Any = None) -> None:
+        size = self._size()
+        if size <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (fingerprint, time.monotonic(), value, pages)
+            self._entries.move_to_end(key)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+result_cache = ResultCache()
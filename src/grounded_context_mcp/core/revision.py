@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import posixpath
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cancel import check_cancelled
+from .git import CatFileBatch, GitCommandError, cat_file_batch, is_git_failure, run_git
+from .ignore import find_repo_top
+
+# Object names per pipelined cat-file round trip; bounds memory when a
+# whole tree is streamed.
+BLOB_BATCH = 256
+
+
+class RevTree(NamedTuple):
+    """Where root sits inside a repository, for reading files at a revision."""
+
+    top: Path
+    prefix: str  # root relative to top, posix, "" or ending in "/"
+    batch: CatFileBatch
+
+
+def valid_rev(rev: str) -> bool:
+    """Reject names that would be read as options or change the "rev:path" syntax."""
+    return bool(rev) and not rev.startswith("-") and not any(c in rev for c in ":\n\0")
+
+
+def open_rev_tree(root: Path, rev: str) -> Optional[RevTree]:
+    """None outside a repository or when rev does not name a commit/tree."""
+    if not valid_rev(rev):
+        return None
+    root = root.resolve()
+    top = find_repo_top(root)
+    batch = cat_file_batch(root) if top is not None else None
+    if top is None or batch is None:
+        return None
+    rel = root.relative_to(top).as_posix()
+    tree = RevTree(top, "" if rel == "." else rel + "/", batch)
+    try:
+        obj = batch.read([f"{rev}^{{tree}}"])[0]
+    except GitCommandError:
+        return None
+    return tree if obj is not None and obj.type == "tree" else None
+
+
+def _norm(rel: str) -> Optional[str]:
+    rel = posixpath.normpath(rel.replace("\\", "/"))
+    if rel.startswith(("/", "../")) or rel in ("..", "."):
+        return None  # outside root
+    return rel
+
+
+def list_files_at(tree: RevTree, rev: str, timeout_s: float = 10.0) -> Optional[List[Tuple[str, int]]]:
+    """(root-relative path, size) of every blob under root at rev, in tree order."""
+    args = ["-c", "core.quotePath=false", "ls-tree", "-r", "-l", "-z", "--full-tree", rev]
+    if tree.prefix:
+        args += ["--", tree.prefix]
+    out = run_git(tree.top, args, timeout_s=timeout_s)
+    if is_git_failure(out):
+        return None
+
+    files: List[Tuple[str, int]] = []
+    for rec in out.split("\0"):
+        meta, tab, path = rec.partition("\t")
+        parts = meta.split()
+        # "<mode> blob <sha> <size>"; submodules are "commit" entries
+        if not tab or len(parts) != 4 or parts[1] != "blob":
+            continue
+        if path.startswith(tree.prefix):
+            files.append((path[len(tree.prefix):], int(parts[3])))
+    return files
+
+
+def iter_blobs(tree: RevTree, rev: str, rels: Sequence[str]) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """
+    (rel, content) for root-relative paths at rev, in order; None for paths
+    that are missing or not files there. One pipelined round trip per
+    BLOB_BATCH paths on the shared cat-file process. Raises
+    GitCommandError if git fails.
+    """
+    for i in range(0, len(rels), BLOB_BATCH):
+        check_cancelled()
+        chunk = rels[i:i + BLOB_BATCH]
+        names = [_norm(rel) for rel in chunk]
+        objs = tree.batch.read([f"{rev}:{tree.prefix}{n}" if n else "" for n in names])
+        for rel, obj in zip(chunk, objs):
+            yield rel, obj.data if obj is not None and obj.type == "blob" else None
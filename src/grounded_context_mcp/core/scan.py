@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from .cancel import check_cancelled
+from .fs import read_file_safe
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+WORKERS_ENV = "GROUNDED_CONTEXT_WORKERS"
+# Upper bound for per-call `workers` (client-supplied); defaults to the
+# larger of the CPU-based default and GROUNDED_CONTEXT_WORKERS.
+MAX_WORKERS_ENV = "GROUNDED_CONTEXT_MAX_WORKERS"
+PROCESSES_ENV = "GROUNDED_CONTEXT_SCORE_PROCESSES"
+
+# Files per process-pool task, and total text size that makes a batch worth
+# shipping to another process (pickling text is not free).
+PROCESS_BATCH_FILES = 64
+PROCESS_MIN_SCAN_BYTES = 32 * 1024 * 1024
+
+ScoreFn = Callable[[Path, str], float]
+Scanned = Tuple[Path, Optional[str], float]
+
+_PROCESS_POOLS: Dict[int, ProcessPoolExecutor] = {}
+_PROCESS_POOLS_LOCK = threading.Lock()
+
+# Reader pools created while a resumable scan advances (see tracked_pools).
+_TRACKED: ContextVar[Optional[List["ReaderPool"]]] = ContextVar("grounded_context_scan_pools", default=None)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _default_workers() -> int:
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def max_workers() -> int:
+    """Ceiling for reader threads per scan (GROUNDED_CONTEXT_MAX_WORKERS)."""
+    ceiling = max(_default_workers(), _env_int(WORKERS_ENV, 0))
+    return max(1, _env_int(MAX_WORKERS_ENV, ceiling))
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """
+    Per-call value, else GROUNDED_CONTEXT_WORKERS, else a CPU-based default;
+    clamped to [1, max_workers()] so one request can't spawn unbounded threads.
+    """
+    if workers is None:
+        workers = _env_int(WORKERS_ENV, _default_workers())
+    return min(max(1, int(workers)), max_workers())
+
+
+class ReaderPool(Executor):
+    """
+    Thread pool whose threads can be released between uses: suspend() lets
+    submitted tasks finish (their futures keep the results) and stops the
+    threads; the next submit() starts them again. Pools created inside
+    tracked_pools() are recorded there.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._ex: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        tracked = _TRACKED.get()
+        if tracked is not None:
+            tracked.append(self)
+
+    @property
+    def running(self) -> bool:
+        return self._ex is not None
+
+    def submit(self, fn: Callable[..., R], /, *args: Any, **kwargs: Any) -> Future:
+        with self._lock:
+            if self._ex is None:
+                self._ex = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gc-scan")
+            return self._ex.submit(fn, *args, **kwargs)
+
+    def suspend(self) -> None:
+        self.shutdown(wait=True)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            ex, self._ex = self._ex, None
+        if ex is not None:
+            ex.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+@contextmanager
+def tracked_pools(pools: List[ReaderPool]) -> Iterator[None]:
+    """Record in `pools` every ReaderPool created in this context (e.g. by a scan's generators)."""
+    token = _TRACKED.set(pools)
+    try:
+        yield
+    finally:
+        _TRACKED.reset(token)
+
+
+def map_ordered(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    *,
+    executor: Optional[Executor] = None,
+    workers: int = 1,
+    window: Optional[int] = None,
+) -> Iterator[R]:
+    """
+    Like map(), but runs fn on a pool with at most `window` tasks in flight
+    (bounded memory) and yields results strictly in input order.
+    """
+    if executor is None and workers <= 1:
+        for item in items:
+            check_cancelled()
+            yield fn(item)
+        return
+
+    own = executor is None
+    ex = executor or ReaderPool(workers)
+    limit = window or max(2, workers * 4)
+    pending: Deque[Future] = deque()
+    try:
+        for item in items:
+            check_cancelled()
+            pending.append(ex.submit(fn, item))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for fut in pending:
+            fut.cancel()
+        if own:
+            ex.shutdown(wait=True, cancel_futures=True)
+
+
+def _process_pool(processes: int) -> ProcessPoolExecutor:
+    with _PROCESS_POOLS_LOCK:
+        pool = _PROCESS_POOLS.get(processes)
+        if pool is None:
+            # spawn: forking a process that runs scan threads is unsafe.
+            ctx = multiprocessing.get_context("spawn")
+            pool = ProcessPoolExecutor(max_workers=processes, mp_context=ctx)
+            _PROCESS_POOLS[processes] = pool
+        return pool
+
+
+@atexit.register
+def _shutdown_process_pools() -> None:
+    with _PROCESS_POOLS_LOCK:
+        for pool in _PROCESS_POOLS.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _PROCESS_POOLS.clear()
+
+
+def _read_and_score(score: ScoreFn, path: Path) -> Scanned:
+    text = read_file_safe(path)
+    if text is None:
+        return path, None, 0.0
+    return path, text, score(path, text)
+
+
+def _read(path: Path) -> Tuple[Path, Optional[str]]:
+    return path, read_file_safe(path)
+
+
+def _score_batch(score: ScoreFn, batch: List[Tuple[Path, str]]) -> List[float]:
+    return [score(p, t) for p, t in batch]
+
+
+def _batches(pairs: Iterable[Tuple[Path, Optional[str]]]) -> Iterator[List[Tuple[Path, Optional[str]]]]:
+    batch: List[Tuple[Path, Optional[str]]] = []
+    for pair in pairs:
+        batch.append(pair)
+        if len(batch) >= PROCESS_BATCH_FILES:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def scan_and_score(
+    paths: Iterable[Path],
+    score: ScoreFn,
+    *,
+    workers: Optional[int] = None,
+    processes: Optional[int] = None,
+    total_bytes: int = 0,
+) -> Iterator[Scanned]:
+    """
+    Read and score files in parallel; yields (path, text, score) in input
+    order, so callers rank exactly as a serial loop would. text is None for
+    unreadable files.
+
+    Reads run on a thread pool (I/O releases the GIL). When a process count
+    is configured (per call or GROUNDED_CONTEXT_SCORE_PROCESSES) and the scan
+    is large (total_bytes), scoring moves to a process pool in batches;
+    `score` must then be picklable (e.g. functools.partial of a module-level
+    function).
+    """
+    n_threads = resolve_workers(workers)
+    n_procs = _env_int(PROCESSES_ENV, 0) if processes is None else processes
+
+    if n_procs <= 0 or total_bytes < PROCESS_MIN_SCAN_BYTES:
+        yield from map_ordered(
+            lambda p: _read_and_score(score, p), paths, workers=n_threads
+        )
+        return
+
+    def _score_in_pool(batch: List[Tuple[Path, Optional[str]]]) -> List[Scanned]:
+        readable = [(p, t) for p, t in batch if t is not None]
+        scores = iter(pool.submit(_score_batch, score, readable).result())
+        return [(p, t, next(scores) if t is not None else 0.0) for p, t in batch]
+
+    pool = _process_pool(n_procs)
+    reads = map_ordered(_read, paths, workers=n_threads)
+    # One thread per in-flight batch: it waits on the process pool result.
+    for scanned in map_ordered(_score_in_pool, _batches(reads), workers=n_procs):
+        yield from scanned
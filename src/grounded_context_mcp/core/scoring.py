@@ -1,6 +1,13 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Dict, List
+
+
+def has_structure(hay: str) -> bool:
+    """Structural hint on lowercased text: the file defines something."""
+    return "def " in hay or "class " in hay
 
 
 def score_match(query: str, path: Path, text: str) -> float:
@@ -19,7 +26,89 @@ def score_match(query: str, path: Path, text: str) -> float:
     if cnt:
         score += min(5.0, 0.5 * cnt)
 
-    if "def " in hay or "class " in hay:
+    if has_structure(hay):
+        score += 0.25
+
+    return score
+
+
+@dataclass(frozen=True)
+class TokenMatch:
+    """Per-token counts for one file plus the additive score breakdown."""
+
+    counts: Dict[str, int]  # normalized token -> occurrences in text
+    path_hits: Dict[str, bool]  # normalized token -> substring of path
+    structural: bool
+    breakdown: Dict[str, float]  # path / content / structure
+    score: float
+
+
+class TokenMatcher:
+    """
+    Multi-token scorer equal to sum(score_match(t, path, text) for t in tokens),
+    but the file and path are lowercased once and each distinct token is
+    counted once, instead of re-lowercasing the whole file per token.
+
+    Counting stays on str.count: on CPython its C-level search beats a single
+    regex alternation pass (and keeps per-token overlap semantics exact).
+    """
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = list(tokens)
+        # Duplicate tokens still contribute once each, like the summed formula.
+        self._weights: Dict[str, int] = {}
+        for t in self.tokens:
+            q = t.strip().lower()
+            if q:
+                self._weights[q] = self._weights.get(q, 0) + 1
+
+    def match(self, path: Path, text: str) -> TokenMatch:
+        p = str(path).lower()
+        hay = text.lower()
+        structural = has_structure(hay)
+
+        counts: Dict[str, int] = {}
+        path_hits: Dict[str, bool] = {}
+        path_score = content_score = structure_score = 0.0
+        for q, weight in self._weights.items():
+            cnt = hay.count(q)
+            hit = q in p
+            counts[q] = cnt
+            path_hits[q] = hit
+            if hit:
+                path_score += 3.0 * weight
+            if cnt:
+                content_score += min(5.0, 0.5 * cnt) * weight
+            if structural:
+                structure_score += 0.25 * weight
+
+        breakdown = {"path": path_score, "content": content_score, "structure": structure_score}
+        return TokenMatch(
+            counts=counts,
+            path_hits=path_hits,
+            structural=structural,
+            breakdown=breakdown,
+            score=path_score + content_score + structure_score,
+        )
+
+    def score(self, path: Path, text: str) -> float:
+        return self.match(path, text).score
+
+
+def score_without_content_match(query: str, path: Path, *, structural: bool) -> float:
+    """
+    score_match for a file whose text is known NOT to contain the query
+    (e.g. ruled out by the trigram index), computed without reading it.
+    """
+    q = query.strip().lower()
+    if not q:
+        return 0.0
+
+    score = 0.0
+    if q in str(path).lower():
+        score += 3.0
+
+    if structural:
         score += 0.25
 
     return score
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .catalog import PersistentDerived, open_derived
+from .topk import TopK
+
+try:  # optional: one vectorized sparse product per query
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is absent
+    np = None
+
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# camelCase / PascalCase / ACRONYMWord pieces
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# Keywords and filler that every file shares.
+_STOP = frozenset(
+    """
+    def class self cls return import from if else elif for while in not and or is none true
+    false the to of an this that const let var function new int void str pass with as try
+    except raise public private static package func fn pub use mut struct type null nil err
+    be it on at by do end args kwargs bool float dict list get set
+    """.split()
+)
+
+# File name terms count this many times: siblings (test_x.py, x.py) share them.
+PATH_TERM_WEIGHT = 3
+
+
+def identifier_terms(text: str) -> List[str]:
+    """Identifiers split into lowercase snake_case/camelCase parts, plus compound identifiers whole."""
+    out: List[str] = []
+    for ident in _IDENT_RE.findall(text):
+        parts = [p.lower() for piece in ident.split("_") for p in _CAMEL_RE.findall(piece)]
+        if len(parts) > 1:
+            out.append(ident.lower())
+        out.extend(p for p in parts if len(p) > 1 and p not in _STOP and not p.isdigit())
+    return out
+
+
+def path_terms(rel: str) -> List[str]:
+    stem = rel.rsplit(".", 1)[0] if "." in rel.rsplit("/", 1)[-1] else rel
+    return identifier_terms(stem.replace("/", " ").replace("-", "_")) * PATH_TERM_WEIGHT
+
+
+class Similar(NamedTuple):
+    rel: str
+    score: float  # cosine similarity of TF-IDF vectors, 0..1
+    shared: List[str]  # terms contributing most
+
+
+class _Vectors:
+    """L2-normalized TF-IDF rows for a snapshot of the corpus (built lazily)."""
+
+    def __init__(self, index: "TfidfIndex"):
+        self.doc_tf = index.doc_tf
+        self.docs = list(self.doc_tf)
+        n = len(self.docs)
+        self.idf = {t: math.log((1 + n) / (1 + c)) + 1.0 for t, c in index.df.items()}
+        self._rows: Dict[str, Dict[str, float]] = {}
+
+        if np is not None:
+            # CSR without scipy: per-nonzero row ids make the product one
+            # bincount. Only the term ids/counts of changed docs are rebuilt
+            # in Python; weighting and normalization are vectorized.
+            self.vocab = index.term_ids
+            arrays = [index.doc_arrays(rel) for rel in self.docs]
+            cols = np.concatenate([a[0] for a in arrays]) if arrays else np.zeros(0, dtype=np.int64)
+            counts = np.concatenate([a[1] for a in arrays]) if arrays else np.zeros(0)
+            lengths = np.fromiter((len(a[0]) for a in arrays), dtype=np.int64, count=n)
+            self.row_ids = np.repeat(np.arange(n, dtype=np.int64), lengths)
+            df = np.bincount(cols, minlength=len(self.vocab))
+            self.idf_arr = np.log((1 + n) / (1 + df)) + 1.0
+            weights = (1.0 + np.log(counts)) * self.idf_arr[cols]
+            norms = np.sqrt(np.bincount(self.row_ids, weights=weights * weights, minlength=n))
+            norms[norms == 0] = 1.0
+            self.indices = cols
+            self.data = (weights / norms[self.row_ids]).astype(np.float32)
+        else:
+            self.postings: Dict[str, List[Tuple[int, float]]] = {}
+            for i, rel in enumerate(self.docs):
+                for t, w in self.row(rel).items():
+                    self.postings.setdefault(t, []).append((i, w))
+
+    def row(self, rel: str) -> Dict[str, float]:
+        """Weighted row of an indexed doc (computed on first use)."""
+        row = self._rows.get(rel)
+        if row is None:
+            row = self._rows[rel] = self.weigh(self.doc_tf[rel])
+        return row
+
+    def weigh(self, tf: Dict[str, int]) -> Dict[str, float]:
+        """Sublinear tf * idf, L2-normalized; terms outside the corpus are dropped."""
+        row = {t: (1.0 + math.log(c)) * self.idf[t] for t, c in tf.items() if t in self.idf}
+        norm = math.sqrt(sum(w * w for w in row.values())) or 1.0
+        return {t: w / norm for t, w in row.items()}
+
+    def scores(self, query: Dict[str, float]) -> List[float]:
+        """Cosine similarity of every doc with the (normalized) query vector."""
+        n = len(self.docs)
+        if np is not None:
+            q = np.zeros(len(self.idf_arr), dtype=np.float32)
+            for t, w in query.items():
+                q[self.vocab[t]] = w
+            return np.bincount(self.row_ids, weights=self.data * q[self.indices], minlength=n).tolist()
+        out = [0.0] * n
+        for t, qw in query.items():
+            for i, w in self.postings.get(t, ()):
+                out[i] += qw * w
+        return out
+
+
+class TfidfIndex(PersistentDerived):
+    """
+    Per-root identifier-term counts for the default text-file set, for
+    "more like this" queries. Counts are synced incrementally by
+    FileCatalog.sync(); the normalized TF-IDF matrix is rebuilt on the
+    first query after a change (idf depends on every document).
+    """
+
+    VERSION = 1
+    FILENAME = "tfidf_index.json"
+
+    def __init__(self, root: Path, *, respect_gitignore: bool = False):
+        super().__init__(root, respect_gitignore=respect_gitignore)
+        self.doc_tf: Dict[str, Dict[str, int]] = {}
+        self.df: Dict[str, int] = {}
+        self._vectors: Optional[_Vectors] = None
+        # NumPy backend: stable term ids and per-doc (term ids, counts)
+        # arrays, rebuilt only for docs that changed.
+        self.term_ids: Dict[str, int] = {}
+        self._arrays: Dict[str, Tuple[Any, Any]] = {}
+
+    @property
+    def backend(self) -> str:
+        return "numpy" if np is not None else "python"
+
+    def vectors(self) -> _Vectors:
+        vec = self._vectors
+        if vec is None:
+            if len(self.term_ids) > 2 * len(self.df) + 1024:
+                # Mostly ids of terms no doc uses any more: renumber.
+                self.term_ids = {}
+                self._arrays = {}
+            vec = self._vectors = _Vectors(self)
+        return vec
+
+    def doc_arrays(self, rel: str) -> Tuple[Any, Any]:
+        arrays = self._arrays.get(rel)
+        if arrays is None:
+            tf = self.doc_tf[rel]
+            ids = [self.term_ids.setdefault(t, len(self.term_ids)) for t in tf]
+            arrays = self._arrays[rel] = (
+                np.asarray(ids, dtype=np.int64),
+                np.fromiter(tf.values(), dtype=np.float64, count=len(tf)),
+            )
+        return arrays
+
+    def similar(
+        self,
+        *,
+        rel: Optional[str] = None,
+        text: Optional[str] = None,
+        k: int = 10,
+        n_shared: int = 5,
+    ) -> List[Similar]:
+        """
+        Top-k documents most similar to an indexed file (rel) or to free
+        text; the query file itself is excluded.
+        """
+        vec = self.vectors()
+        if rel is not None and rel in vec.doc_tf:
+            query = vec.row(rel)
+        else:
+            tf = Counter(identifier_terms(text or ""))
+            if rel is not None:
+                tf.update(path_terms(rel))
+            query = vec.weigh(tf)
+        if not query:
+            return []
+
+        top: TopK[str] = TopK(k)
+        for i, s in enumerate(vec.scores(query)):
+            if s > 0 and vec.docs[i] != rel:
+                top.push(s, vec.docs[i])
+
+        out: List[Similar] = []
+        for s, doc in top.results():
+            row = vec.row(doc)
+            shared = sorted((t for t in query if t in row), key=lambda t: (-query[t] * row[t], t))
+            out.append(Similar(doc, float(s), shared[:n_shared]))
+        return out
+
+    # -- Derived protocol --------------------------------------------------
+
+    def reset(self) -> None:
+        self.doc_tf = {}
+        self.df = {}
+        self._vectors = None
+        self.term_ids = {}
+        self._arrays = {}
+
+    def discard(self, rel: str) -> None:
+        tf = self.doc_tf.pop(rel, None)
+        self._arrays.pop(rel, None)
+        if tf is None:
+            return
+        for t in tf:
+            left = self.df[t] - 1
+            if left:
+                self.df[t] = left
+            else:
+                del self.df[t]
+        self._vectors = None
+
+    def update(self, rel: str, text: Optional[str]) -> None:
+        self.discard(rel)
+        if text is None:
+            return
+        tf = dict(Counter(identifier_terms(text) + path_terms(rel)))
+        if not tf:
+            return
+        self.doc_tf[rel] = tf
+        for t in tf:
+            self.df[t] = self.df.get(t, 0) + 1
+        self._vectors = None
+
+    # -- persistence -------------------------------------------------------
+
+    def _dump(self) -> Dict[str, Any]:
+        return {"docs": self.doc_tf}
+
+    def _restore(self, data: Dict[str, Any]) -> None:
+        for rel, tf in data["docs"].items():
+            self.doc_tf[rel] = {str(t): int(c) for t, c in tf.items()}
+            for t in tf:
+                self.df[t] = self.df.get(t, 0) + 1
+
+
+def open_tfidf(
+    root: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[TfidfIndex]:
+    """
+    Up-to-date TF-IDF term counts for root (built once, then synced incrementally);
+    None if the build was still unfinished at the deadline.
+    """
+    return open_derived(TfidfIndex, root, respect_gitignore=respect_gitignore, deadline=deadline)
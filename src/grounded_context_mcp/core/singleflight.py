@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import inspect
+import json
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .git import git_state_key
+
+
+def call_key(name: str, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Tuple[Hashable, ...]:
+    """
+    (tool, normalized args, root, repo fingerprint): defaults filled in,
+    root resolved, and the git state key so a call never joins one that
+    started before a commit, checkout or staging change.
+    """
+    bound = inspect.signature(fn).bind(*args, **kwargs)
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    root: Optional[Path] = None
+    if isinstance(params.get("root"), str):
+        root = Path(params["root"]).resolve()
+        params["root"] = str(root)
+    fingerprint = git_state_key(root) if root is not None else None
+    return (
+        name,
+        json.dumps(params, sort_keys=True, default=str),
+        str(root),
+        repr(fingerprint),
+    )
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one execution. Every caller
+    gets its own copy of the shared result (or exception). The execution is
+    cancelled only when every caller waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executions = 0
+        self.joined = 0
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, run: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(run()))
+            self._flights[key] = flight
+            self.executions += 1
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.joined += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Last interested caller: stop the work and let the next
+                # identical call start afresh.
+                flight.task.cancel()
+                self._forget(key, flight)
+            raise
+        finally:
+            flight.waiters -= 1
+        return copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+single_flight = SingleFlight()
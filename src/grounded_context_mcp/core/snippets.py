@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from .content_cache import compute_line_starts, content_cache
+
+DEFAULT_WINDOW_LINES = 20
+# Lines shown above the first match of the chosen window.
+CONTEXT_BEFORE = 2
+# Enough positions to find the dense region without scanning pathological files fully.
+MAX_MATCHES = 5000
+
+
+def _line_of(starts: Sequence[int], offset: int) -> int:
+    """1-based line number containing character offset."""
+    return bisect_right(starts, offset)
+
+
+def slice_lines(text: str, starts: Sequence[int], start: int, end: int) -> str:
+    """Text of 1-based inclusive lines [start, end]."""
+    begin_off = starts[start - 1]
+    end_off = starts[end] if end < len(starts) else len(text)
+    return text[begin_off:end_off]
+
+
+def best_window(
+    text: str,
+    tokens: List[str],
+    *,
+    line_starts: Optional[Sequence[int]] = None,
+    max_lines: int = DEFAULT_WINDOW_LINES,
+    max_chars: int = 800,
+) -> dict:
+    """
+    Bounded window of whole lines around the region with the most query
+    matches (distinct tokens first, then total hits). Falls back to the top
+    of the file when nothing matches.
+
+    Returns {"snippet", "start_line", "end_line"} with 1-based inclusive lines.
+    """
+    starts = line_starts if line_starts is not None else compute_line_starts(text)
+    n_lines = len(starts)
+    max_lines = max(1, max_lines)
+
+    words = sorted({t.strip() for t in tokens if t.strip()}, key=len, reverse=True)
+    hits: List[tuple[int, str]] = []  # (line, token)
+    if words:
+        pattern = re.compile("|".join(re.escape(w) for w in words), re.IGNORECASE)
+        for i, m in enumerate(pattern.finditer(text)):
+            if i >= MAX_MATCHES:
+                break
+            hits.append((_line_of(starts, m.start()), m.group(0).lower()))
+
+    start = 1
+    if hits:
+        best: tuple[int, int, int] = (-1, -1, 0)
+        j = 0
+        for i, (line, _) in enumerate(hits):
+            lo = max(1, line - CONTEXT_BEFORE)
+            if i and hits[i - 1][0] == line:
+                continue
+            # hits[i:j] are the matches inside [lo, lo + max_lines)
+            j = max(j, i)
+            while j < len(hits) and hits[j][0] < lo + max_lines:
+                j += 1
+            window = hits[i:j]
+            key = (len({tok for _, tok in window}), len(window), -lo)
+            if key > best:
+                best = key
+        start = -best[2]
+
+    end = min(n_lines, start + max_lines - 1)
+    snippet = slice_lines(text, starts, start, end)[:max_chars]
+
+    # Report the last line actually included after the char cap.
+    end = _line_of(starts, starts[start - 1] + max(0, len(snippet) - 1)) if snippet else start
+    return {"snippet": snippet, "start_line": start, "end_line": end}
+
+
+def snippet_for(path: Path, tokens: List[str], *, max_chars: int = 800) -> dict:
+    """best_window() for a file, using the cached text + line-offset table."""
+    loaded = content_cache.read_with_lines(path)
+    if loaded is None:
+        return {"snippet": "", "start_line": 0, "end_line": 0}
+    text, starts = loaded
+    return best_window(text, tokens, line_starts=starts, max_chars=max_chars)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+CACHE_DIR_ENV = "GROUNDED_CONTEXT_CACHE_DIR"
+
+
+def cache_home() -> Path:
+    """
+    Base directory for persistent caches.
+    Honors GROUNDED_CONTEXT_CACHE_DIR, then XDG_CACHE_HOME, then ~/.cache.
+    """
+    env = os.environ.get(CACHE_DIR_ENV)
+    if env:
+        return Path(env)
+
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "grounded-context-mcp"
+
+
+def cache_dir_for(root: Path) -> Path:
+    """Stable per-root cache directory (keyed by the resolved root path)."""
+    key = hashlib.sha1(str(root.resolve()).encode("utf-8")).hexdigest()[:16]
+    return cache_home() / key
+
+
+def mode_filename(name: str, respect_gitignore: bool) -> str:
+    """Per-enumeration-mode cache file name, e.g. catalog.json / catalog.gitignore.json."""
+    if not respect_gitignore:
+        return name
+    stem, dot, ext = name.rpartition(".")
+    return f"{stem}.gitignore{dot}{ext}"
+
+
+def load_json(path: Path) -> Optional[Any]:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def save_json_atomic(path: Path, obj: Any) -> bool:
+    """
+    Write JSON via temp file + rename so readers never see a partial file.
+    Cache writes are best-effort: failures are reported, never raised.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=path.name, suffix=".tmp", dir=str(path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(obj, f, separators=(",", ":"))
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        return True
+    except Exception:
+        return False
+
+
+class DeferredSaver:
+    """
+    Throttle persistence of large derived structures.
+
+    Incremental updates mark an object dirty; it is written at most once per
+    min_interval_s and flushed at interpreter exit. A stale on-disk copy is
+    harmless: it is caught up from the catalog change journal on load.
+    """
+
+    def __init__(self, min_interval_s: float = 30.0):
+        self.min_interval_s = min_interval_s
+        self._pending: Dict[str, Callable[[], Any]] = {}
+        self._last_save: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def mark(self, key: str, save: Callable[[], Any]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_save.get(key, float("-inf")) < self.min_interval_s:
+                self._pending[key] = save
+                return
+            self._pending.pop(key, None)
+            self._last_save[key] = now
+        save()
+
+    def flush(self) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for save in pending:
+            try:
+                save()
+            except Exception:
+                pass
+
+
+deferred_saver = DeferredSaver()
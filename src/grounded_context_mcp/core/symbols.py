@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import ast
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .catalog import PersistentDerived, open_derived
+
+# Brace languages: keyword declarations (functions, types) at any indent.
+_CODE_DECL_RE = re.compile(
+    r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:declare[ \t]+)?(?:abstract[ \t]+)?"
+    r"(?:pub(?:\([\w:]+\))?[ \t]+)?(?:async[ \t]+)?(?:unsafe[ \t]+)?"
+    r"(function\*?|class|interface|enum|struct|impl|trait|func|fn|type|union|namespace)"
+    r"[ \t]+(?:\([^)]*\)[ \t]*)?([A-Za-z_]\w*)"
+)
+# JS/TS: const name = (...) => / function
+_JS_CONST_FN_RE = re.compile(
+    r"^[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+([A-Za-z_$][\w$]*)[ \t]*(?::[^=]+)?="
+    r"[ \t]*(?:async[ \t]+)?(?:function\b|\([^)]*\)[ \t]*(?::[^=]+)?=>|[A-Za-z_$][\w$]*[ \t]*=>)"
+)
+# C/C++: "type name(args)" opening a definition (not a call or prototype).
+_C_FUNC_RE = re.compile(
+    r"^(?!\s*(?:if|for|while|switch|return|else|do|case|sizeof)\b)"
+    r"[ \t]*(?:[\w:<>,~]+[ \t*&]+)+([A-Za-z_~][\w:~]*)[ \t]*\([^;]*$"
+)
+_C_DEFINE_RE = re.compile(r"^[ \t]*#[ \t]*define[ \t]+([A-Za-z_]\w*)")
+_MD_HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.*?)[ \t#]*$")
+_MD_FENCE_RE = re.compile(r"^[ \t]*(```|~~~)")
+_TOML_TABLE_RE = re.compile(r"^[ \t]*\[\[?[ \t]*([^\]]+?)[ \t]*\]\]?")
+_YAML_KEY_RE = re.compile(r"^([A-Za-z_][\w.-]*)[ \t]*:")
+
+_KIND_OF_KEYWORD = {
+    "function": "function", "function*": "function", "func": "function", "fn": "function",
+    "class": "class", "interface": "interface", "enum": "enum", "struct": "struct",
+    "union": "struct", "impl": "impl", "trait": "trait", "type": "type", "namespace": "namespace",
+}
+
+# Ranking of lookups: definitions people usually mean come first.
+_KIND_ORDER = {"class": 0, "function": 1, "method": 1, "struct": 2, "interface": 2, "trait": 2, "type": 3}
+
+
+class Symbol(NamedTuple):
+    name: str
+    qualname: str  # "Class.method" for members, else name
+    kind: str  # "class", "function", "method", "variable", "struct", "heading", ...
+    rel: str  # root-relative, posix
+    start_line: int  # 1-based, inclusive (decorators included)
+    end_line: int
+
+
+Span = Tuple[str, str, str, int, int]  # (name, qualname, kind, start, end)
+
+
+# -- Python (AST) ------------------------------------------------------------
+
+
+def _py_symbols(text: str) -> List[Span]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return _regex_py_symbols(text)
+
+    out: List[Span] = []
+
+    def _visit(body: List[ast.stmt], prefix: str, in_class: bool) -> None:
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                end = node.end_lineno or node.lineno
+                if isinstance(node, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if in_class else "function"
+                out.append((node.name, prefix + node.name, kind, start, end))
+                _visit(node.body, prefix + node.name + ".", isinstance(node, ast.ClassDef))
+            elif not prefix and isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for t in targets:
+                    if isinstance(t, ast.Name):
+                        out.append((t.id, t.id, "variable", node.lineno, node.end_lineno or node.lineno))
+
+    _visit(tree.body, "", False)
+    return out
+
+
+_PY_DEF_RE = re.compile(r"^([ \t]*)(?:async[ \t]+def|def|class)[ \t]+(\w+)")
+
+
+def _regex_py_symbols(text: str) -> List[Span]:
+    """Files that don't parse (other Python versions, mid-edit): def/class lines only."""
+    out: List[Span] = []
+    for i, line in enumerate(text.split("\n"), 1):
+        m = _PY_DEF_RE.match(line)
+        if m:
+            kind = "class" if line.lstrip().startswith("class") else "function"
+            out.append((m.group(2), m.group(2), kind, i, i))
+    return out
+
+
+# -- other languages (regex) -------------------------------------------------
+
+
+def _brace_end(lines: List[str], start: int) -> int:
+    """Last line of a block opened at lines[start] (0-based) by brace balance."""
+    depth = 0
+    opened = False
+    for i in range(start, min(len(lines), start + 5000)):
+        line = lines[i]
+        depth += line.count("{") - line.count("}")
+        opened = opened or "{" in line
+        if opened and depth <= 0:
+            return i + 1
+        if not opened and (line.rstrip().endswith(";") or i > start + 3):
+            return i + 1  # prototype / declaration without a body
+    return start + 1
+
+
+def _code_symbols(ext: str, text: str) -> List[Span]:
+    lines = text.split("\n")
+    out: List[Span] = []
+    is_c = ext in (".c", ".cpp", ".h", ".hpp")
+    is_js = ext in (".js", ".ts", ".tsx")
+    for i, line in enumerate(lines):
+        m = _CODE_DECL_RE.match(line)
+        if m:
+            kind = _KIND_OF_KEYWORD[m.group(1)]
+            out.append((m.group(2), m.group(2), kind, i + 1, _brace_end(lines, i)))
+            continue
+        if is_js:
+            m = _JS_CONST_FN_RE.match(line)
+            if m:
+                out.append((m.group(1), m.group(1), "function", i + 1, _brace_end(lines, i)))
+        elif is_c:
+            m = _C_DEFINE_RE.match(line)
+            if m:
+                out.append((m.group(1), m.group(1), "macro", i + 1, i + 1))
+                continue
+            m = _C_FUNC_RE.match(line)
+            if m and not line.startswith((" ", "\t")):
+                qual = m.group(1)
+                name = qual.rsplit("::", 1)[-1]
+                out.append((name, qual.replace("::", "."), "function", i + 1, _brace_end(lines, i)))
+    return out
+
+
+def _section_symbols(
+    lines: List[str], starts: List[Tuple[int, str, int]], kind: str
+) -> List[Span]:
+    """(line, name, level) headers -> spans ending before the next header of the same or higher level."""
+    out: List[Span] = []
+    n = len(lines) - (1 if lines and lines[-1] == "" else 0)
+    for j, (line_no, name, level) in enumerate(starts):
+        end = n
+        for nxt_line, _, nxt_level in starts[j + 1:]:
+            if nxt_level <= level:
+                end = nxt_line - 1
+                break
+        out.append((name, name, kind, line_no, max(line_no, end)))
+    return out
+
+
+def _md_symbols(text: str) -> List[Span]:
+    lines = text.split("\n")
+    heads: List[Tuple[int, str, int]] = []
+    in_fence = False
+    for i, line in enumerate(lines):
+        if _MD_FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        m = None if in_fence else _MD_HEADING_RE.match(line)
+        if m:
+            heads.append((i + 1, m.group(2), len(m.group(1))))
+    return _section_symbols(lines, heads, "heading")
+
+
+def _toml_symbols(text: str) -> List[Span]:
+    lines = text.split("\n")
+    heads = [(i + 1, m.group(1), 1) for i, line in enumerate(lines) for m in [_TOML_TABLE_RE.match(line)] if m]
+    return _section_symbols(lines, heads, "table")
+
+
+def _yaml_symbols(text: str) -> List[Span]:
+    lines = text.split("\n")
+    heads = [(i + 1, m.group(1), 1) for i, line in enumerate(lines) for m in [_YAML_KEY_RE.match(line)] if m]
+    return _section_symbols(lines, heads, "key")
+
+
+_EXTRACTORS: Dict[str, Callable[[str], List[Span]]] = {
+    ".py": _py_symbols,
+    ".md": _md_symbols,
+    ".toml": _toml_symbols,
+    ".yaml": _yaml_symbols,
+    ".yml": _yaml_symbols,
+    **{
+        ext: (lambda text, _ext=ext: _code_symbols(_ext, text))
+        for ext in (".js", ".ts", ".tsx", ".go", ".rs", ".c", ".cpp", ".h", ".hpp")
+    },
+}
+
+
+def extract_symbols(rel: str, text: str) -> List[Symbol]:
+    """Definitions in one file: AST for Python, regex extractors otherwise."""
+    extractor = _EXTRACTORS.get(os.path.splitext(rel)[1].lower())
+    if extractor is None:
+        return []
+    return [Symbol(name, qual, kind, rel, s, e) for name, qual, kind, s, e in extractor(text)]
+
+
+class SymbolIndex(PersistentDerived):
+    """
+    Per-root definition table for the default text-file set: name (and
+    "Class.member") -> definitions with line spans. Lookups are dict hits;
+    kept up to date incrementally by FileCatalog.sync().
+    """
+
+    VERSION = 1
+    FILENAME = "symbol_index.json"
+
+    def __init__(self, root: Path, *, respect_gitignore: bool = False):
+        super().__init__(root, respect_gitignore=respect_gitignore)
+        self.by_file: Dict[str, List[Symbol]] = {}
+        self._by_name: Dict[str, List[Symbol]] = {}
+        self._by_lower: Dict[str, List[Symbol]] = {}
+
+    def lookup(self, name: str) -> List[Symbol]:
+        """Exact (qualified or bare) name matches, else case-insensitive ones."""
+        name = name.strip()
+        hits = self._by_name.get(name) or self._by_lower.get(name.lower(), [])
+        return sorted(
+            hits, key=lambda s: (_KIND_ORDER.get(s.kind, 4), s.rel.count("/"), s.rel, s.start_line)
+        )
+
+    def symbols_in(self, rel: str) -> List[Symbol]:
+        return self.by_file.get(rel, [])
+
+    def _keys(self, sym: Symbol) -> List[str]:
+        return [sym.name] if sym.qualname == sym.name else [sym.name, sym.qualname]
+
+    def _add(self, rel: str, syms: List[Symbol]) -> None:
+        self.by_file[rel] = syms
+        for sym in syms:
+            for key in self._keys(sym):
+                self._by_name.setdefault(key, []).append(sym)
+                self._by_lower.setdefault(key.lower(), []).append(sym)
+
+    # -- Derived protocol --------------------------------------------------
+
+    def reset(self) -> None:
+        self.by_file = {}
+        self._by_name = {}
+        self._by_lower = {}
+
+    def discard(self, rel: str) -> None:
+        for sym in self.by_file.pop(rel, []):
+            for key in self._keys(sym):
+                for table, k in ((self._by_name, key), (self._by_lower, key.lower())):
+                    kept = [s for s in table.get(k, []) if s.rel != rel]
+                    if kept:
+                        table[k] = kept
+                    else:
+                        table.pop(k, None)
+
+    def update(self, rel: str, text: Optional[str]) -> None:
+        self.discard(rel)
+        if text is not None:
+            syms = extract_symbols(rel, text)
+            if syms:
+                self._add(rel, syms)
+
+    # -- persistence -------------------------------------------------------
+
+    def _dump(self) -> Dict[str, Any]:
+        return {
+            "symbols": {
+                rel: [[s.name, s.qualname, s.kind, s.start_line, s.end_line] for s in syms]
+                for rel, syms in self.by_file.items()
+            }
+        }
+
+    def _restore(self, data: Dict[str, Any]) -> None:
+        for rel, syms in data["symbols"].items():
+            self._add(
+                rel, [Symbol(str(n), str(q), str(k), rel, int(s), int(e)) for n, q, k, s, e in syms]
+            )
+
+
+def open_symbols(
+    root: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> Optional[SymbolIndex]:
+    """
+    Up-to-date symbol table for root (built once, then synced incrementally);
+    None if the build was still unfinished at the deadline.
+    """
+    return open_derived(SymbolIndex, root, respect_gitignore=respect_gitignore, deadline=deadline)
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import heapq
+from typing import Generic, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TopK(Generic[T]):
+    """
+    Bounded best-k collector for streaming rankings.
+
+    Memory is O(k) regardless of how many items are offered. Ordering is
+    identical to `sorted(items, key=score, reverse=True)[:k]` over the
+    offered sequence: higher score first, ties in offer order.
+    """
+
+    def __init__(self, k: int):
+        self.k = max(0, k)
+        self._seq = 0
+        # min-heap of (score, -seq, item): the root is the weakest kept entry
+        self._heap: List[Tuple[float, int, T]] = []
+
+    def push(self, score: float, item: T) -> None:
+        seq = self._seq
+        self._seq += 1
+        if self.k == 0:
+            return
+        entry = (score, -seq, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def results(self) -> List[Tuple[float, T]]:
+        ordered = sorted(self._heap, key=lambda e: (-e[0], -e[1]))
+        return [(score, item) for score, _, item in ordered]
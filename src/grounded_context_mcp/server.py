@@ -1,2 +1,2 @@
 from . import mcp
-from .tools import search_repo, env_specs, git_insights, grounded_context, recommend_context  # noqa: F401
+from .tools import search_repo, env_specs, git_insights, grounded_context, recommend_context, find_symbol, similar_files  # noqa: F401
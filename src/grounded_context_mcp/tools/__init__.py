@@ -1 +1 @@
-__all__ = ["search_repo", "env_specs", "git_insights", "grounded_context", "recommend_context"]
+__all__ = ["search_repo", "env_specs", "git_insights", "grounded_context", "recommend_context", "find_symbol", "similar_files"]
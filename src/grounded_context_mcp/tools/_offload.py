@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from .. import mcp
+from ..core.cancel import run_offloaded
+from ..core.catalog import one_refresh_per_call
+from ..core.singleflight import call_key, single_flight
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _register(fn: F, run: Callable[..., Awaitable[Any]]) -> F:
+    """
+    Register fn's schema with an async entry point that awaits run.
+    Concurrent identical calls (same tool, arguments and repo state) share
+    one execution. The key stats .git files, so it is built off the loop.
+    Each call refreshes a root's file catalog at most once.
+    """
+
+    @functools.wraps(fn)
+    async def _tool(*args: Any, **kwargs: Any) -> Any:
+        key = await asyncio.to_thread(call_key, fn.__name__, fn, args, kwargs)
+        with one_refresh_per_call():
+            return await single_flight.do(key, lambda: run(*args, **kwargs))
+
+    mcp.tool()(_tool)
+    return fn
+
+
+def offloaded_tool(fn: F) -> F:
+    """
+    Register blocking tool fn with an async entry point that runs it on a
+    worker thread (cancelled with the request). Returns fn itself, so
+    in-process callers keep the plain synchronous function.
+    """
+    return _register(fn, functools.partial(run_offloaded, fn))
+
+
+def async_tool(impl: Optional[Callable[..., Awaitable[Any]]] = None) -> Callable[[F], F]:
+    """
+    Like offloaded_tool for tools with a native async implementation: the
+    server awaits impl (default: the decorated coroutine function itself).
+    """
+
+    def register(fn: F) -> F:
+        return _register(fn, impl or fn)
+
+    return register
@@ -1,7 +1,8 @@
-from .. import mcp
+from ..core.content_cache import content_cache
+from ._offload import offloaded_tool
 
 
-@mcp.tool()
+@offloaded_tool
 def env_specs() -> dict:
     """
     Provide environment + operational constraints for coding agents.
@@ -15,4 +16,6 @@ def env_specs() -> dict:
             "Tools return grounded snippets with file paths",
             "Stable schemas enforced via snapshot tests",
         ],
+        # Shared file-content cache used by every tool (process-wide counters).
+        "content_cache": content_cache.stats(),
     }
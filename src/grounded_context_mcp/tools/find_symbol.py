@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from pathlib import Path, PurePath
+from typing import List, Optional
+
+from ..core.content_cache import content_cache
+from ..core.locks import root_lock
+from ..core.snippets import DEFAULT_WINDOW_LINES, slice_lines
+from ..core.symbols import Symbol, open_symbols
+from ._offload import offloaded_tool
+
+# search_repo(query="symbol:<name>")
+SYMBOL_QUERY_PREFIX = "symbol:"
+
+
+def _body(root_path: Path, sym: Symbol, max_lines: int, max_chars: int) -> tuple[str, int]:
+    """Leading lines of a definition and the last line included."""
+    loaded = content_cache.read_with_lines(root_path / sym.rel)
+    if loaded is None:
+        return "", sym.start_line
+    text, starts = loaded
+    end = min(sym.end_line, sym.start_line + max_lines - 1, len(starts))
+    body = slice_lines(text, starts, sym.start_line, end)[:max_chars]
+    return body, sym.start_line + body[:-1].count("\n") if body else sym.start_line
+
+
+def symbol_hits(
+    name: str,
+    root_path: Path,
+    *,
+    max_results: int = 20,
+    respect_gitignore: bool = False,
+    file_globs: Optional[List[str]] = None,
+    max_lines: int = DEFAULT_WINDOW_LINES,
+    max_chars: int = 800,
+) -> list[dict]:
+    """Definitions of name from the symbol index, each with its leading lines."""
+    index = open_symbols(root_path, respect_gitignore=respect_gitignore)
+    with root_lock(root_path).read():
+        syms = index.lookup(name)
+    if file_globs:
+        syms = [s for s in syms if any(PurePath(root_path / s.rel).match(g) for g in file_globs)]
+    out = []
+    for sym in syms[:max_results]:
+        snippet, shown_end = _body(root_path, sym, max_lines, max_chars)
+        out.append(
+            {
+                "path": sym.rel,
+                "name": sym.name,
+                "qualname": sym.qualname,
+                "kind": sym.kind,
+                "start_line": sym.start_line,
+                "end_line": sym.end_line,
+                "snippet": snippet,
+                "snippet_end_line": shown_end,
+            }
+        )
+    return out
+
+
+@offloaded_tool
+def find_symbol(
+    name: str,
+    root: str = ".",
+    max_results: int = 20,
+    respect_gitignore: bool = False,
+) -> dict:
+    """
+    Where is `name` defined? Looks the name up in a cached symbol table
+    (Python via AST; regex extractors for JS/TS, Go, Rust, C/C++, markdown
+    headings, TOML tables and YAML keys) instead of scanning file text.
+
+    name may be qualified ("Class.method"); an exact match wins, otherwise
+    matching is case-insensitive. Each result has the definition's line
+    span and its first lines as a snippet.
+    """
+    root_path = Path(root).resolve()
+    results = symbol_hits(
+        name, root_path, max_results=max_results, respect_gitignore=respect_gitignore
+    )
+    return {"name": name, "results": results}
@@ -1,9 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Coroutine, Dict, Optional, Tuple, TypeVar
 
-from ..core.git import run_git
-from .. import mcp
+from ..core.git import StatusV2, git_state_key, is_git_failure, parse_status_v2, run_git_async
+from ..core.git_objects import head_commit
+from ._offload import async_tool
+
+T = TypeVar("T")
+
+GIT_CACHE_TTL_ENV = "GROUNDED_CONTEXT_GIT_CACHE_TTL"
+# Unstaged edits don't touch HEAD/refs/index, so cached status may lag by up
+# to this many seconds; <= 0 keeps entries until the git state key changes.
+DEFAULT_GIT_CACHE_TTL_S = 10.0
+
+# root -> (git state key, monotonic time, result)
+_CACHE: Dict[str, Tuple[Tuple[object, ...], float, dict]] = {}
+_CACHE_LOCK = threading.Lock()
 
 
 def _parse_status_files(status_lines: list[str]) -> list[str]:
@@ -31,40 +50,117 @@ def _parse_status_files(status_lines: list[str]) -> list[str]:
     return out
 
 
-@mcp.tool()
-def git_insights(root: str = ".") -> dict:
-    """
-    Lightweight git metadata for the repository.
-    """
-    root_path = Path(root).resolve()
+def _cache_ttl() -> float:
+    try:
+        return float(os.environ.get(GIT_CACHE_TTL_ENV, DEFAULT_GIT_CACHE_TTL_S))
+    except ValueError:
+        return DEFAULT_GIT_CACHE_TTL_S
+
 
-    branch = run_git(root_path, ["rev-parse", "--abbrev-ref", "HEAD"], timeout_s=2.0)
-    last_commit = run_git(
+def _run_blocking(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine from sync code, even when this thread already runs a loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+
+async def _last_commit(root_path: Path) -> Tuple[str, list[str]]:
+    """("<short> <subject> (<author>)", changed files) of HEAD, read from .git when possible."""
+    info = await asyncio.to_thread(head_commit, root_path)
+    if info is not None and info.files is not None:
+        return f"{info.short} {info.subject} ({info.author})", info.files
+
+    # Merges, unsupported layouts, no repository: ask git.
+    show = await run_git_async(
         root_path,
-        ["log", "-1", "--pretty=format:%h %s (%an)"],
+        ["show", "--name-only", "--pretty=format:%h %s (%an)", "HEAD"],
         timeout_s=2.0,
     )
-    status = run_git(root_path, ["status", "--porcelain"], timeout_s=2.0)
+    if is_git_failure(show):
+        return show.strip(), []
+    header, _, files = show.partition("\n")
+    return header.strip(), [ln.strip() for ln in files.splitlines() if ln.strip()]
 
-    # Files changed in HEAD (useful "diff signal" for debugging context)
-    last_commit_files = run_git(
-        root_path,
-        ["show", "--name-only", "--pretty=format:", "HEAD"],
-        timeout_s=2.0,
+
+async def _collect(root_path: Path) -> dict:
+    # Branch + status in one git call; the last commit is read from .git directly.
+    # --no-optional-locks: status must not rewrite the index (it is part of the cache key).
+    status, (last_commit, last_commit_files_lines) = await asyncio.gather(
+        run_git_async(
+            root_path,
+            ["--no-optional-locks", "status", "--porcelain=v2", "--branch", "-z"],
+            timeout_s=2.0,
+        ),
+        _last_commit(root_path),
     )
 
-    status_lines = status.splitlines()
-    last_commit_files_lines = [ln.strip() for ln in last_commit_files.splitlines() if ln.strip()]
+    if is_git_failure(status):
+        st = StatusV2(status.strip(), "", "", 0, 0, [])
+    else:
+        st = parse_status_v2(status)
+    # Same "XY path" shape as `git status --porcelain` (v1).
+    status_lines = [f"{xy} {path}" for xy, path in st.entries]
 
     return {
         "ok": True,
         "root": str(root_path),
-        "branch": branch.strip(),
-        "last_commit": last_commit.strip(),
-        "dirty": bool(status.strip()),
+        "branch": st.branch,
+        "head": st.head_oid,
+        "upstream": st.upstream,
+        "ahead": st.ahead,
+        "behind": st.behind,
+        "last_commit": last_commit,
+        "dirty": bool(status_lines),
         # Keep the original raw status preview (stable + bounded)
         "status_porcelain": status_lines[:50],
         # New: clean lists for "Context Diff Mode"
         "worktree_changed_files": _parse_status_files(status_lines[:200]),
         "last_commit_files": last_commit_files_lines[:200],
     }
+
+
+async def git_insights_async(root: str = ".") -> dict:
+    """
+    git_insights for async callers. Results are cached per root and reused
+    while .git/HEAD, the current ref, packed-refs and the index are
+    unchanged (and within the TTL), so repeat calls spawn no processes.
+    """
+    # Resolving the root and stat-ing .git touch the filesystem: off the loop.
+    root_path = await asyncio.to_thread(Path(root).resolve)
+    key = await asyncio.to_thread(git_state_key, root_path)
+    cache_key = str(root_path)
+    ttl = _cache_ttl()
+
+    if key is not None:
+        with _CACHE_LOCK:
+            hit = _CACHE.get(cache_key)
+        if hit is not None and hit[0] == key and (ttl <= 0 or time.monotonic() - hit[1] < ttl):
+            return copy.deepcopy(hit[2])
+
+    started = time.monotonic()
+    result = await _collect(root_path)
+
+    # Only cache if nothing moved while git was running.
+    if key is not None and await asyncio.to_thread(git_state_key, root_path) == key:
+        with _CACHE_LOCK:
+            _CACHE[cache_key] = (key, started, copy.deepcopy(result))
+    return result
+
+
+def clear_git_cache(root: Optional[str] = None) -> None:
+    with _CACHE_LOCK:
+        if root is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(str(Path(root).resolve()), None)
+
+
+@async_tool(git_insights_async)
+def git_insights(root: str = ".") -> dict:
+    """
+    Lightweight git metadata for the repository.
+    """
+    return _run_blocking(git_insights_async(root))
@@ -1,35 +1,175 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import List, Literal, Optional, Union
 
-from .. import mcp
-from ..core.fs import read_file_safe
+from ..core.git import GitCommandError
+from ..core.ranges import (
+    ReadRange,
+    blob_prefix,
+    blob_range,
+    estimate_blob_chars,
+    estimate_chars,
+    fair_shares,
+    read_prefix,
+    read_range,
+    split_path_range,
+)
+from ..core.revision import iter_blobs, open_rev_tree
+from ._offload import offloaded_tool
 
+# "sequential": paths are served in order until max_chars is spent.
+# "fair": max-min fair split of max_chars, leftovers go to longer paths.
+Packing = Literal["sequential", "fair"]
+
+_BUDGET_EXHAUSTED = "max_chars budget exhausted"
+
+# A request reads from the work tree (Path) or from a blob at a revision (bytes).
+Source = Union[Path, bytes]
+
+
+def _base(path: str, rng: Optional[ReadRange]) -> dict:
+    return {"path": path} if rng is None else {"path": path, "range": str(rng)}
 
-@mcp.tool()
-def get_grounded_context(paths: List[str], root: str = ".", max_chars: int = 6000) -> dict:
-    """
-    Return grounded file content for a set of paths (safe, truncated).
-    """
-    root_path = Path(root).resolve()
-    out = []
 
+def _read_item(path: str, rng: Optional[ReadRange], src: Source, limit: int) -> dict:
+    """Read at most `limit` chars of a file or range into a result item."""
+    item = _base(path, rng)
+    in_memory = isinstance(src, bytes)
+    if rng is None:
+        loaded = blob_prefix(src, limit) if in_memory else read_prefix(src, limit)
+        if loaded is None:
+            return {**item, "ok": False, "error": "unreadable or missing"}
+        text, truncated = loaded
+        return {**item, "ok": True, "content": text, "truncated": truncated}
+
+    got = blob_range(src, rng, limit) if in_memory else read_range(src, rng, limit)
+    if got is None:
+        return {**item, "ok": False, "error": "unreadable or missing"}
+    item.update(ok=True, content=got.text, truncated=got.truncated)
+    if rng.unit == "lines":
+        item.update(start_line=got.start, end_line=got.end)
+    else:
+        item.update(start_byte=got.start, end_byte=got.end)
+    return item
+
+
+def _pack_sequential(reqs: list, max_chars: int) -> List[dict]:
+    out: List[dict] = []
     total = 0
-    for p in paths:
-        abs_path = (root_path / p).resolve()
-        content = read_file_safe(abs_path)
-        if content is None:
-            out.append({"path": p, "ok": False, "error": "unreadable or missing"})
+    for path, rng, src, size in reqs:
+        if size is None:
+            out.append({**_base(path, rng), "ok": False, "error": "unreadable or missing"})
             continue
 
         remaining = max_chars - total
         if remaining <= 0:
+            out.append({**_base(path, rng), "ok": False, "error": _BUDGET_EXHAUSTED})
+            continue
+
+        item = _read_item(path, rng, src, remaining)
+        total += len(item.get("content", ""))
+        out.append(item)
+    return out
+
+
+def _pack_fair(reqs: list, max_chars: int) -> List[dict]:
+    # Sizes are upper bounds (bytes >= chars), so a path may come back
+    # shorter than its share; that leftover is handed to truncated paths.
+    sizes = [size or 0 for _, _, _, size in reqs]
+    limits = fair_shares(sizes, max_chars)
+    out: List[Optional[dict]] = [None] * len(reqs)
+
+    pending = list(range(len(reqs)))
+    while pending:
+        for i in pending:
+            path, rng, src, size = reqs[i]
+            if size is None:
+                out[i] = {**_base(path, rng), "ok": False, "error": "unreadable or missing"}
+            elif limits[i] <= 0 and size > 0:
+                out[i] = {**_base(path, rng), "ok": False, "error": _BUDGET_EXHAUSTED}
+            else:
+                out[i] = _read_item(path, rng, src, limits[i])
+
+        used = sum(len(item.get("content", "")) for item in out if item is not None)
+        leftover = max_chars - used
+        pending = [
+            i for i, item in enumerate(out)
+            if item is not None and (item.get("truncated") or item.get("error") == _BUDGET_EXHAUSTED)
+        ]
+        if leftover <= 0 or not pending:
+            break
+
+        extra = fair_shares([max(0, sizes[i] - limits[i]) for i in pending], leftover)
+        if not any(extra):
             break
+        for i, e in zip(pending, extra):
+            limits[i] += e
+        pending = [i for i, e in zip(pending, extra) if e]
+
+    return [item for item in out if item is not None]
+
+
+def _rev_reqs(specs: list, root_path: Path, rev: str) -> Optional[list]:
+    """Requests served from blobs at rev, fetched in one cat-file round trip."""
+    tree = open_rev_tree(root_path, rev)
+    if tree is None:
+        return None
+    try:
+        blobs = [data for _, data in iter_blobs(tree, rev, [path for path, _ in specs])]
+    except GitCommandError:
+        return None
+    return [
+        (path, rng, data, None if data is None else estimate_blob_chars(data, rng))
+        for (path, rng), data in zip(specs, blobs)
+    ]
+
+
+@offloaded_tool
+def get_grounded_context(
+    paths: List[str],
+    root: str = ".",
+    max_chars: int = 6000,
+    packing: Packing = "sequential",
+    rev: Optional[str] = None,
+) -> dict:
+    """
+    Return grounded file content for a set of paths (safe, truncated).
+
+    paths may carry a range suffix: "a.py#L10-L40", "a.py#L10", "a.py#L10-"
+    (to end of file) or "data.json#B0-2048" (byte offsets, end exclusive).
+    Ranges are read without decoding the whole file.
+    packing: "sequential" (default, in order until max_chars is spent) or
+    "fair" (even split; short paths' leftovers go to longer ones).
+    Paths left without budget are reported, never dropped.
+    rev: read the files as of a commit, branch or tag instead of the work
+    tree (all blobs come from one long-lived `git cat-file --batch` process).
+    """
+    root_path = Path(root).resolve()
+    specs = [split_path_range(spec) for spec in paths]
 
-        chunk = content[:remaining]
-        total += len(chunk)
+    reqs: Optional[list] = []
+    if rev is None:
+        for path, rng in specs:
+            abs_path = (root_path / path).resolve()
+            reqs.append((path, rng, abs_path, estimate_chars(abs_path, rng)))
+    else:
+        reqs = _rev_reqs(specs, root_path, rev)
 
-        out.append({"path": p, "ok": True, "content": chunk})
+    if reqs is None:
+        error = f"unknown revision or not a git repository: {rev}"
+        out = [{**_base(path, rng), "ok": False, "error": error} for path, rng in specs]
+    elif packing == "fair":
+        out = _pack_fair(reqs, max_chars)
+    else:
+        out = _pack_sequential(reqs, max_chars)
 
-    return {"root": str(root_path), "items": out, "max_chars": max_chars}
+    total = sum(len(item.get("content", "")) for item in out)
+    return {
+        "root": str(root_path),
+        "items": out,
+        "max_chars": max_chars,
+        "packing": packing,
+        "total_chars": total,
+        "rev": rev,
+    }
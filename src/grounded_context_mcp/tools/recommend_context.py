@@ -1,13 +1,37 @@
 from __future__ import annotations
 
+import time
 from pathlib import Path
-from typing import Literal
-
-from ..core.fs import iter_text_files, read_file_safe
-from ..core.scoring import score_match
-from .. import mcp
+from typing import Iterator, Literal, NamedTuple, Optional
+
+from ..core.bm25 import Bm25Index, Ranking, open_bm25, tokenize
+from ..core.cancel import run_offloaded
+from ..core.chunks import (
+    Chunk,
+    ContextMode,
+    ScoredChunk,
+    open_chunks,
+    pack_chunks,
+    score_chunks,
+    split_chunks,
+)
+from ..core.churn import ChurnIndex, open_churn
+from ..core.content_cache import content_cache
+from ..core.cursors import ScanState, cursor_store, deadline_after, until_ready
+from ..core.diff import DiffHunks, changed_hunks
+from ..core.fs import is_partial, read_file_safe
+from ..core.ignore import find_repo_top
+from ..core.imports import open_imports
+from ..core.index import TrigramIndex, open_index
+from ..core.locks import root_lock
+from ..core.ranges import estimate_chars, fair_shares, read_prefix
+from ..core.result_cache import repo_fingerprint, result_cache
+from ..core.scan import scan_and_score
+from ..core.scoring import TokenMatcher, score_without_content_match
+from ..core.snippets import snippet_for
+from ._offload import async_tool
 from .env_specs import env_specs
-from .git_insights import git_insights
+from .git_insights import git_insights_async
 
 Intent = Literal["implement", "debug", "validate"]
 
@@ -23,6 +47,21 @@ _SKIP_SUBSTRINGS = (
 # NEW (debug-only boost): small deterministic bonus for recently changed files.
 _DEBUG_CHANGED_FILE_BOOST = 0.35
 
+# Upper bound of the debug boost from git churn (hotness h adds max * h / (1 + h)).
+_DEBUG_HOTNESS_BOOST = 0.5
+
+# context_mode="chunks": how many top-ranked files contribute chunks.
+_CHUNK_POOL_FILES = 20
+
+# neighbor_share: at most this many import-graph neighbors, and at most this
+# fraction of max_chars, go to them.
+_MAX_NEIGHBORS = 6
+_MAX_NEIGHBOR_SHARE = 0.9
+
+# context_mode="hunks": every changed hunk scores at least this, so hunks in
+# files that don't match the query are still packed after the matching ones.
+_HUNK_BASE_SCORE = 0.1
+
 
 def _norm_path(p: Path) -> str:
     """Normalize paths for cross-platform substring checks."""
@@ -51,10 +90,15 @@ def _apply_intent_boosts(
     is_git_ok: bool,
     git_meta: dict,
     changed_paths: set[str] | None = None,  # NEW
+    repo_rel: Optional[str] = None,
+    hotness: float = 0.0,
 ) -> float:
     """
     Apply intent-specific score adjustments (deterministic heuristics).
     Only applied if base_score > 0 (keeps noise down).
+
+    repo_rel: path relative to the repository top (posix), for the O(1)
+    changed-file check; hotness: churn-index hotness of that path.
     """
     if base_score <= 0:
         return base_score
@@ -69,11 +113,12 @@ def _apply_intent_boosts(
             base_score += 0.25
 
         # NEW: debug-only boost for recently changed files (Context Diff Mode)
-        # We use a stable path suffix match to avoid OS separator issues.
-        if changed_paths:
-            rel_norm = str(path).replace("\\", "/")
-            if any(rel_norm.endswith(cp.replace("\\", "/")) for cp in changed_paths):
-                base_score += _DEBUG_CHANGED_FILE_BOOST
+        if changed_paths and repo_rel is not None and repo_rel in changed_paths:
+            base_score += _DEBUG_CHANGED_FILE_BOOST
+
+        # Recency-decayed git churn, saturating at _DEBUG_HOTNESS_BOOST.
+        if hotness > 0:
+            base_score += _DEBUG_HOTNESS_BOOST * hotness / (1.0 + hotness)
 
     elif intent == "validate":
         if any(k in p for k in ("pyproject.toml", "requirements", "environment", "docker", "compose", "config")):
@@ -98,6 +143,7 @@ def _build_why(intent: Intent, has_results: bool) -> list[str]:
     if intent == "debug":
         why.append("Debug intent: boosted likely hot paths and recent activity signals (when available).")
         why.append("Debug intent: added a small boost for recently changed files (Context Diff Mode).")
+        why.append("Debug intent: boosted files with frequent recent commits (git churn, decays over ~2 weeks).")
     elif intent == "validate":
         why.append("Validate intent: boosted config/dependency files to check support and constraints.")
     else:
@@ -175,98 +221,102 @@ def _changed_paths_set(git_meta: dict) -> set[str]:
     out: set[str] = set()
     for p in wt:
         if isinstance(p, str) and p:
-            out.add(p)
+            out.add(p.replace("\\", "/"))
     for p in head:
         if isinstance(p, str) and p:
-            out.add(p)
+            out.add(p.replace("\\", "/"))
     return out
 
 
-# ---------------------------------------------------------------------------
-
-
-@mcp.tool()
-async def recommend_context(
-    query: str,
-    intent: Intent = "implement",
-    root: str = ".",
-    max_results: int = 5,
-    max_files_for_context: int = 3,
-    max_chars: int = 6000,
-) -> dict:
-    """
-    Recommend the most relevant files/snippets for a given coding task,
-    then return grounded context for top files.
-
-    intent:
-      - implement: prefer stable patterns + file/path matches
-      - debug: boost likely hot paths and recently-changed areas (if git is available)
-      - validate: prioritize env constraints and surface "unsupported" risks
-    """
-    root_path = Path(root).resolve()
-
-    # 1) Environment info
-    env = env_specs()
-
-    # 2) Git signal (optional; never blocks)
+def _repo_rel(path: Path, base: Path) -> Optional[str]:
     try:
-        git_meta = git_insights(str(root_path))
-        if isinstance(git_meta, dict):
-            git_meta.setdefault("ok", True)
-    except Exception as e:
-        git_meta = {"ok": False, "error": f"Failed to get git insights: {e}"}
-
-    is_git_ok = bool(git_meta.get("ok"))
+        return path.relative_to(base).as_posix()
+    except ValueError:
+        return None
 
-    # NEW: Context Diff Mode output + debug-only hint set
-    recently_changed = _build_recently_changed(git_meta, limit=5)
-    changed_paths = _changed_paths_set(git_meta) if intent == "debug" else set()
 
-    # 3) PASS 1: score all files
-    all_files: list[tuple[Path, str, float]] = []
-    tokens = _tokenize_query(query)
-
-    for path, text in iter_text_files(root_path):
-        if _should_skip(path):
-            continue
+def _build_hotspots(churn: Optional[ChurnIndex], *, limit: int = 5) -> list[dict]:
+    if churn is None:
+        return []
+    now = time.time()
+    return [
+        {
+            "path": rel,
+            "commits": pc.commits,
+            "authors": pc.authors,
+            "hotness": round(churn.hotness(rel, now), 3),
+        }
+        for rel, pc in churn.hottest(limit)
+    ]
 
-        s = sum(score_match(t, path, text) for t in tokens) if tokens else 0.0
-        all_files.append((path, text, s))
 
-    # 4) PASS 2: apply intent heuristics deterministically (+ debug changed boost)
-    hits: list[tuple[float, Path, str]] = []
-    for path, text, s in all_files:
-        s = _apply_intent_boosts(
-            s,
-            path,
-            intent,
-            is_git_ok=is_git_ok,
-            git_meta=git_meta,
-            changed_paths=changed_paths,  # NEW
-        )
-        if s > 0:
-            hits.append((s, path, text))
+# ---------------------------------------------------------------------------
 
-    hits.sort(key=lambda x: x[0], reverse=True)
-    hits = hits[:max_results]
 
-    # 5) Build recommended_files (previews)
-    recommended_files: list[dict] = []
-    for s, p, t in hits:
-        rel = str(p.relative_to(root_path))
-        recommended_files.append(
-            {
-                "path": rel,
-                "score": float(s),
-                "snippet_preview": t[:400],
-            }
-        )
+def _heuristic_scores(
+    tokens: list[str],
+    index: TrigramIndex,
+    *,
+    workers: Optional[int] = None,
+    report: Optional[dict] = None,
+) -> Iterator[tuple[Path, float]]:
+    """
+    Default additive scorer. The trigram index rules out files that cannot
+    match any token, so only candidates are read.
+    """
+    # Everything needed from the index is taken under the read lock; the
+    # file scan itself runs without it.
+    with root_lock(index.root).read():
+        if report is not None and index.catalog is not None:
+            report.update(index.catalog.read_report())
+        token_cands = [index.candidates(t) for t in tokens]
+        read_all = any(c is None for c in token_cands)
+        must_read: set[str] = set().union(*token_cands) if tokens and not read_all else set()
+
+        docs = [
+            (rel, path, bool(tokens) and (read_all or rel in must_read))
+            for rel, path in index.iter_docs()
+            if not _should_skip(path)
+        ]
+        structural = {rel for rel, _, needs_read in docs if not needs_read and index.is_structural(rel)}
+        total_bytes = sum(index.size_of(rel) for rel, _, needs_read in docs if needs_read)
+    scanned = scan_and_score(
+        [path for _, path, needs_read in docs if needs_read],
+        TokenMatcher(tokens).score,
+        workers=workers,
+        total_bytes=total_bytes,
+    )
 
-    # 6) Grounded context for top N files
+    for rel, path, needs_read in docs:
+        if not tokens:
+            s = 0.0
+        elif needs_read:
+            _, text, s = next(scanned)
+            if text is None:
+                continue
+        else:
+            s = sum(score_without_content_match(t, path, structural=rel in structural) for t in tokens)
+        yield path, s
+
+
+def _bm25_scores(query: str, bm25: Bm25Index, *, report: Optional[dict] = None) -> Iterator[tuple[Path, float]]:
+    """BM25 over precomputed per-root statistics; no file reads."""
+    with root_lock(bm25.root).read():
+        if report is not None and bm25.catalog is not None:
+            report.update(bm25.catalog.read_report())
+        scores = bm25.score(query)
+        docs = list(bm25.iter_docs())
+    for rel, path in docs:
+        if not _should_skip(path):
+            yield path, scores.get(rel, 0.0)
+
+
+def _file_items(recommended_files: list[dict], root_path: Path, *, max_chars: int) -> list[dict]:
+    """Leading text of each recommended file until max_chars is spent."""
     items: list[dict] = []
     total = 0
 
-    for rec in recommended_files[:max_files_for_context]:
+    for rec in recommended_files:
         rel = rec["path"]
         abs_path = (root_path / rel).resolve()
 
@@ -287,32 +337,499 @@ async def recommend_context(
         total += len(chunk)
         items.append({"path": rel, "ok": True, "content": chunk})
 
+    return items
+
+
+def _chunk_items(
+    ranked: list[tuple[float, Path]],
+    tokens: list[str],
+    root_path: Path,
+    *,
+    max_chars: int,
+    respect_gitignore: bool = False,
+    deadline: Optional[float] = None,
+) -> list[dict]:
+    """
+    Best chunks across the ranked files, packed into max_chars. Files are
+    split on the fly while the chunk index is still building at the deadline.
+    """
+    chunk_index = open_chunks(root_path, respect_gitignore=respect_gitignore, deadline=deadline)
+    matcher = TokenMatcher(tokens)
+    scored: list[ScoredChunk] = []
+    for _, p in ranked:
+        if not _safe_in_repo(root_path, p):
+            continue
+        loaded = content_cache.read_with_lines(p)
+        if loaded is None:
+            continue
+        text, starts = loaded
+        rel = p.relative_to(root_path)
+        chunks = None
+        if chunk_index is not None:
+            with root_lock(root_path).read():
+                chunks = chunk_index.chunks_of(rel.as_posix())
+        if chunks is None:
+            chunks = split_chunks(rel.as_posix(), text)
+        scored.extend(score_chunks(matcher, str(rel), p, text, chunks, starts))
+
+    return [
+        {
+            "path": c.rel,
+            "ok": True,
+            "content": c.text,
+            "start_line": c.chunk.start_line,
+            "end_line": c.chunk.end_line,
+            "kind": c.chunk.kind,
+            "name": c.chunk.name,
+            "score": round(c.score, 4),
+        }
+        for c in pack_chunks(scored, max_chars)
+    ]
+
+
+def _hunk_items(
+    ranked: list[tuple[float, Path]],
+    tokens: list[str],
+    root_path: Path,
+    *,
+    max_chars: int,
+) -> tuple[list[dict], DiffHunks]:
+    """
+    Changed hunks (with git's surrounding context lines) packed into
+    max_chars: hunks matching the query, or in highly ranked files, first.
+    """
+    diff = changed_hunks(root_path)
+    file_scores = {p.relative_to(root_path).as_posix(): s for s, p in ranked}
+    matcher = TokenMatcher(tokens)
+
+    scored: list[ScoredChunk] = []
+    for h in diff.hunks:
+        m = matcher.match(root_path / h.path, h.text)
+        s = _HUNK_BASE_SCORE + m.breakdown["content"] + m.breakdown["path"] + file_scores.get(h.path, 0.0)
+        chunk = Chunk(h.new_start, h.new_start + max(h.new_lines, 1) - 1, "hunk", h.section)
+        scored.append(ScoredChunk(s, h.path, chunk, h.text))
+    # pack_chunks only rebuilds a hunk when it has to cut it (the single
+    # best hunk did not fit); (path, start line) identifies it then.
+    by_id = {id(c): h for c, h in zip(scored, diff.hunks)}
+    by_start = {(c.rel, c.chunk.start_line): h for c, h in zip(scored, diff.hunks)}
+
+    items: list[dict] = []
+    for c in pack_chunks(scored, max_chars):
+        h = by_id.get(id(c)) or by_start[(c.rel, c.chunk.start_line)]
+        items.append(
+            {
+                "path": c.rel,
+                "ok": True,
+                "content": c.text,
+                "start_line": h.new_start,
+                "end_line": h.new_start + max(h.new_lines, 1) - 1,
+                "old_start": h.old_start,
+                "old_lines": h.old_lines,
+                "kind": "hunk",
+                "name": h.section,
+                "score": round(c.score, 4),
+                "truncated": len(c.text) < len(h.text),
+            }
+        )
+    return items, diff
+
+
+def _graph_neighbors(
+    seeds: list[str], root_path: Path, *, respect_gitignore: bool = False, deadline: Optional[float] = None
+) -> list[tuple[str, str, str]]:
+    """
+    (neighbor, seed, relation) for the seed files, in seed order: modules a
+    seed imports first (a thin entry point's logic usually lives there),
+    then modules importing it. Seeds themselves are never neighbors. Empty
+    while the import graph is still building at the deadline.
+    """
+    graph = open_imports(root_path, respect_gitignore=respect_gitignore, deadline=deadline)
+    if graph is None:
+        return []
+    taken = set(seeds)
+    out: list[tuple[str, str, str]] = []
+    # "imported": the seed imports it; "importer": it imports the seed.
+    with root_lock(root_path).read():
+        for relation, edges in (("imported", graph.imports_of), ("importer", graph.importers_of)):
+            for seed in seeds:
+                for rel in edges(seed):
+                    if rel not in taken and len(out) < _MAX_NEIGHBORS:
+                        taken.add(rel)
+                        out.append((rel, seed, relation))
+    return out
+
+
+def _neighbor_items(neighbors: list[tuple[str, str, str]], root_path: Path, *, max_chars: int) -> list[dict]:
+    """Leading text of each neighbor, max_chars split fairly between them."""
+    paths = [root_path / rel for rel, _, _ in neighbors]
+    limits = fair_shares([estimate_chars(p, None) or 0 for p in paths], max_chars)
+    items: list[dict] = []
+    for (rel, seed, relation), path, limit in zip(neighbors, paths, limits):
+        item = {"path": rel, "neighbor_of": seed, "relation": relation}
+        loaded = read_prefix(path, limit) if limit > 0 else None
+        if loaded is None:
+            continue
+        text, truncated = loaded
+        items.append({**item, "ok": True, "content": text, "truncated": truncated})
+    return items
+
+
+class _Request(NamedTuple):
+    """A recommend_context call, kept with its scan so a cursor can finish it."""
+
+    query: str
+    intent: Intent
+    root_path: Path
+    max_results: int
+    max_files_for_context: int
+    max_chars: int
+    respect_gitignore: bool
+    ranking: Ranking
+    context_mode: ContextMode
+    neighbor_share: float
+    env: dict
+    git_meta: dict
+    churn: Optional[ChurnIndex]
+    report: dict
+
+
+def _pool_size(req: _Request) -> int:
+    """Ranked files per page: chunk/hunk modes draw on more files than they list."""
+    return max(req.max_results, _CHUNK_POOL_FILES) if req.context_mode != "files" else req.max_results
+
+
+def _preview_tokens(req: _Request) -> list[str]:
+    return tokenize(req.query) if req.ranking == "bm25" else _tokenize_query(req.query)
+
+
+def _boosted_scores(req: _Request, workers: Optional[int]) -> Iterator[tuple[float, Path]]:
+    """(score + intent boosts, path) for every candidate file, streamed."""
+    is_git_ok = bool(req.git_meta.get("ok"))
+    changed_paths = _changed_paths_set(req.git_meta) if req.intent == "debug" else set()
+    repo_base = find_repo_top(req.root_path) or req.root_path
+    now = time.time()
+
+    # 3) Score + boost in one streaming pass; text is dropped as soon as it's scored.
+    #    An index build still running at the deadline pauses the scan first.
+    if req.ranking == "bm25":
+        bm25 = yield from until_ready(
+            lambda d: open_bm25(req.root_path, respect_gitignore=req.respect_gitignore, deadline=d)
+        )
+        scores = _bm25_scores(req.query, bm25, report=req.report)
+    else:
+        index = yield from until_ready(
+            lambda d: open_index(req.root_path, respect_gitignore=req.respect_gitignore, deadline=d)
+        )
+        scores = _heuristic_scores(_tokenize_query(req.query), index, workers=workers, report=req.report)
+
+    for path, s in scores:
+        # 4) Intent heuristics, applied inline (+ debug changed/churn boosts)
+        repo_rel = _repo_rel(path, repo_base) if req.intent == "debug" and s > 0 else None
+        yield _apply_intent_boosts(
+            s,
+            path,
+            req.intent,
+            is_git_ok=is_git_ok,
+            git_meta=req.git_meta,
+            changed_paths=changed_paths,  # NEW
+            repo_rel=repo_rel,
+            hotness=req.churn.hotness(repo_rel, now) if req.churn is not None and repo_rel else 0.0,
+        ), path
+
+
+def _rank_page(
+    state: ScanState[Path], offset: int, deadline: Optional[float]
+) -> tuple[list[tuple[float, Path]], list[dict], bool, Optional[str]]:
+    """
+    (ranked files for the context, recommended_files, partial, cursor): the
+    scan runs until done or deadline. An unfinished scan yields the best
+    files so far and a cursor resuming it; a finished one, a cursor to the
+    next max_results files while ranked files remain.
+    """
+    req: _Request = state.request
+    complete, ranked = state.advance(deadline)
+    if not complete:
+        offset = 0
+    end = offset + req.max_results
+    cursor = None
+    if not complete and not state.failed:
+        cursor = cursor_store.issue(state, 0)
+    elif complete and end < len(ranked):
+        cursor = cursor_store.issue(state, end)
+
+    # 5) Build recommended_files (line-window previews around the best match);
+    #    finalists are re-read via the content cache
+    page = ranked[offset:offset + _pool_size(req)]
+    preview_tokens = _preview_tokens(req)
+    recommended_files: list[dict] = []
+    for s, p in page[:req.max_results]:
+        rel = str(p.relative_to(req.root_path))
+        window = snippet_for(p, preview_tokens, max_chars=400)
+        rec = {
+            "path": rel,
+            "score": float(s),
+            "snippet_preview": window["snippet"],
+            "start_line": window["start_line"],
+            "end_line": window["end_line"],
+        }
+        if is_partial(p):
+            rec["partial"] = True
+        recommended_files.append(rec)
+
+    return page, recommended_files, not complete, cursor
+
+
+def _context_items(
+    ranked: list[tuple[float, Path]],
+    recommended_files: list[dict],
+    preview_tokens: list[str],
+    root_path: Path,
+    *,
+    context_mode: ContextMode,
+    max_files_for_context: int,
+    max_chars: int,
+    neighbor_share: float,
+    respect_gitignore: bool,
+    deadline: Optional[float] = None,
+) -> tuple[list[dict], list[dict], Optional[DiffHunks]]:
+    """Context items for the mode, plus import-graph neighbor items."""
+    # 6) Grounded context: changed hunks, best chunks across files, or the top N
+    #    files; optionally part of the budget goes to their import-graph neighbors.
+    neighbors: list[tuple[str, str, str]] = []
+    share = min(max(neighbor_share, 0.0), _MAX_NEIGHBOR_SHARE)
+    if share > 0 and recommended_files:
+        seeds = [Path(r["path"]).as_posix() for r in recommended_files[:max_files_for_context]]
+        neighbors = _graph_neighbors(seeds, root_path, respect_gitignore=respect_gitignore, deadline=deadline)
+    neighbor_chars = int(max_chars * share) if neighbors else 0
+    main_chars = max_chars - neighbor_chars
+
+    diff: Optional[DiffHunks] = None
+    items: list[dict] = []
+    if context_mode == "hunks":
+        items, diff = _hunk_items(ranked, preview_tokens, root_path, max_chars=main_chars)
+    elif context_mode == "chunks":
+        items = _chunk_items(
+            ranked,
+            preview_tokens,
+            root_path,
+            max_chars=main_chars,
+            respect_gitignore=respect_gitignore,
+            deadline=deadline,
+        )
+    if context_mode == "files" or (diff is not None and not diff.hunks):
+        items = _file_items(
+            recommended_files[:max_files_for_context], root_path, max_chars=main_chars
+        )
+    neighbor_items = _neighbor_items(neighbors, root_path, max_chars=neighbor_chars)
+    return items, neighbor_items, diff
+
+
+async def _respond(state: ScanState[Path], offset: int, deadline: Optional[float]) -> dict:
+    """Rank (within the deadline), assemble context and explain; steps 3-7."""
+    req: _Request = state.request
+
+    # 3-5) Rank files and build previews, off the event loop
+    ranked, recommended_files, partial, cursor = await run_offloaded(_rank_page, state, offset, deadline)
+
+    # 6) Grounded context: changed hunks, best chunks across files, or the top N
+    #    files; optionally part of the budget goes to their import-graph neighbors.
+    items, neighbor_items, diff = await run_offloaded(
+        _context_items,
+        ranked,
+        recommended_files,
+        _preview_tokens(req),
+        req.root_path,
+        context_mode=req.context_mode,
+        max_files_for_context=req.max_files_for_context,
+        max_chars=req.max_chars,
+        neighbor_share=req.neighbor_share,
+        respect_gitignore=req.respect_gitignore,
+        deadline=deadline,
+    )
+
     # 7) Explainability
-    why_selected = _build_why(intent, bool(recommended_files))
-    warnings = _build_warnings(intent, env, query)
+    why_selected = _build_why(req.intent, bool(recommended_files))
+    warnings = _build_warnings(req.intent, req.env, req.query)
     confidence = round(float(_compute_confidence(recommended_files)), 2)
 
-    summary = (
-        f"Recommended {len(recommended_files)} file(s) for intent='{intent}'. "
-        f"Returning grounded context for top {len(items)} file(s)."
-    )
+    if req.context_mode == "chunks" or (diff is not None and diff.hunks):
+        n_files = len({it["path"] for it in items})
+        unit = "hunk" if req.context_mode == "hunks" else "chunk"
+        returned = f"Returning {len(items)} {unit}(s) from {n_files} file(s) as grounded context."
+    else:
+        returned = f"Returning grounded context for top {len(items)} file(s)."
+    if neighbor_items:
+        returned += f" Added {len(neighbor_items)} import-graph neighbor(s)."
+    if partial:
+        returned += " The scan stopped at the deadline; pass cursor to finish it."
+    summary = f"Recommended {len(recommended_files)} file(s) for intent='{req.intent}'. {returned}"
 
     return {
         "summary": summary,
-        "intent": intent,
-        "query": query,
-        "env": env,
-        "git": git_meta,
+        "intent": req.intent,
+        "query": req.query,
+        "env": req.env,
+        "git": req.git_meta,
         # NEW: Context Diff Mode output (additive)
-        "recently_changed": recently_changed,
+        "recently_changed": _build_recently_changed(req.git_meta, limit=5),
+        "hotspots": _build_hotspots(req.churn),
         "warnings": warnings,
         "recommended_files": recommended_files,
         "recommended_context": {
-            "root": str(root_path),
-            "items": items,
-            "max_chars": max_chars,
+            "root": str(req.root_path),
+            "items": items + neighbor_items,
+            "max_chars": req.max_chars,
+            "context_mode": req.context_mode,
+            **(
+                {"diff": {"source": diff.source, "hunks": len(diff.hunks), "truncated": diff.truncated}}
+                if diff is not None
+                else {}
+            ),
         },
+        "read_report": req.report,
         "why_selected": why_selected,
         "confidence": confidence,
         "sources": [{"type": "repo", "path": r["path"]} for r in recommended_files],
+        "partial": partial,
+        "cursor": cursor,
     }
+
+
+@async_tool()
+async def recommend_context(
+    query: str,
+    intent: Intent = "implement",
+    root: str = ".",
+    max_results: int = 5,
+    max_files_for_context: int = 3,
+    max_chars: int = 6000,
+    respect_gitignore: bool = False,
+    workers: Optional[int] = None,
+    ranking: Ranking = "heuristic",
+    context_mode: ContextMode = "files",
+    neighbor_share: float = 0.0,
+    deadline_ms: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> dict:
+    """
+    Recommend the most relevant files/snippets for a given coding task,
+    then return grounded context for top files.
+
+    intent:
+      - implement: prefer stable patterns + file/path matches
+      - debug: boost likely hot paths and recently-changed areas (if git is available)
+      - validate: prioritize env constraints and surface "unsupported" risks
+
+    respect_gitignore: enumerate files via git (tracked + untracked, not ignored),
+    or a local .gitignore matcher when git is unavailable.
+    workers: parallel file readers for this call (default: server setting).
+    ranking: "heuristic" (default) or "bm25" (precomputed term statistics).
+    context_mode: "files" (default, leading text of the top files), "chunks"
+    (best-scoring functions/classes/sections across files, with line ranges)
+    or "hunks" (for debugging: changed hunks from `git diff HEAD`, or from the
+    last commit when the tree is clean, with a few lines of context each;
+    falls back to "files" when nothing changed).
+    neighbor_share: fraction of max_chars (up to 0.9) spent on import-graph
+    neighbors of the top files: modules they import, then modules importing
+    them (Python imports, relative JS/TS imports); those items carry
+    neighbor_of and relation ("imported" / "importer"). 0 (default) disables.
+    Binary files are skipped and oversized ones only partially indexed
+    (counts in read_report).
+    Repeated requests are answered from a result cache while the repository
+    is unchanged (file catalog, HEAD, index): "cached": true with cache_age_s.
+    deadline_ms: time budget for the ranking scan; when it runs out the best
+    files so far are used and the response has "partial": true. cursor: pass
+    a response's "cursor" to resume an unfinished scan, or to get the next
+    max_results files of a finished one without rescanning (the cursor keeps
+    the original query and options; only deadline_ms applies).
+    """
+    deadline = deadline_after(deadline_ms)
+    if cursor is not None:
+        resolved = cursor_store.resolve(cursor, "recommend_context")
+        if resolved is None:
+            return {
+                "query": query,
+                "intent": intent,
+                "recommended_files": [],
+                "error": "unknown or expired cursor",
+                "cached": False,
+            }
+        state, offset = resolved
+        return {**await _respond(state, offset, deadline), "cached": False}
+
+    root_path = Path(root).resolve()
+
+    # 0) Reuse the result of an equivalent request at the same repository state
+    #    (file catalog generation + HEAD/index); skips git and all file reads.
+    #    No fingerprint while the catalog walk is unfinished at the deadline.
+    fingerprint = await run_offloaded(
+        repo_fingerprint, root_path, respect_gitignore=respect_gitignore, deadline=deadline
+    )
+    cache_key = (
+        "recommend_context",
+        str(root_path),
+        # Matching is case-insensitive and whitespace-separated.
+        tuple(t.lower() for t in _tokenize_query(query)),
+        intent,
+        max_results,
+        max_files_for_context,
+        max_chars,
+        respect_gitignore,
+        ranking,
+        context_mode,
+        neighbor_share,
+    )
+    hit = result_cache.get(cache_key, fingerprint) if fingerprint is not None else None
+    if hit is not None:
+        # Cursors aren't cached: the store may have evicted the old one.
+        cursor = cursor_store.issue(*hit.pages) if hit.pages else None
+        return {
+            **hit.value,
+            "query": query,
+            "cursor": cursor,
+            "cached": True,
+            "cache_age_s": round(hit.age_s, 3),
+        }
+
+    # 1) Environment info
+    env = env_specs()
+
+    # 2) Git signal (optional; git runs as async subprocesses)
+    try:
+        git_meta = await git_insights_async(str(root_path))
+        if isinstance(git_meta, dict):
+            git_meta.setdefault("ok", True)
+    except Exception as e:
+        git_meta = {"ok": False, "error": f"Failed to get git insights: {e}"}
+
+    # Debug: churn/hotness from git history (cached by HEAD, extended incrementally)
+    churn: Optional[ChurnIndex] = None
+    if intent == "debug":
+        try:
+            churn = await run_offloaded(open_churn, root_path)
+        except Exception:
+            churn = None
+
+    request = _Request(
+        query,
+        intent,
+        root_path,
+        max_results,
+        max_files_for_context,
+        max_chars,
+        respect_gitignore,
+        ranking,
+        context_mode,
+        neighbor_share,
+        env,
+        git_meta,
+        churn,
+        {},
+    )
+    state = ScanState("recommend_context", request, _boosted_scores(request, workers), _pool_size(request))
+    out = await _respond(state, 0, deadline)
+    # A scan cut short by the deadline is not a result worth reusing.
+    if not out["partial"] and fingerprint is not None:
+        pages = (state, max_results) if out["cursor"] else None
+        result_cache.put(cache_key, fingerprint, {**out, "cursor": None}, pages)
+    return {**out, "cached": False}
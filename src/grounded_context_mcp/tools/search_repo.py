@@ -1,40 +1,423 @@
 from __future__ import annotations
 
-from pathlib import Path
-from typing import List, Optional
+import os
+from functools import partial
+from pathlib import Path, PurePath
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
-from .. import mcp
-from ..core.fs import iter_text_files
-from ..core.scoring import score_match
+from ..core.bm25 import Ranking, open_bm25, tokenize
+from ..core.content_cache import content_cache
+from ..core.cursors import ScanState, cursor_store, deadline_after, until_ready
+from ..core.fs import (
+    DEFAULT_IGNORES,
+    TEXT_EXTS,
+    is_partial,
+    iter_candidate_files,
+    load_bytes,
+    max_file_bytes,
+)
+from ..core.git import GitCommandError
+from ..core.index import open_index
+from ..core.locks import root_lock
+from ..core.result_cache import repo_fingerprint, result_cache
+from ..core.revision import RevTree, iter_blobs, list_files_at, open_rev_tree
+from ..core.scan import scan_and_score
+from ..core.scoring import score_match, score_without_content_match
+from ..core.snippets import best_window, snippet_for
+from ..core.topk import TopK
+from ._offload import offloaded_tool
+from .find_symbol import SYMBOL_QUERY_PREFIX, symbol_hits
 
 
-@mcp.tool()
+def _indexed_scores(
+    query: str,
+    root_path: Path,
+    *,
+    respect_gitignore: bool = False,
+    workers: Optional[int] = None,
+    report: Optional[Dict[str, int]] = None,
+) -> Iterator[tuple[float, Path]]:
+    """
+    Score the default text-file set using the trigram index to avoid reading
+    files that cannot contain the query. Scores are identical to a full scan.
+    Pauses the scan while the index build runs past the call's deadline.
+    """
+    index = yield from until_ready(lambda d: open_index(root_path, respect_gitignore=respect_gitignore, deadline=d))
+    # Only the index lookups hold the read lock, not the file scan.
+    with root_lock(root_path).read():
+        if report is not None and index.catalog is not None:
+            report.update(index.catalog.read_report())
+        cands = index.candidates(query)
+
+        docs = [(rel, path, cands is None or rel in cands) for rel, path in index.iter_docs()]
+        structural = {rel for rel, _, needs_read in docs if not needs_read and index.is_structural(rel)}
+        total_bytes = sum(index.size_of(rel) for rel, _, needs_read in docs if needs_read)
+    scanned = scan_and_score(
+        [path for _, path, needs_read in docs if needs_read],
+        partial(score_match, query),
+        workers=workers,
+        total_bytes=total_bytes,
+    )
+
+    for rel, path, needs_read in docs:
+        if needs_read:
+            _, text, s = next(scanned)
+            if text is None:
+                continue
+        else:
+            s = score_without_content_match(query, path, structural=rel in structural)
+        yield s, path
+
+
+def _glob_scores(
+    query: str,
+    root_path: Path,
+    file_globs: List[str],
+    *,
+    respect_gitignore: bool = False,
+    workers: Optional[int] = None,
+    report: Optional[Dict[str, int]] = None,
+) -> Iterator[tuple[float, Path]]:
+    """
+    Globs may select files outside the indexed text set (any extension):
+    plain scan, with binary files sniffed out and large ones capped.
+    """
+    limit = max_file_bytes()
+    counts = {"skipped_binary": 0, "skipped_unreadable": 0, "truncated": 0, "max_file_bytes": limit}
+    if report is not None:
+        report.update(counts)
+        counts = report
+
+    records = list(iter_candidate_files(root_path, file_globs, respect_gitignore=respect_gitignore))
+    scanned = scan_and_score(
+        [Path(r.path) for r in records],
+        partial(score_match, query),
+        workers=workers,
+        total_bytes=sum(min(r.size, limit) for r in records),
+    )
+    for rec, (path, text, s) in zip(records, scanned):
+        if text is None:
+            counts["skipped_binary" if content_cache.is_binary(path) else "skipped_unreadable"] += 1
+            continue
+        if rec.size > limit:
+            counts["truncated"] += 1
+        yield s, path
+
+
+def _bm25_scores(
+    query: str,
+    root_path: Path,
+    file_globs: Optional[List[str]],
+    *,
+    respect_gitignore: bool = False,
+    report: Optional[Dict[str, int]] = None,
+) -> Iterator[tuple[float, Path]]:
+    """
+    BM25 over precomputed per-root statistics; no file reads. file_globs
+    filters the indexed text-file set (it cannot add non-text files here).
+    """
+    bm25 = yield from until_ready(lambda d: open_bm25(root_path, respect_gitignore=respect_gitignore, deadline=d))
+    with root_lock(root_path).read():
+        if report is not None and bm25.catalog is not None:
+            report.update(bm25.catalog.read_report())
+        scores = bm25.score(query)
+        docs = list(bm25.iter_docs())
+    for rel, path in docs:
+        s = scores.get(rel)
+        if s is None:
+            continue
+        if file_globs and not any(PurePath(path).match(g) for g in file_globs):
+            continue
+        yield s, path
+
+
+def _rev_scores(
+    query: str,
+    root_path: Path,
+    tree: RevTree,
+    rev: str,
+    file_globs: Optional[List[str]],
+    *,
+    report: Dict[str, int],
+) -> Iterator[Tuple[float, Path, str, bool]]:
+    """
+    Heuristic scores over the files tracked at rev: one `ls-tree` for the
+    listing, blobs streamed through the shared cat-file process. Yields
+    (score, path, text, truncated) since the text exists nowhere on disk.
+    """
+    limit = max_file_bytes()
+    report.update(skipped_binary=0, skipped_unreadable=0, truncated=0, max_file_bytes=limit)
+
+    listed = list_files_at(tree, rev)
+    if listed is None:
+        raise GitCommandError(f"ls-tree failed for {rev}")
+
+    rels = []
+    for rel, _ in listed:
+        if any(part in DEFAULT_IGNORES for part in rel.split("/")):
+            continue
+        if file_globs:
+            if not any(PurePath(root_path / rel).match(g) for g in file_globs):
+                continue
+        elif os.path.splitext(rel)[1].lower() not in TEXT_EXTS:
+            continue
+        rels.append(rel)
+
+    for rel, data in iter_blobs(tree, rev, rels):
+        loaded = None if data is None else load_bytes(data)
+        if loaded is None or loaded.binary:
+            report["skipped_unreadable" if loaded is None else "skipped_binary"] += 1
+            continue
+        if loaded.truncated:
+            report["truncated"] += 1
+        path = root_path / rel
+        yield score_match(query, path, loaded.text), path, loaded.text, loaded.truncated
+
+
+def _search_at_rev(
+    query: str,
+    root_path: Path,
+    rev: str,
+    max_results: int,
+    file_globs: Optional[List[str]],
+    tokens: List[str],
+) -> dict:
+    report: Dict[str, int] = {}
+    out = {"query": query, "results": [], "read_report": report, "rev": rev}
+    tree = open_rev_tree(root_path, rev)
+    if tree is None:
+        return {**out, "error": f"unknown revision or not a git repository: {rev}"}
+
+    top: TopK[Tuple[Path, str, bool]] = TopK(max_results)
+    try:
+        for s, path, text, truncated in _rev_scores(
+            query, root_path, tree, rev, file_globs, report=report
+        ):
+            if s > 0:
+                top.push(s, (path, text, truncated))
+    except GitCommandError as e:
+        return {**out, "error": f"git failed: {e}"}
+
+    for s, (p, text, truncated) in top.results():
+        window = best_window(text, tokens, max_chars=800)
+        hit = {
+            "path": str(p.relative_to(root_path)),
+            "score": float(s),
+            "snippet": window["snippet"],
+            "start_line": window["start_line"],
+            "end_line": window["end_line"],
+        }
+        if truncated:
+            hit["partial"] = True
+        out["results"].append(hit)
+    return out
+
+
+def _search_symbol(
+    query: str,
+    root_path: Path,
+    max_results: int,
+    file_globs: Optional[List[str]],
+    respect_gitignore: bool,
+) -> dict:
+    name = query[len(SYMBOL_QUERY_PREFIX):].strip()
+    hits = symbol_hits(
+        name,
+        root_path,
+        max_results=max_results,
+        respect_gitignore=respect_gitignore,
+        file_globs=file_globs,
+    )
+    results = [
+        {
+            # Exact-case definitions rank above case-insensitive ones.
+            "path": h["path"],
+            "score": 2.0 if name in (h["name"], h["qualname"]) else 1.0,
+            "snippet": h["snippet"],
+            "start_line": h["start_line"],
+            "end_line": h["snippet_end_line"],
+            "symbol": {"name": h["qualname"], "kind": h["kind"], "end_line": h["end_line"]},
+        }
+        for h in hits
+    ]
+    return {"query": query, "results": results, "read_report": {}}
+
+
+class _SearchRequest(NamedTuple):
+    """What a cursor needs to build later pages of a work-tree search."""
+
+    query: str
+    root_path: Path
+    tokens: List[str]
+    max_results: int
+    report: Dict[str, int]
+
+
+def _worktree_scores(
+    query: str,
+    root_path: Path,
+    file_globs: Optional[List[str]],
+    *,
+    respect_gitignore: bool,
+    workers: Optional[int],
+    ranking: Ranking,
+    report: Dict[str, int],
+) -> Iterator[tuple[float, Path]]:
+    if ranking == "bm25":
+        return _bm25_scores(
+            query, root_path, file_globs, respect_gitignore=respect_gitignore, report=report
+        )
+    if file_globs:
+        return _glob_scores(
+            query,
+            root_path,
+            file_globs,
+            respect_gitignore=respect_gitignore,
+            workers=workers,
+            report=report,
+        )
+    return _indexed_scores(
+        query, root_path, respect_gitignore=respect_gitignore, workers=workers, report=report
+    )
+
+
+def _search_page(state: ScanState[Path], offset: int, deadline: Optional[float]) -> dict:
+    """
+    Scan until done or deadline, then build one page of hits. An unfinished
+    scan returns the best hits so far and a cursor that resumes it; a
+    finished one, a cursor to the next page while ranked hits remain.
+    """
+    req: _SearchRequest = state.request
+    complete, ranked = state.advance(deadline)
+    if not complete:
+        offset = 0
+    end = offset + req.max_results
+    cursor = None
+    if not complete and not state.failed:
+        cursor = cursor_store.issue(state, 0)
+    elif complete and end < len(ranked):
+        cursor = cursor_store.issue(state, end)
+
+    # Snippets are line windows around the densest match region of each hit.
+    results = []
+    for s, p in ranked[offset:end]:
+        window = snippet_for(p, req.tokens, max_chars=800)
+        hit = {
+            "path": str(p.relative_to(req.root_path)),
+            "score": float(s),
+            "snippet": window["snippet"],
+            "start_line": window["start_line"],
+            "end_line": window["end_line"],
+        }
+        if is_partial(p):
+            hit["partial"] = True
+        results.append(hit)
+    return {
+        "query": req.query,
+        "results": results,
+        "read_report": req.report,
+        "partial": not complete,
+        "cursor": cursor,
+    }
+
+
+def _cache_query(query: str, ranking: Ranking) -> object:
+    """The query as scoring sees it, so equivalent spellings share an entry."""
+    if query.startswith(SYMBOL_QUERY_PREFIX):
+        return query.strip()
+    if ranking == "bm25":
+        return tuple(tokenize(query))
+    return query.strip().lower()
+
+
+@offloaded_tool
 def search_repo(
     query: str,
     root: str = ".",
     max_results: int = 10,
     file_globs: Optional[List[str]] = None,
+    respect_gitignore: bool = False,
+    workers: Optional[int] = None,
+    ranking: Ranking = "heuristic",
+    rev: Optional[str] = None,
+    deadline_ms: Optional[int] = None,
+    cursor: Optional[str] = None,
 ) -> dict:
     """
     Search the local repository and return grounded snippets (no network).
+    Each snippet is a window of lines around the best match, with
+    1-based start_line/end_line. Binary files are skipped and files over the
+    per-file size cap are searched on a prefix only ("partial": true);
+    read_report gives the counts.
+
+    respect_gitignore: enumerate files via git (tracked + untracked, not ignored),
+    or a local .gitignore matcher when git is unavailable.
+    workers: parallel file readers for this call (default: server setting).
+    ranking: "heuristic" (default) or "bm25" (precomputed term statistics).
+    query "symbol:<name>" looks up definitions in the symbol index instead
+    (see find_symbol); file_globs filters those results.
+    rev: search the files tracked at a commit, branch or tag instead of the
+    work tree (heuristic ranking; blobs come from one `git cat-file --batch`
+    process).
+    Without file_globs or rev, results are reused while the repository is
+    unchanged (file catalog, HEAD, index): "cached": true with cache_age_s.
+    deadline_ms: time budget for the scan; when it runs out the best hits so
+    far come back with "partial": true. cursor: pass a response's "cursor" to
+    resume an unfinished scan, or to get the next max_results hits of a
+    finished one without rescanning (the cursor keeps the original query and
+    options; only deadline_ms applies). Not used with rev or symbol: queries.
     """
-    root_path = Path(root).resolve()
-    hits = []
+    deadline = deadline_after(deadline_ms)
+    if cursor is not None:
+        resolved = cursor_store.resolve(cursor, "search_repo")
+        if resolved is None:
+            return {"query": query, "results": [], "error": "unknown or expired cursor", "cached": False}
+        state, offset = resolved
+        return {**_search_page(state, offset, deadline), "cached": False}
 
-    for path, text in iter_text_files(root_path, file_globs=file_globs):
-        s = score_match(query, path, text)
-        if s > 0:
-            hits.append((s, path, text))
+    root_path = Path(root).resolve()
+    tokens = tokenize(query) if ranking == "bm25" else [query]
+    if rev is not None:
+        return {**_search_at_rev(query, root_path, rev, max_results, file_globs, tokens), "cached": False}
 
-    hits.sort(key=lambda x: x[0], reverse=True)
-    hits = hits[:max_results]
+    # Results for the default file set are reused while the repo is unchanged
+    # (no fingerprint while the catalog walk is unfinished at the deadline).
+    key = fingerprint = None
+    if not file_globs:
+        fingerprint = repo_fingerprint(root_path, respect_gitignore=respect_gitignore, deadline=deadline)
+    if fingerprint is not None:
+        key = ("search_repo", str(root_path), _cache_query(query, ranking), max_results, respect_gitignore, ranking)
+        hit = result_cache.get(key, fingerprint)
+        if hit is not None:
+            # Cursors aren't cached: the store may have evicted the old one.
+            cursor = cursor_store.issue(*hit.pages) if hit.pages else None
+            return {
+                **hit.value,
+                "query": query,
+                "cursor": cursor,
+                "cached": True,
+                "cache_age_s": round(hit.age_s, 3),
+            }
 
-    results = [
-        {
-            "path": str(p.relative_to(root_path)),
-            "score": float(s),
-            "snippet": t[:800],
-        }
-        for s, p, t in hits
-    ]
-    return {"query": query, "results": results}
+    pages = None
+    if query.startswith(SYMBOL_QUERY_PREFIX):
+        out = _search_symbol(query, root_path, max_results, file_globs, respect_gitignore)
+    else:
+        report: Dict[str, int] = {}
+        scores = _worktree_scores(
+            query,
+            root_path,
+            file_globs,
+            respect_gitignore=respect_gitignore,
+            workers=workers,
+            ranking=ranking,
+            report=report,
+        )
+        request = _SearchRequest(query, root_path, tokens, max_results, report)
+        state = ScanState("search_repo", request, scores, max_results)
+        out = _search_page(state, 0, deadline)
+        pages = (state, max_results) if out["cursor"] else None
+    # A scan cut short by the deadline is not a result worth reusing.
+    if key is not None and not out.get("partial"):
+        result_cache.put(key, fingerprint, {**out, "cursor": None} if pages else out, pages)
+    return {**out, "cached": False}
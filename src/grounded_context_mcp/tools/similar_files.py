@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+from ..core.fs import read_file_safe
+from ..core.locks import root_lock
+from ..core.similarity import open_tfidf
+from ._offload import offloaded_tool
+
+
+@offloaded_tool
+def similar_files(
+    path: Optional[str] = None,
+    snippet: Optional[str] = None,
+    root: str = ".",
+    max_results: int = 10,
+    respect_gitignore: bool = False,
+) -> dict:
+    """
+    "More like this": files whose identifiers resemble a given file (path,
+    relative to root) or a code snippet, e.g. to find the test, handler or
+    config that goes with a file. Cosine similarity of TF-IDF vectors over
+    identifier parts (snake_case/camelCase split) and file names; local
+    only, no models. shared_terms lists the terms contributing most.
+    """
+    root_path = Path(root).resolve()
+    if not path and not snippet:
+        return {"results": [], "error": "pass path or snippet"}
+
+    index = open_tfidf(root_path, respect_gitignore=respect_gitignore)
+    rel = None
+    text = snippet
+    if path:
+        abs_path = (root_path / path).resolve()
+        try:
+            rel = abs_path.relative_to(root_path).as_posix()
+        except ValueError:
+            return {"path": path, "results": [], "error": "Path outside root"}
+        with root_lock(root_path).read():
+            indexed = rel in index.doc_tf
+        if not indexed and text is None:
+            # Not in the indexed text set (other extension): read it directly.
+            text = read_file_safe(abs_path)
+            if text is None:
+                return {"path": path, "results": [], "error": "unreadable or missing"}
+
+    with root_lock(root_path).read():
+        hits = index.similar(rel=rel, text=text, k=max_results)
+    return {
+        "path": path,
+        "results": [
+            {"path": h.rel, "score": round(h.score, 4), "shared_terms": h.shared} for h in hits
+        ],
+        "backend": index.backend,
+    }
@@ -0,0 +1,34 @@
+import pytest
+
+from grounded_context_mcp.core.result_cache import result_cache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep persistent indexes out of the user's real cache directory."""
+    monkeypatch.setenv("GROUNDED_CONTEXT_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_result_cache():
+    """Tool results cached by an earlier test must not leak into the next."""
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+@pytest.fixture
+def stub_git_insights(monkeypatch):
+    """Replace recommend_context's git metadata with a fixed dict; returns the roots it was asked for."""
+
+    def _stub(meta):
+        calls = []
+
+        async def _git_insights(root="."):
+            calls.append(root)
+            return dict(meta)
+
+        monkeypatch.setattr("grounded_context_mcp.tools.recommend_context.git_insights_async", _git_insights)
+        return calls
+
+    return _stub
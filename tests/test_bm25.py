@@ -0,0 +1,35 @@
+from grounded_context_mcp.core.bm25 import open_bm25, tokenize
+from grounded_context_mcp.tools.search_repo import search_repo
+
+
+def test_tokenize_identifiers():
+    assert tokenize("def Parse_Config(x1):") == ["def", "parse_config", "x1"]
+
+
+def test_bm25_prefers_rare_terms_and_short_docs(tmp_path):
+    (tmp_path / "short.py").write_text("parser = 1\n")
+    (tmp_path / "long.py").write_text("parser = 1\n" + "filler word\n" * 200)
+    (tmp_path / "other.py").write_text("common common\n")
+
+    scores = open_bm25(tmp_path).score("parser")
+    assert set(scores) == {"short.py", "long.py"}
+    assert scores["short.py"] > scores["long.py"]
+
+
+def test_bm25_stats_follow_edits(tmp_path):
+    f = tmp_path / "a.py"
+    f.write_text("alpha")
+    assert "a.py" in open_bm25(tmp_path).score("alpha")
+
+    f.write_text("beta beta")
+    idx = open_bm25(tmp_path)
+    assert idx.score("alpha") == {}
+    assert idx.doc_len["a.py"] == 2 + 2  # content terms + path terms ("a", "py")
+
+
+def test_search_repo_bm25_mode(tmp_path):
+    (tmp_path / "a.py").write_text("def handler(): pass")
+    (tmp_path / "b.md").write_text("unrelated")
+
+    out = search_repo("handler", root=str(tmp_path), ranking="bm25")
+    assert [r["path"] for r in out["results"]] == ["a.py"]
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from grounded_context_mcp import mcp, server  # noqa: F401
+from grounded_context_mcp.core.cancel import OperationCancelled, check_cancelled, run_offloaded
+from grounded_context_mcp.core.scan import map_ordered
+
+
+def test_check_cancelled_is_noop_outside_offloaded_calls():
+    check_cancelled()
+    assert list(map_ordered(lambda x: x, range(3))) == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_task_stops_the_worker_at_a_checkpoint():
+    started = threading.Event()
+    stopped = threading.Event()
+    seen = []
+
+    def work():
+        started.set()
+        try:
+            for x in map_ordered(lambda x: x, range(10_000)):
+                seen.append(x)
+                time.sleep(0.001)
+        except OperationCancelled:
+            stopped.set()
+            raise
+
+    task = asyncio.create_task(run_offloaded(work))
+    await asyncio.to_thread(started.wait, 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert await asyncio.to_thread(stopped.wait, 5)
+    assert len(seen) < 10_000
+
+
+@pytest.mark.asyncio
+async def test_offloaded_calls_interleave():
+    gate = threading.Event()
+
+    def blocked():
+        return gate.wait(5)
+
+    slow = asyncio.create_task(run_offloaded(blocked))
+    # The event loop stays free while the first call blocks its thread.
+    fast = await asyncio.wait_for(run_offloaded(lambda: "done"), timeout=5)
+    assert fast == "done" and not slow.done()
+    gate.set()
+    assert await slow is True
+
+
+def test_every_tool_has_an_async_entry_point():
+    tools = mcp._tool_manager.list_tools()
+    assert {t.name for t in tools} >= {"search_repo", "get_grounded_context", "git_insights"}
+    assert all(t.is_async for t in tools)
+
+
+@pytest.mark.asyncio
+async def test_call_tool_runs_sync_tool_off_the_loop(tmp_path):
+    (tmp_path / "a.py").write_text("needle = 1\n")
+    out = await mcp.call_tool("search_repo", {"query": "needle", "root": str(tmp_path)})
+    assert "a.py" in str(out)
@@ -0,0 +1,141 @@
+import os
+
+import pytest
+
+from grounded_context_mcp.core.catalog import FileCatalog, PersistentDerived
+from grounded_context_mcp.core.index import open_index
+
+
+class _Recorder:
+    def __init__(self):
+        self.catalog_id = ""
+        self.generation = -1
+        self.pending = []
+        self.calls = []
+
+    def reset(self):
+        self.calls.append(("reset", None))
+
+    def discard(self, rel):
+        self.calls.append(("discard", rel))
+
+    def update(self, rel, text):
+        self.calls.append(("update", rel))
+
+
+def test_refresh_reports_added_changed_removed(tmp_path):
+    (tmp_path / "a.py").write_text("a = 1")
+    (tmp_path / "b.py").write_text("b = 1")
+    cat = FileCatalog(tmp_path)
+
+    first = cat.refresh()
+    assert sorted(first.added) == ["a.py", "b.py"]
+    assert cat.generation == 1
+
+    (tmp_path / "a.py").write_text("a = 22")
+    (tmp_path / "b.py").unlink()
+    (tmp_path / "c.py").write_text("c = 1")
+
+    delta = cat.refresh()
+    assert delta.added == ["c.py"]
+    assert delta.changed == ["a.py"]
+    assert delta.removed == ["b.py"]
+    assert cat.generation == 2
+
+
+def test_touch_without_content_change_is_not_a_delta(tmp_path):
+    f = tmp_path / "a.py"
+    f.write_text("same")
+    cat = FileCatalog(tmp_path)
+    cat.refresh()
+
+    st = f.stat()
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000))
+
+    assert not cat.refresh()
+    assert cat.generation == 1
+
+
+def test_sync_replays_only_missed_deltas(tmp_path):
+    for name in ("a.py", "b.py", "c.py"):
+        (tmp_path / name).write_text(name)
+    cat = FileCatalog(tmp_path)
+    cat.refresh()
+
+    rec = _Recorder()
+    cat.sync(rec)
+    assert rec.calls[0] == ("reset", None)
+
+    rec.calls.clear()
+    (tmp_path / "b.py").write_text("edited")
+    cat.refresh()
+    cat.sync(rec)
+    assert rec.calls == [("update", "b.py")]
+
+
+def test_refresh_past_deadline_is_continued_by_the_next_call(tmp_path):
+    for name in ("a.py", "b.py", "c.py"):
+        (tmp_path / name).write_text(name)
+    cat = FileCatalog(tmp_path)
+
+    assert cat.refresh(deadline=0.0) is None
+    assert cat.generation == 0
+
+    delta = cat.refresh()
+    assert sorted(delta.added) == ["a.py", "b.py", "c.py"]
+    assert cat.generation == 1
+
+
+def test_sync_past_deadline_leaves_the_rest_pending(tmp_path):
+    for name in ("a.py", "b.py", "c.py"):
+        (tmp_path / name).write_text(name)
+    cat = FileCatalog(tmp_path)
+    cat.refresh()
+
+    rec = _Recorder()
+    cat.sync(rec, deadline=0.0)
+    assert [c for c in rec.calls if c[0] == "update"] == [("update", "a.py")]
+    assert rec.pending == ["b.py", "c.py"]
+
+    rec.calls.clear()
+    (tmp_path / "c.py").unlink()
+    cat.refresh()
+    cat.sync(rec)
+    assert rec.calls == [("discard", "c.py"), ("update", "b.py")]
+    assert rec.pending == []
+
+
+def test_open_index_past_deadline_returns_none_until_built(tmp_path):
+    for i in range(5):
+        (tmp_path / f"f{i}.py").write_text(f"alpha{i}")
+
+    assert open_index(tmp_path, deadline=0.0) is None
+    index = open_index(tmp_path)
+    assert index.pending == []
+    assert index.candidates("alpha4") == {"f4.py"}
+
+
+def test_index_follows_incremental_edits(tmp_path):
+    (tmp_path / "a.py").write_text("alpha")
+    (tmp_path / "b.py").write_text("beta")
+    assert open_index(tmp_path).candidates("alpha") == {"a.py"}
+
+    (tmp_path / "b.py").write_text("alpha too")
+    (tmp_path / "a.py").unlink()
+
+    assert open_index(tmp_path).candidates("alpha") == {"b.py"}
+
+
+def test_incomplete_derived_subclass_fails_at_construction(tmp_path):
+    class NoRestore(PersistentDerived):
+        def reset(self): ...
+
+        def discard(self, rel): ...
+
+        def update(self, rel, text): ...
+
+        def _dump(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        NoRestore(tmp_path)
@@ -0,0 +1,45 @@
+from grounded_context_mcp.core.chunks import Chunk, open_chunks, pack_chunks, score_chunks, split_chunks
+from grounded_context_mcp.core.scoring import TokenMatcher
+
+
+def test_split_python_functions_and_methods():
+    text = "import os\n\n@dec\ndef a():\n    pass\n\nclass B:\n    def m(self):\n        def inner():\n            pass\n"
+    chunks = split_chunks("x.py", text)
+    assert [(c.start_line, c.end_line, c.kind, c.name) for c in chunks] == [
+        (1, 2, "module", ""),
+        (3, 6, "code", "a"),
+        (7, 7, "code", "B"),
+        (8, 10, "code", "m"),
+    ]
+
+
+def test_split_markdown_ignores_fenced_headings():
+    text = "# Title\nintro\n```\n# not a heading\n```\n## Usage\nrun it\n"
+    chunks = split_chunks("README.md", text)
+    assert [(c.start_line, c.name) for c in chunks] == [(1, "Title"), (6, "Usage")]
+
+
+def test_split_falls_back_to_windows():
+    text = "".join(f"k{i} = {i}\n" for i in range(100))
+    chunks = split_chunks("c.toml", text)
+    assert [(c.start_line, c.end_line) for c in chunks] == [(1, 40), (41, 80), (81, 100)]
+
+
+def test_score_and_pack_prefer_matching_chunks(tmp_path):
+    text = "def a():\n    return 1\n\ndef parse():\n    parse parse\n"
+    chunks = split_chunks("m.py", text)
+    scored = score_chunks(TokenMatcher(["parse"]), "m.py", tmp_path / "m.py", text, chunks)
+    assert [c.chunk.name for c in scored] == ["parse"]
+
+    small = scored[0]._replace(text="x" * 10, chunk=Chunk(9, 9, "code", "small"), score=0.5)
+    packed = pack_chunks(scored + [small], max_chars=len(scored[0].text) + 5)
+    assert [c.chunk.name for c in packed] == ["parse"]
+
+
+def test_chunk_index_follows_edits(tmp_path):
+    f = tmp_path / "a.py"
+    f.write_text("def one():\n    pass\n")
+    assert [c.name for c in open_chunks(tmp_path).chunks_of("a.py")] == ["one"]
+
+    f.write_text("def two():\n    pass\n")
+    assert [c.name for c in open_chunks(tmp_path).chunks_of("a.py")] == ["two"]
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from grounded_context_mcp.core import churn as churn_mod
+from grounded_context_mcp.core.churn import HOTNESS_HALF_LIFE_DAYS, ChurnIndex, open_churn
+
+
+def _git(repo, *args, author="Ann Dev", when=None):
+    env = dict(os.environ)
+    if when is not None:
+        env["GIT_AUTHOR_DATE"] = env["GIT_COMMITTER_DATE"] = f"@{when} +0000"
+    return subprocess.run(
+        ["git", "-c", f"user.name={author}", "-c", "user.email=a@x", *args],
+        cwd=repo, check=True, capture_output=True, text=True, env=env,
+    ).stdout
+
+
+def _commit(repo, files, msg, **kw):
+    for name, body in files.items():
+        p = repo / name
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(body)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", msg, **kw)
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    churn_mod._CHURN.clear()
+    yield
+    churn_mod._CHURN.clear()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q", "-b", "main")
+    _commit(tmp_path, {"a.py": "1", "pkg/b.py": "1"}, "one")
+    _commit(tmp_path, {"a.py": "2"}, "two", author="Bo Dev")
+    return tmp_path
+
+
+def test_counts_and_authors(repo):
+    idx = open_churn(repo / "pkg")
+    assert idx is not None
+    a = idx.get("a.py")
+    assert (a.commits, a.authors) == (2, 2)
+    assert idx.get("pkg/b.py").commits == 1
+    assert idx.hottest(1)[0][0] == "a.py"
+
+
+def test_incremental_update_reads_only_new_commits(repo, monkeypatch):
+    first = open_churn(repo)
+    assert first.get("pkg/b.py").commits == 1
+    _commit(repo, {"pkg/b.py": "2"}, "three")
+
+    revs = []
+    real = churn_mod._read_log
+    monkeypatch.setattr(
+        churn_mod, "_read_log", lambda top, rev, *a: revs.append(rev) or real(top, rev, *a)
+    )
+    churn_mod._CHURN.clear()  # reload from disk
+    idx = open_churn(repo)
+    assert idx.get("pkg/b.py").commits == 2
+    assert len(idx.commits) == 3
+    assert len(revs) == 1 and ".." in revs[0]
+
+    revs.clear()
+    assert open_churn(repo) is idx and revs == []  # HEAD unchanged: no git log
+
+
+def test_hotness_decays_with_age(tmp_path):
+    day = 86400
+    now = int(time.time()) - day
+    _git(tmp_path, "init", "-q", "-b", "main")
+    _commit(tmp_path, {"old.py": "1"}, "old", when=now - 28 * day)
+    _commit(tmp_path, {"new.py": "1"}, "new", when=now)
+
+    idx = ChurnIndex(tmp_path)
+    idx.update(_git(tmp_path, "rev-parse", "HEAD").strip())
+
+    assert idx.hotness("new.py", now) == pytest.approx(1.0)
+    assert idx.hotness("old.py", now) == pytest.approx(0.25)  # two half-lives
+    later = now + HOTNESS_HALF_LIFE_DAYS * day
+    assert idx.hotness("new.py", later) == pytest.approx(0.5)
+    assert idx.hotness("missing.py", now) == 0.0
+
+
+def test_not_a_repo(tmp_path):
+    assert open_churn(tmp_path) is None
@@ -0,0 +1,57 @@
+import os
+
+from grounded_context_mcp.core.content_cache import ContentCache
+
+
+def test_read_hits_after_first_read(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("hello")
+    cache = ContentCache(max_bytes=1024)
+
+    assert cache.read(f) == "hello"
+    assert cache.read(f) == "hello"
+
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_modified_file_is_reread(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("old")
+    cache = ContentCache(max_bytes=1024)
+    cache.read(f)
+
+    f.write_text("newer")
+    st = f.stat()
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert cache.read(f) == "newer"
+    assert cache.stats()["entries"] == 1
+
+
+def test_lru_evicts_within_byte_budget(tmp_path):
+    cache = ContentCache(max_bytes=10)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text("x" * 4)
+
+    cache.read(tmp_path / "a")
+    cache.read(tmp_path / "b")
+    cache.read(tmp_path / "a")  # a is now most recently used
+    cache.read(tmp_path / "c")  # evicts b
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= 10
+    assert cache.read(tmp_path / "a") == "xxxx"
+    assert cache.stats()["hits"] == 2
+
+
+def test_read_with_lines_caches_line_table(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("one\ntwo\nthree")
+    cache = ContentCache(max_bytes=1024)
+
+    text, starts = cache.read_with_lines(f)
+    assert list(starts) == [0, 4, 8]
+    assert cache.read_with_lines(f)[1] is starts
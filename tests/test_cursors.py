@@ -0,0 +1,121 @@
+import pytest
+
+from grounded_context_mcp.core.cursors import CursorStore, ScanState, cursor_store
+from grounded_context_mcp.core.scan import map_ordered
+from grounded_context_mcp.tools.recommend_context import recommend_context
+from grounded_context_mcp.tools.search_repo import search_repo
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cursors():
+    yield
+    cursor_store.clear()
+
+
+def _repo(tmp_path, n=8):
+    for i in range(n):
+        (tmp_path / f"f{i}.py").write_text("needle\n" * (i + 1))
+    return str(tmp_path)
+
+
+def test_scan_state_resumes_where_it_stopped():
+    state = ScanState("t", None, ((float(i), i) for i in range(10)), keep=3)
+    complete, ranked = state.advance(deadline=0.0)
+    assert not complete and state.scanned == 1
+    complete, ranked = state.advance(deadline=None)
+    assert complete and state.scanned == 10
+    assert [i for _, i in ranked[:3]] == [9, 8, 7]
+
+
+def test_suspended_scan_releases_reader_threads():
+    scores = ((float(i), i) for i in map_ordered(lambda i: i, range(50), workers=4))
+    state = ScanState("t", None, scores, keep=3)
+    complete, _ = state.advance(deadline=0.0)
+    assert not complete
+    assert state.pools and not any(pool.running for pool in state.pools)
+
+    complete, ranked = state.advance(deadline=None)
+    assert complete and state.scanned == 50
+    assert [i for _, i in ranked[:3]] == [49, 48, 47]
+
+
+@pytest.mark.parametrize("workers", [None, 4])
+def test_search_deadline_returns_partial_then_resumes(tmp_path, workers):
+    root = _repo(tmp_path)
+    # The first call stops inside the catalog walk: nothing is indexed yet.
+    out = search_repo("needle", root=root, max_results=3, deadline_ms=0, workers=workers)
+    assert out["partial"] is True and out["cursor"] and out["results"] == []
+    while out["partial"]:
+        out = search_repo("ignored", cursor=out["cursor"], deadline_ms=0)
+    assert out["query"] == "needle"
+
+    # Partial results are never cached; the full search runs afresh.
+    full = search_repo("needle", root=root, max_results=3)
+    assert full["cached"] is False and full["partial"] is False
+    assert out["results"] == full["results"]
+
+
+def test_cursor_pages_through_all_hits(tmp_path):
+    root = _repo(tmp_path)
+    everything = [r["path"] for r in search_repo("needle", root=root, max_results=50)["results"]]
+
+    out = search_repo("needle", root=root, max_results=3)
+    seen = [r["path"] for r in out["results"]]
+    while out["cursor"]:
+        out = search_repo("needle", cursor=out["cursor"])
+        seen += [r["path"] for r in out["results"]]
+    assert seen == everything
+
+
+def test_unknown_cursor_is_reported(tmp_path):
+    out = search_repo("needle", cursor="nope.0")
+    assert out["results"] == [] and "cursor" in out["error"]
+
+
+@pytest.mark.asyncio
+async def test_recommend_context_resumes_partial_scan(tmp_path, stub_git_insights):
+    stub_git_insights({"ok": False})
+    root = _repo(tmp_path)
+    out = await recommend_context(query="needle", root=root, max_results=2, deadline_ms=0)
+    assert out["partial"] is True and "deadline" in out["summary"]
+    while out["partial"]:
+        out = await recommend_context(query="needle", cursor=out["cursor"], deadline_ms=0)
+
+    full = await recommend_context(query="needle", root=root, max_results=2)
+    assert full["cached"] is False
+    assert out["recommended_files"] == full["recommended_files"]
+
+    page2 = await recommend_context(query="needle", cursor=out["cursor"])
+    assert [r["path"] for r in page2["recommended_files"]] == ["f5.py", "f4.py"]
+
+
+def test_store_evicts_and_closes_oldest():
+    closed = []
+
+    def scan():
+        try:
+            yield 1.0, "x"
+            yield 1.0, "y"
+        finally:
+            closed.append(True)
+
+    store = CursorStore(max_entries=1)
+    first = ScanState("t", None, scan(), keep=1)
+    first.advance(deadline=0.0)
+    c1 = store.issue(first, 0)
+    store.issue(ScanState("t", None, iter(()), keep=1), 0)
+
+    assert store.resolve(c1, "t") is None
+    assert closed == [True] and first.failed
+
+
+def test_cache_hit_issues_a_working_cursor_after_eviction(tmp_path):
+    root = _repo(tmp_path)
+    first = search_repo("needle", root=root, max_results=3)
+    cursor_store.clear()
+
+    again = search_repo("needle", root=root, max_results=3)
+    assert again["cached"] is True and again["cursor"]
+    page2 = search_repo("needle", cursor=again["cursor"])
+    assert "error" not in page2
+    assert {r["path"] for r in page2["results"]}.isdisjoint(r["path"] for r in first["results"])
@@ -0,0 +1,68 @@
+import subprocess
+
+from grounded_context_mcp.core.diff import changed_hunks, parse_unified_diff
+
+SAMPLE = """\
+diff --git a/pkg/a.py b/pkg/a.py
+index 1..2 100644
+--- a/pkg/a.py
++++ b/pkg/a.py
+@@ -1,3 +1,3 @@ def handler():
+ keep
+--- removed line that looks like a header
++added
+ keep
+@@ -10 +10,2 @@
+-x
++y
++z
+\\ No newline at end of file
+diff --git a/old.py b/old.py
+deleted file mode 100644
+--- a/old.py
++++ /dev/null
+@@ -1 +0,0 @@
+-gone
+"""
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=Ann Dev", "-c", "user.email=a@x", *args],
+        cwd=repo, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+def test_parse_unified_diff():
+    hunks = parse_unified_diff(SAMPLE.splitlines())
+    assert [(h.path, h.old_start, h.old_lines, h.new_start, h.new_lines) for h in hunks] == [
+        ("pkg/a.py", 1, 3, 1, 3),
+        ("pkg/a.py", 10, 1, 10, 2),
+        ("old.py", 1, 1, 0, 0),
+    ]
+    assert hunks[0].section == "def handler():"
+    assert "--- removed line" in hunks[0].text
+    assert hunks[1].text.endswith("\\ No newline at end of file\n")
+
+
+def test_changed_hunks_worktree_then_last_commit(tmp_path):
+    _git(tmp_path, "init", "-q", "-b", "main")
+    body = "".join(f"line {i}\n" for i in range(1, 41))
+    (tmp_path / "a.py").write_text(body)
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "one")
+    assert changed_hunks(tmp_path).hunks == []  # root commit, clean tree
+
+    (tmp_path / "a.py").write_text(body.replace("line 20\n", "line twenty\n"))
+    wt = changed_hunks(tmp_path, context_lines=2)
+    assert wt.source == "worktree" and len(wt.hunks) == 1
+    h = wt.hunks[0]
+    assert (h.new_start, h.new_lines) == (18, 5)
+    assert "+line twenty" in h.text and " line 18" in h.text
+
+    _git(tmp_path, "commit", "-q", "-am", "two")
+    last = changed_hunks(tmp_path)
+    assert last.source == "last_commit" and last.hunks[0].path == "a.py"
+
+    capped = changed_hunks(tmp_path, max_bytes=60)
+    assert capped.truncated and capped.source == "last_commit"
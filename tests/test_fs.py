@@ -0,0 +1,63 @@
+from grounded_context_mcp.core.fs import iter_text_files, load_file, looks_binary, walk_files
+
+
+def _tree(tmp_path):
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("x = 1")
+    (tmp_path / "top.md").write_text("# top")
+    (tmp_path / "node_modules" / "lib").mkdir(parents=True)
+    (tmp_path / "node_modules" / "lib" / "index.js").write_text("junk")
+
+
+def test_walk_prunes_ignored_dirs_and_is_sorted(tmp_path):
+    _tree(tmp_path)
+
+    rels = [r.rel for r in walk_files(tmp_path)]
+    assert rels == ["top.md", "src/pkg/mod.py"]
+
+    rec = next(r for r in walk_files(tmp_path) if r.rel == "top.md")
+    assert rec.size == len("# top")
+    assert rec.mtime_ns > 0
+
+
+def test_walk_respects_custom_ignores_and_max_depth(tmp_path):
+    _tree(tmp_path)
+
+    assert [r.rel for r in walk_files(tmp_path, max_depth=0)] == ["top.md"]
+
+    rels = {r.rel for r in walk_files(tmp_path, ignores={"src"})}
+    assert rels == {"top.md", "node_modules/lib/index.js"}
+
+
+def test_iter_text_files_uses_walker(tmp_path):
+    _tree(tmp_path)
+
+    names = sorted(p.name for p, _ in iter_text_files(tmp_path))
+    assert names == ["mod.py", "top.md"]
+
+
+def test_looks_binary():
+    assert looks_binary(b"abc\x00def")
+    assert looks_binary(bytes(range(1, 32)) * 4)
+    assert not looks_binary("héllo\tworld\r\n".encode("utf-8"))
+    assert not looks_binary(b"")
+
+
+def test_load_file_caps_at_line_boundary(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROUNDED_CONTEXT_MAX_FILE_BYTES", "10")
+    f = tmp_path / "big.txt"
+    f.write_text("1234\n5678\nabcd\n")
+
+    loaded = load_file(f)
+    assert loaded.text == "1234\n5678\n"
+    assert loaded.truncated is True
+
+
+def test_load_file_large_file_via_mmap(tmp_path, monkeypatch):
+    monkeypatch.setattr("grounded_context_mcp.core.fs.MMAP_MIN_BYTES", 1)
+    monkeypatch.setenv("GROUNDED_CONTEXT_MAX_FILE_BYTES", "8")
+    (tmp_path / "t.txt").write_text("abc\ndef\nghi\n")
+    (tmp_path / "b.bin").write_bytes(b"\x00\x01" * 10)
+
+    assert load_file(tmp_path / "t.txt").text == "abc\ndef\n"
+    assert load_file(tmp_path / "b.bin").binary is True
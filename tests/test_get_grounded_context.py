@@ -15,3 +15,82 @@ def test_get_grounded_context_reads_files(tmp_path):
 def test_get_grounded_context_missing_file(tmp_path):
     out = get_grounded_context(["missing.txt"], root=str(tmp_path))
     assert out["items"][0]["ok"] is False
+
+
+def test_line_and_byte_ranges(tmp_path):
+    (tmp_path / "a.py").write_text("".join(f"line {i}\n" for i in range(1, 101)))
+
+    out = get_grounded_context(["a.py#L10-L12", "a.py#B0-6"], root=str(tmp_path))
+    lines, raw = out["items"]
+
+    assert lines["content"] == "line 10\nline 11\nline 12\n"
+    assert (lines["start_line"], lines["end_line"]) == (10, 12)
+    assert raw["content"] == "line 1"
+    assert (raw["start_byte"], raw["end_byte"]) == (0, 6)
+
+
+def _chained_byte_reads(root, max_chars=10):
+    """Follow #B{end}- continuations until a read is not truncated."""
+    text, start = "", 0
+    while True:
+        item = get_grounded_context([f"a.txt#B{start}-"], root=str(root), max_chars=max_chars)["items"][0]
+        text += item["content"]
+        if not item["truncated"]:
+            return text
+        assert item["end_byte"] > start
+        start = item["end_byte"]
+
+
+def test_chained_byte_reads_with_crlf(tmp_path):
+    (tmp_path / "a.txt").write_bytes(b"ab\r\ncd\r\nefgh\r\nijklmnop\r\n" * 4)
+
+    first = get_grounded_context(["a.txt#B0-"], root=str(tmp_path), max_chars=10)["items"][0]
+    assert first["content"] == "ab\ncd\nefgh"
+    assert first["end_byte"] == 12
+    assert _chained_byte_reads(tmp_path) == "ab\ncd\nefgh\nijklmnop\n" * 4
+
+
+def test_chained_byte_reads_skip_invalid_utf8(tmp_path):
+    (tmp_path / "a.txt").write_bytes(b"ab\xffcd\xfe\xe2\x82\xacxyz\x80\x81tail\n" * 4)
+    assert _chained_byte_reads(tmp_path) == "abcd\u20acxyztail\n" * 4
+
+
+def test_line_range_on_large_file_uses_direct_read(tmp_path, monkeypatch):
+    monkeypatch.setattr("grounded_context_mcp.core.ranges.RANGE_DIRECT_MIN_BYTES", 16)
+    (tmp_path / "big.txt").write_text("".join(f"row {i}\n" for i in range(1, 1001)))
+
+    out = get_grounded_context(["big.txt#L500-L501", "big.txt#L999-"], root=str(tmp_path))
+    assert out["items"][0]["content"] == "row 500\nrow 501\n"
+    assert out["items"][1]["content"] == "row 999\nrow 1000\n"
+    assert out["items"][1]["end_line"] == 1000
+
+
+def test_sequential_reports_paths_without_budget(tmp_path):
+    (tmp_path / "a.txt").write_text("a" * 50)
+    (tmp_path / "b.txt").write_text("b" * 50)
+
+    out = get_grounded_context(["a.txt", "b.txt"], root=str(tmp_path), max_chars=50)
+
+    assert out["items"][0]["truncated"] is False
+    assert out["items"][1] == {"path": "b.txt", "ok": False, "error": "max_chars budget exhausted"}
+
+
+def test_fair_packing_redistributes_leftover(tmp_path):
+    (tmp_path / "small.txt").write_text("s" * 10)
+    (tmp_path / "big1.txt").write_text("x" * 1000)
+    (tmp_path / "big2.txt").write_text("y" * 1000)
+
+    out = get_grounded_context(
+        ["big1.txt", "small.txt", "big2.txt"], root=str(tmp_path), max_chars=110, packing="fair"
+    )
+
+    assert [len(i["content"]) for i in out["items"]] == [50, 10, 50]
+    assert out["total_chars"] == 110
+
+
+def test_fair_shares_is_max_min_fair():
+    from grounded_context_mcp.core.ranges import fair_shares
+
+    assert fair_shares([10, 1000, 1000], 110) == [10, 50, 50]
+    assert fair_shares([5, 5], 100) == [5, 5]
+    assert fair_shares([100, 100, 100], 10) == [4, 3, 3]
@@ -1,4 +1,7 @@
-from grounded_context_mcp.tools.git_insights import git_insights, _parse_status_files
+import subprocess
+
+from grounded_context_mcp.core.git import parse_status_v2
+from grounded_context_mcp.tools.git_insights import clear_git_cache, git_insights, _parse_status_files
 
 
 def test_parse_status_files_deduplicates_and_keeps_order():
@@ -12,27 +15,75 @@ def test_parse_status_files_deduplicates_and_keeps_order():
     assert out == ["src/a.py", "src/b.py"]
 
 
+def test_parse_status_v2():
+    out = "\0".join(
+        [
+            "# branch.oid 0123abcd",
+            "# branch.head feature",
+            "# branch.upstream origin/feature",
+            "# branch.ab +2 -1",
+            "1 .M N... 100644 100644 100644 aaa bbb src/a b.py",
+            "2 R. N... 100644 100644 100644 aaa bbb R100 new.py",
+            "old.py",
+            "? notes.txt",
+            "",
+        ]
+    )
+
+    st = parse_status_v2(out)
+    assert (st.branch, st.head_oid, st.upstream, st.ahead, st.behind) == (
+        "feature", "0123abcd", "origin/feature", 2, 1
+    )
+    assert st.entries == [(" M", "src/a b.py"), ("R ", "new.py"), ("??", "notes.txt")]
+
+
 def test_git_insights_structure(monkeypatch, tmp_path):
-    def fake_run_git(root, args, timeout_s=2.0):
+    async def fake_run_git_async(root, args, timeout_s=2.0):
         if "status" in args:
-            return " M src/x.py"
+            return "# branch.oid abc\0# branch.head main\0" "1 .M N... 100644 100644 100644 a b src/x.py\0"
         if "show" in args:
-            return "src/y.py"
-        if "rev-parse" in args:
-            return "main"
-        if "log" in args:
-            return "abc Initial commit"
+            return "abc Initial commit\nsrc/y.py"
         return ""
 
     monkeypatch.setattr(
-        "grounded_context_mcp.tools.git_insights.run_git",
-        fake_run_git,
+        "grounded_context_mcp.tools.git_insights.run_git_async",
+        fake_run_git_async,
     )
 
     out = git_insights(str(tmp_path))
 
     assert out["ok"] is True
     assert out["branch"] == "main"
+    assert out["last_commit"] == "abc Initial commit"
     assert out["dirty"] is True
     assert out["worktree_changed_files"] == ["src/x.py"]
     assert out["last_commit_files"] == ["src/y.py"]
+
+
+def test_git_insights_cached_until_git_state_changes(monkeypatch, tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "first")
+    clear_git_cache()
+
+    from grounded_context_mcp.tools import git_insights as mod
+
+    calls = []
+    real = mod.run_git_async
+
+    async def counting(root, args, timeout_s=2.0):
+        calls.append(args)
+        return await real(root, args, timeout_s)
+
+    monkeypatch.setattr(mod, "run_git_async", counting)
+
+    first = git_insights(str(tmp_path))
+    n = len(calls)
+    assert first["last_commit"].endswith("first (t)")
+    assert git_insights(str(tmp_path)) == first
+    assert len(calls) == n
+
+    git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "--allow-empty", "-m", "second")
+    assert git_insights(str(tmp_path))["last_commit"].endswith("second (t)")
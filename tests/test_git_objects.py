@@ -0,0 +1,88 @@
+import subprocess
+
+import pytest
+
+from grounded_context_mcp.core.git_objects import GitRepoReader, head_commit
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=Ann Dev", "-c", "user.email=a@x", *args],
+        cwd=repo, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+def _show(repo):
+    out = _git(repo, "show", "--name-only", "--pretty=format:%H%n%s%n%an", "HEAD").splitlines()
+    return out[0], out[1], out[2], [ln for ln in out[3:] if ln]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q", "-b", "main")
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    for name in ("a.py", "pkg/b.py", "pkg/sub/c.py"):
+        (tmp_path / name).write_text(name * 50)
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "first\ncontinued\n\nbody")
+
+    (tmp_path / "pkg" / "b.py").write_text("changed")
+    (tmp_path / "pkg" / "sub" / "c.py").unlink()
+    (tmp_path / "new.md").write_text("new")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "second")
+    return tmp_path
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_head_commit_matches_git_show(repo, packed):
+    if packed:
+        _git(repo, "gc", "-q", "--aggressive")
+        assert not (repo / ".git" / "refs" / "heads" / "main").exists()
+
+    info = head_commit(repo)
+    sha, subject, author, files = _show(repo)
+    assert (info.sha, info.subject, info.author, info.files) == (sha, subject, author, files)
+    assert info.short == _git(repo, "log", "-1", "--format=%h").strip()
+    assert GitRepoReader.open(repo).head() == ("main", sha)
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_short_sha_matches_git_abbrev(repo, packed):
+    if packed:
+        _git(repo, "gc", "-q")
+    sha = _git(repo, "rev-parse", "HEAD").strip()
+    # A loose object sharing the first 9 hex digits forces a longer prefix.
+    clash = sha[:9] + ("0" if sha[9] != "0" else "1") + "0" * 30
+    (repo / ".git" / "objects" / clash[:2]).mkdir(exist_ok=True)
+    (repo / ".git" / "objects" / clash[:2] / clash[2:]).write_bytes(b"")
+    assert head_commit(repo).short == _git(repo, "log", "-1", "--format=%h").strip() == sha[:10]
+
+    _git(repo, "config", "core.abbrev", "12")
+    assert head_commit(repo).short == _git(repo, "log", "-1", "--format=%h").strip() == sha[:12]
+
+
+def test_root_commit_subject_and_detached_head(repo):
+    _git(repo, "checkout", "-q", "--detach", "HEAD~1")
+    info = head_commit(repo)
+    assert info.subject == "first continued"
+    assert info.files == ["a.py", "pkg/b.py", "pkg/sub/c.py"]
+    assert GitRepoReader.open(repo).head()[0] is None
+
+
+def test_merge_commit_leaves_files_to_git(repo):
+    _git(repo, "checkout", "-q", "-b", "side", "HEAD~1")
+    (repo / "side.txt").write_text("s")
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "side")
+    _git(repo, "checkout", "-q", "main")
+    _git(repo, "merge", "-q", "--no-ff", "-m", "merge", "side")
+
+    info = head_commit(repo)
+    assert info.subject == "merge"
+    assert len(info.parents) == 2
+    assert info.files is None
+
+
+def test_not_a_repo(tmp_path):
+    assert head_commit(tmp_path) is None
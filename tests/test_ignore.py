@@ -0,0 +1,51 @@
+import shutil
+import subprocess
+
+import pytest
+
+from grounded_context_mcp.core.fs import iter_candidate_files
+from grounded_context_mcp.core.ignore import is_ignored, parse_gitignore
+from grounded_context_mcp.tools.search_repo import search_repo
+
+
+def test_gitignore_patterns():
+    rules = parse_gitignore("*.log\n/build-out/\ndocs/**/gen\n!keep.log\n")
+
+    assert is_ignored(rules, "a/b/x.log", False)
+    assert not is_ignored(rules, "a/keep.log", False)
+    assert is_ignored(rules, "build-out", True)
+    assert not is_ignored(rules, "sub/build-out", True)  # anchored
+    assert not is_ignored(rules, "build-out", False)  # dir-only
+    assert is_ignored(rules, "docs/a/b/gen", False)
+
+
+def _tree(root):
+    (root / "cov").mkdir()
+    (root / "cov" / "report.json").write_text('{"needle": 1}')
+    (root / "app.py").write_text("needle = 1")
+    (root / ".gitignore").write_text("cov/\n")
+
+
+def test_local_gitignore_fallback_without_git(tmp_path, monkeypatch):
+    _tree(tmp_path)
+    monkeypatch.setattr("grounded_context_mcp.core.fs.git_list_files", lambda root: None)
+
+    rels = [r.rel for r in iter_candidate_files(tmp_path, respect_gitignore=True)]
+    assert rels == ["app.py"]
+
+    everything = [r.rel for r in iter_candidate_files(tmp_path)]
+    assert "cov/report.json" in everything
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_git_enumeration_mode(tmp_path):
+    _tree(tmp_path)
+    (tmp_path / "untracked.md").write_text("needle")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "app.py", ".gitignore"], cwd=tmp_path, check=True)
+
+    rels = [r.rel for r in iter_candidate_files(tmp_path, respect_gitignore=True)]
+    assert rels == ["app.py", "untracked.md"]
+
+    out = search_repo("needle", root=str(tmp_path), respect_gitignore=True)
+    assert {r["path"] for r in out["results"]} == {"app.py", "untracked.md"}
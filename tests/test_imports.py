@@ -0,0 +1,39 @@
+from grounded_context_mcp.core.imports import extract_imports, open_imports
+
+
+def test_extract_python_and_js_specs():
+    py = "import os, pkg.util\nfrom . import sibling\nfrom ..core.git import run\nfrom pkg import api\n"
+    assert extract_imports("src/pkg/tools/a.py", py) == [
+        "py:os",
+        "py:pkg.util",
+        "rel:src/pkg/tools/sibling",
+        "rel:src/pkg/core/git",
+        "rel:src/pkg/core/git/run",
+        "py:pkg",
+        "py:pkg.api",
+    ]
+    js = "import x from './lib/x';\nconst y = require('../y');\nimport z from 'react';\nexport * from './z'\n"
+    assert extract_imports("web/app/main.ts", js) == ["rel:web/app/lib/x", "rel:web/y", "rel:web/app/z"]
+
+
+def test_graph_resolves_and_updates_incrementally(tmp_path):
+    pkg = tmp_path / "src" / "pkg"
+    (pkg / "core").mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    (pkg / "core" / "__init__.py").write_text("")
+    (pkg / "core" / "logic.py").write_text("import os\n")
+    (pkg / "api.py").write_text("from .core import logic\nimport pkg.core.logic\n")
+    (pkg / "cli.py").write_text("from pkg.api import handler\n")
+    (tmp_path / "web").mkdir()
+    (tmp_path / "web" / "index.ts").write_text("import { a } from './util';\n")
+    (tmp_path / "web" / "util.ts").write_text("export const a = 1;\n")
+
+    g = open_imports(tmp_path)
+    assert g.imports_of("src/pkg/api.py") == ["src/pkg/core/logic.py", "src/pkg/core/__init__.py"]
+    assert g.imports_of("src/pkg/cli.py") == ["src/pkg/api.py"]
+    assert g.importers_of("src/pkg/api.py") == ["src/pkg/cli.py"]
+    assert g.imports_of("web/index.ts") == ["web/util.ts"]
+
+    (pkg / "cli.py").write_text("print('no imports')\n")
+    g = open_imports(tmp_path)
+    assert g.importers_of("src/pkg/api.py") == []
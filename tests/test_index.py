@@ -0,0 +1,84 @@
+import threading
+
+from grounded_context_mcp.core.fs import iter_text_files
+from grounded_context_mcp.core.index import TrigramIndex, open_index
+from grounded_context_mcp.core.locks import root_lock
+from grounded_context_mcp.core.scoring import score_match
+from grounded_context_mcp.tools.search_repo import search_repo
+
+
+def test_candidates_narrow_to_files_containing_query(tmp_path):
+    (tmp_path / "a.py").write_text("def Hello_World(): pass")
+    (tmp_path / "b.py").write_text("nothing to see")
+
+    idx = open_index(tmp_path)
+
+    assert idx.candidates("hello_world") == {"a.py"}
+    assert idx.candidates("zzz") == set()
+    assert idx.candidates("he") is None  # too short to narrow
+
+
+def test_index_is_persisted_and_rebuilt_on_change(tmp_path):
+    f = tmp_path / "a.md"
+    f.write_text("alpha")
+    open_index(tmp_path)
+
+    loaded = TrigramIndex.load(tmp_path)
+    assert loaded is not None
+    assert loaded.candidates("alpha") == {"a.md"}
+
+    f.write_text("bravo bravo")
+    assert open_index(tmp_path).candidates("bravo") == {"a.md"}
+
+
+def test_saved_index_round_trips_and_encodes_without_the_lock(tmp_path, monkeypatch):
+    (tmp_path / "a.md").write_text("Grüße, 世界 alpha")
+    (tmp_path / "b.md").write_text("beta")
+    (tmp_path / "c.md").write_text("gamma")
+    idx = open_index(tmp_path)
+    (tmp_path / "b.md").unlink()
+    idx = open_index(tmp_path)  # leaves a freed doc slot
+
+    encode = TrigramIndex._encode
+
+    def _encode(self, snapshot):
+        # A writer must get in while the snapshot is encoded.
+        wrote = threading.Event()
+
+        def _write():
+            with root_lock(tmp_path).write():
+                wrote.set()
+
+        t = threading.Thread(target=_write)
+        t.start()
+        t.join(timeout=5)
+        assert wrote.is_set()
+        return encode(self, snapshot)
+
+    monkeypatch.setattr(TrigramIndex, "_encode", _encode)
+    assert idx.save()
+
+    loaded = TrigramIndex.load(tmp_path)
+    assert loaded.postings == idx.postings
+    assert loaded.docs == idx.docs
+    assert loaded.candidates("世界 a") == {"a.md"}
+
+
+def test_search_repo_matches_full_scan_scores(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "token.py").write_text("class Token:\n    pass\n")
+    (tmp_path / "pkg" / "other.py").write_text("def other(): return 'token token'\n")
+    (tmp_path / "notes.md").write_text("nothing relevant")
+
+    expected = sorted(
+        (
+            (score_match("token", p, t), str(p.relative_to(tmp_path)))
+            for p, t in iter_text_files(tmp_path)
+        ),
+        reverse=True,
+    )
+    expected = [(s, p) for s, p in expected if s > 0]
+
+    out = search_repo("token", root=str(tmp_path))
+    got = sorted(((r["score"], r["path"]) for r in out["results"]), reverse=True)
+    assert got == expected
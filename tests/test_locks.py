@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from grounded_context_mcp.core.locks import RWLock, root_lock
+
+
+def test_readers_share_and_reenter():
+    lock = RWLock()
+    with lock.read():
+        with lock.read():
+            pass
+        inside = threading.Event()
+
+        def other():
+            with lock.read():
+                inside.set()
+
+        t = threading.Thread(target=other)
+        t.start()
+        assert inside.wait(2)
+        t.join()
+
+
+def test_writer_excludes_readers_and_may_read():
+    lock = RWLock()
+    order = []
+
+    def reader():
+        with lock.read():
+            order.append("read")
+
+    with lock.write():
+        with lock.write(), lock.read():
+            pass
+        t = threading.Thread(target=reader)
+        t.start()
+        time.sleep(0.05)
+        order.append("write done")
+    t.join(2)
+    assert order == ["write done", "read"]
+
+
+def test_read_lock_cannot_upgrade():
+    lock = RWLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
+
+
+def test_root_lock_is_per_resolved_root(tmp_path):
+    assert root_lock(tmp_path) is root_lock(tmp_path / ".")
+    assert root_lock(tmp_path) is not root_lock(tmp_path / "sub")
@@ -3,14 +3,11 @@ from grounded_context_mcp.tools.recommend_context import recommend_context
 
 
 @pytest.mark.asyncio
-async def test_recommend_context_basic(tmp_path, monkeypatch):
+async def test_recommend_context_basic(tmp_path, stub_git_insights):
     f = tmp_path / "service.py"
     f.write_text("def handler(): raise Exception('error')")
 
-    monkeypatch.setattr(
-        "grounded_context_mcp.tools.recommend_context.git_insights",
-        lambda *_: {"ok": False},
-    )
+    stub_git_insights({"ok": False})
 
     out = await recommend_context(
         query="error",
@@ -25,16 +22,13 @@ async def test_recommend_context_basic(tmp_path, monkeypatch):
 
 
 @pytest.mark.asyncio
-async def test_context_diff_mode_exposed(tmp_path, monkeypatch):
-    monkeypatch.setattr(
-        "grounded_context_mcp.tools.recommend_context.git_insights",
-        lambda *_: {
-            "ok": True,
-            "dirty": True,
-            "worktree_changed_files": ["a.py"],
-            "last_commit_files": ["b.py"],
-        },
-    )
+async def test_context_diff_mode_exposed(tmp_path, stub_git_insights):
+    stub_git_insights({
+        "ok": True,
+        "dirty": True,
+        "worktree_changed_files": ["a.py"],
+        "last_commit_files": ["b.py"],
+    })
 
     out = await recommend_context(
         query="anything",
@@ -45,3 +39,71 @@ async def test_context_diff_mode_exposed(tmp_path, monkeypatch):
     paths = [x["path"] for x in out["recently_changed"]]
     assert "a.py" in paths
     assert "b.py" in paths
+
+
+@pytest.mark.asyncio
+async def test_chunks_mode_returns_deep_function(tmp_path, stub_git_insights):
+    stub_git_insights({"ok": False})
+    filler = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(400))
+    (tmp_path / "big.py").write_text(filler + "def parse_token(s):\n    return s.split()\n")
+
+    out = await recommend_context(
+        query="parse_token",
+        root=str(tmp_path),
+        max_chars=500,
+        context_mode="chunks",
+    )
+
+    items = out["recommended_context"]["items"]
+    assert items[0]["name"] == "parse_token"
+    assert items[0]["start_line"] == 1201
+    assert "return s.split()" in items[0]["content"]
+
+
+@pytest.mark.asyncio
+async def test_hunks_mode_returns_changed_hunks(tmp_path, stub_git_insights):
+    import subprocess
+
+    stub_git_insights({"ok": False})
+
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=A", "-c", "user.email=a@x", *args],
+            cwd=tmp_path, check=True, capture_output=True,
+        )
+
+    git("init", "-q")
+    body = "".join(f"def f{i}():\n    return {i}\n\n" for i in range(200))
+    (tmp_path / "svc.py").write_text(body)
+    git("add", "-A")
+    git("commit", "-q", "-m", "one")
+    (tmp_path / "svc.py").write_text(body.replace("return 150", "raise Error(150)"))
+
+    out = await recommend_context(
+        query="Error", intent="debug", root=str(tmp_path), context_mode="hunks", max_chars=2000
+    )
+    ctx = out["recommended_context"]
+    assert ctx["diff"] == {"source": "worktree", "hunks": 1, "truncated": False}
+    (item,) = ctx["items"]
+    assert item["kind"] == "hunk" and item["path"] == "svc.py"
+    assert "+    raise Error(150)" in item["content"]
+    assert len(item["content"]) < 300
+
+
+@pytest.mark.asyncio
+async def test_neighbor_share_adds_imported_modules(tmp_path, stub_git_insights):
+    stub_git_insights({"ok": False})
+    (tmp_path / "billing.py").write_text("from engine import compute\n\ndef billing():\n    return compute()\n")
+    (tmp_path / "engine.py").write_text("def compute():\n    return 42\n" + "# pad\n" * 200)
+
+    out = await recommend_context(
+        query="billing", root=str(tmp_path), max_results=1, max_chars=1000, neighbor_share=0.5
+    )
+    items = out["recommended_context"]["items"]
+    assert items[0]["path"] == "billing.py"
+    assert items[1]["path"] == "engine.py"
+    assert items[1]["neighbor_of"] == "billing.py" and items[1]["relation"] == "imported"
+    assert len(items[1]["content"]) == 500 and items[1]["truncated"]
+
+    plain = await recommend_context(query="billing", root=str(tmp_path), max_results=1)
+    assert [i["path"] for i in plain["recommended_context"]["items"]] == ["billing.py"]
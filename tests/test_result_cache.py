@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+
+import pytest
+
+from grounded_context_mcp import mcp, server  # noqa: F401
+from grounded_context_mcp.core.catalog import FileCatalog
+from grounded_context_mcp.core.index import open_index
+from grounded_context_mcp.core.locks import root_lock
+from grounded_context_mcp.core.result_cache import (
+    RESULT_CACHE_SIZE_ENV,
+    RESULT_CACHE_TTL_ENV,
+    ResultCache,
+    repo_fingerprint,
+)
+from grounded_context_mcp.tools.recommend_context import recommend_context
+from grounded_context_mcp.tools.search_repo import search_repo
+
+
+def _bump(path, text):
+    path.write_text(text)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_repeat_search_is_served_from_cache(tmp_path):
+    (tmp_path / "a.py").write_text("needle = 1\n")
+    first = search_repo("needle", root=str(tmp_path))
+    again = search_repo("  NEEDLE ", root=str(tmp_path))
+
+    assert first["cached"] is False
+    assert again["cached"] is True and again["cache_age_s"] >= 0
+    assert again["query"] == "  NEEDLE "
+    assert again["results"] == first["results"]
+
+
+def test_edit_invalidates_cached_search(tmp_path):
+    f = tmp_path / "a.py"
+    f.write_text("needle = 1\n")
+    search_repo("needle", root=str(tmp_path))
+    _bump(f, "nothing here\n")
+
+    out = search_repo("needle", root=str(tmp_path))
+    assert out["cached"] is False
+    assert out["results"] == []
+
+
+def test_globs_and_other_limits_are_not_shared(tmp_path):
+    (tmp_path / "a.py").write_text("needle = 1\n")
+    search_repo("needle", root=str(tmp_path))
+    assert search_repo("needle", root=str(tmp_path), max_results=3)["cached"] is False
+    assert search_repo("needle", root=str(tmp_path), file_globs=["*.py"])["cached"] is False
+
+
+def test_ttl_and_size_bound(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setenv(RESULT_CACHE_SIZE_ENV, "2")
+    for k in "abc":
+        cache.put(k, ("fp",), {"k": k})
+    assert len(cache) == 2 and cache.get("a", ("fp",)) is None
+    assert cache.get("b", ("other",)) is None
+
+    monkeypatch.setenv(RESULT_CACHE_TTL_ENV, "0.01")
+    time.sleep(0.02)
+    assert cache.get("c", ("fp",)) is None
+
+
+def test_returned_values_are_copies():
+    cache = ResultCache()
+    cache.put("k", (), {"items": [1]})
+    out = cache.get("k", ()).value
+    out["items"].append(2)
+    assert cache.get("k", ()).value == {"items": [1]}
+
+
+@pytest.mark.asyncio
+async def test_recommend_context_repeat_skips_git(tmp_path, stub_git_insights):
+    (tmp_path / "service.py").write_text("def handler(): raise Exception('error')")
+    calls = stub_git_insights({"ok": False})
+
+    first = await recommend_context(query="error handler", root=str(tmp_path))
+    again = await recommend_context(query="Error  handler", root=str(tmp_path))
+
+    assert first["cached"] is False and again["cached"] is True
+    assert len(calls) == 1
+    assert again["recommended_files"] == first["recommended_files"]
+
+
+@pytest.mark.asyncio
+async def test_uncached_tool_call_walks_the_tree_once(tmp_path, monkeypatch, stub_git_insights):
+    stub_git_insights({"ok": False})
+    (tmp_path / "billing.py").write_text("from engine import compute\n\ndef billing():\n    return compute()\n")
+    (tmp_path / "engine.py").write_text("def compute():\n    return 42\n")
+    walks = []
+    refresh = FileCatalog.refresh
+    monkeypatch.setattr(FileCatalog, "refresh", lambda self, deadline=None: walks.append(1) or refresh(self, deadline))
+
+    # Fingerprint, trigram index, BM25, chunks and the import graph share one walk.
+    args = {
+        "query": "billing",
+        "root": str(tmp_path),
+        "ranking": "bm25",
+        "context_mode": "chunks",
+        "neighbor_share": 0.5,
+    }
+    await mcp.call_tool("recommend_context", args)
+    assert len(walks) == 1
+    await mcp.call_tool("search_repo", {"query": "compute", "root": str(tmp_path)})
+    assert len(walks) == 2
+
+
+def test_fingerprint_and_current_index_do_not_wait_for_readers(tmp_path):
+    (tmp_path / "a.py").write_text("needle = 1\n")
+    open_index(tmp_path)
+    done = threading.Event()
+
+    def query():
+        repo_fingerprint(tmp_path)
+        open_index(tmp_path)
+        done.set()
+
+    with root_lock(tmp_path).read():
+        t = threading.Thread(target=query)
+        t.start()
+        assert done.wait(5)
+    t.join()
@@ -0,0 +1,111 @@
+import subprocess
+import time
+
+import pytest
+
+from grounded_context_mcp.core.git import CatFileBatch
+from grounded_context_mcp.core.revision import iter_blobs, list_files_at, open_rev_tree
+from grounded_context_mcp.tools.grounded_context import get_grounded_context
+from grounded_context_mcp.tools.search_repo import search_repo
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=Ann Dev", "-c", "user.email=a@x", *args],
+        cwd=repo, check=True, capture_output=True, text=True,
+    ).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q", "-b", "main")
+    (tmp_path / "pkg").mkdir()
+    for i in range(50):
+        (tmp_path / "pkg" / f"m{i}.py").write_text(f"value_{i} = {i}\n")
+    (tmp_path / "a.py").write_text("line1\nold_marker = 1\nline3\n")
+    (tmp_path / "blob.bin").write_bytes(b"\0\1\2")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "one")
+    _git(tmp_path, "tag", "v1")
+
+    (tmp_path / "a.py").write_text("line1\nnew_marker = 2\n")
+    _git(tmp_path, "commit", "-q", "-am", "two")
+    return tmp_path
+
+
+def test_batch_pipelines_many_blobs_on_one_process(repo):
+    batch = CatFileBatch(repo, idle_s=0)
+    try:
+        names = [f"v1:pkg/m{i}.py" for i in range(50)] + ["v1:nope.py"]
+        objs = batch.read(names)
+        assert [o.data for o in objs[:50]] == [f"value_{i} = {i}\n".encode() for i in range(50)]
+        assert objs[50] is None
+        assert batch.read(["HEAD:a.py"])[0].data == b"line1\nnew_marker = 2\n"
+        assert batch.spawns == 1
+    finally:
+        batch.close()
+
+
+def test_batch_restarts_after_failure_and_stops_when_idle(repo):
+    batch = CatFileBatch(repo, idle_s=0.2)
+    try:
+        batch.read(["HEAD:a.py"])
+        batch._proc.kill()
+        batch._proc.wait()
+        assert batch.read(["HEAD:a.py"])[0].type == "blob"
+        assert batch.spawns == 2
+
+        deadline = time.monotonic() + 5
+        while batch.running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not batch.running
+        assert batch.read(["HEAD:a.py"])[0] is not None
+    finally:
+        batch.close()
+
+
+def test_missing_path_with_spaces_does_not_fail_the_batch(repo):
+    batch = CatFileBatch(repo, idle_s=0)
+    try:
+        objs = batch.read(["HEAD:a.py", "HEAD:my file.py", "HEAD:a b c.py", "HEAD:a.py"])
+        assert [o is not None for o in objs] == [True, False, False, True]
+    finally:
+        batch.close()
+
+    out = get_grounded_context(["a.py", "my file.py"], root=str(repo), rev="HEAD")
+    assert out["items"][0]["content"] == "line1\nnew_marker = 2\n"
+    assert not out["items"][1]["ok"] and "unknown revision" not in out["items"][1]["error"]
+
+
+def test_rev_tree_under_subdirectory(repo):
+    tree = open_rev_tree(repo / "pkg", "v1")
+    assert tree.prefix == "pkg/"
+    files = dict(list_files_at(tree, "v1"))
+    assert len(files) == 50 and files["m3.py"] == len("value_3 = 3\n")
+    assert dict(iter_blobs(tree, "v1", ["m3.py", "../a.py", "missing.py"])) == {
+        "m3.py": b"value_3 = 3\n",
+        "../a.py": None,  # outside root
+        "missing.py": None,
+    }
+    assert open_rev_tree(repo, "no-such-rev") is None
+    assert open_rev_tree(repo, "--output=x") is None
+
+
+def test_get_grounded_context_at_rev(repo):
+    out = get_grounded_context(["a.py", "a.py#L2", "blob.bin", "gone.py"], root=str(repo), rev="v1")
+    items = out["items"]
+    assert items[0]["content"] == "line1\nold_marker = 1\nline3\n"
+    assert items[1]["content"] == "old_marker = 1\n" and items[1]["end_line"] == 2
+    assert not items[2]["ok"] and not items[3]["ok"]
+    assert out["rev"] == "v1"
+
+    bad = get_grounded_context(["a.py"], root=str(repo), rev="nope")
+    assert "unknown revision" in bad["items"][0]["error"]
+
+
+def test_search_repo_at_rev(repo):
+    old = search_repo("old_marker", root=str(repo), rev="v1")
+    assert [r["path"] for r in old["results"]] == ["a.py"]
+    assert old["results"][0]["start_line"] == 1
+    assert search_repo("old_marker", root=str(repo))["results"] == []
+    assert "error" in search_repo("x", root=str(repo), rev="nope")
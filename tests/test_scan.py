@@ -0,0 +1,63 @@
+import time
+from functools import partial
+
+from grounded_context_mcp.core import scan
+from grounded_context_mcp.core.scan import (
+    MAX_WORKERS_ENV,
+    WORKERS_ENV,
+    map_ordered,
+    resolve_workers,
+    scan_and_score,
+)
+from grounded_context_mcp.core.scoring import score_match
+
+
+def test_map_ordered_keeps_input_order():
+    def slow_first(x):
+        time.sleep(0.02 if x == 0 else 0)
+        return x * 10
+
+    assert list(map_ordered(slow_first, range(20), workers=4, window=3)) == [x * 10 for x in range(20)]
+
+
+def _files(tmp_path):
+    paths = []
+    for i in range(12):
+        p = tmp_path / f"f{i:02}.py"
+        p.write_text("needle " * i)
+        paths.append(p)
+    return paths
+
+
+def test_parallel_scan_matches_serial(tmp_path):
+    paths = _files(tmp_path)
+    score = partial(score_match, "needle")
+
+    serial = [(p, s) for p, _, s in scan_and_score(paths, score, workers=1)]
+    parallel = [(p, s) for p, _, s in scan_and_score(paths, score, workers=8)]
+    assert parallel == serial
+
+
+def test_process_pool_scoring_matches_serial(tmp_path, monkeypatch):
+    paths = _files(tmp_path)
+    score = partial(score_match, "needle")
+    monkeypatch.setattr(scan, "PROCESS_MIN_SCAN_BYTES", 0)
+    monkeypatch.setattr(scan, "PROCESS_BATCH_FILES", 5)
+
+    serial = [(p, s) for p, _, s in scan_and_score(paths, score, workers=1)]
+    pooled = [(p, s) for p, _, s in scan_and_score(paths, score, workers=4, processes=2)]
+    assert pooled == serial
+
+
+def test_resolve_workers_clamps_client_values(monkeypatch):
+    monkeypatch.delenv(WORKERS_ENV, raising=False)
+    monkeypatch.setenv(MAX_WORKERS_ENV, "8")
+    assert resolve_workers(10_000) == 8
+    assert resolve_workers(0) == 1
+    assert resolve_workers(3) == 3
+
+    monkeypatch.delenv(MAX_WORKERS_ENV)
+    monkeypatch.setenv(WORKERS_ENV, "48")
+    # The operator's setting raises the default ceiling; clients can't exceed it.
+    assert resolve_workers() == 48
+    assert resolve_workers(10_000) == 48
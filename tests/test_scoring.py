@@ -0,0 +1,21 @@
+from pathlib import Path
+
+from grounded_context_mcp.core.scoring import TokenMatcher, score_match
+
+
+def test_token_matcher_equals_summed_score_match():
+    path = Path("/repo/src/Error_handler.py")
+    text = "class ErrorHandler:\n    def handle(self): raise Error('err err')\n"
+    tokens = ["error", "err", "ERROR", "handler", "missing", "rr"]
+
+    expected = sum(score_match(t, path, text) for t in tokens)
+    assert TokenMatcher(tokens).score(path, text) == expected
+
+
+def test_token_matcher_counts_and_breakdown():
+    m = TokenMatcher(["auth", "token"]).match(Path("auth/views.py"), "token = auth(token)")
+
+    assert m.counts == {"auth": 1, "token": 2}
+    assert m.path_hits == {"auth": True, "token": False}
+    assert m.breakdown == {"path": 3.0, "content": 1.5, "structure": 0.0}
+    assert m.score == 4.5
@@ -10,3 +10,39 @@ def test_search_repo_finds_match(tmp_path):
     assert out["query"] == "hello"
     assert len(out["results"]) == 1
     assert out["results"][0]["path"] == "a.py"
+
+
+def test_search_repo_snippet_is_line_window_around_match(tmp_path):
+    body = "".join(f"# license line {i}\n" for i in range(100))
+    (tmp_path / "a.py").write_text(body + "def hello(): pass\n")
+
+    hit = search_repo("hello", root=str(tmp_path))["results"][0]
+
+    assert hit["start_line"] == 99
+    assert hit["end_line"] == 101
+    assert "def hello()" in hit["snippet"]
+
+
+def test_search_repo_skips_binary_and_reports_partial(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROUNDED_CONTEXT_MAX_FILE_BYTES", "64")
+    (tmp_path / "blob.dat").write_bytes(b"needle\x00\x00\x00")
+    (tmp_path / "big.txt").write_text("needle\n" + "x" * 200 + "\nneedle\n")
+
+    out = search_repo("needle", root=str(tmp_path), file_globs=["*"])
+
+    assert [r["path"] for r in out["results"]] == ["big.txt"]
+    assert out["results"][0]["partial"] is True
+    assert out["read_report"]["skipped_binary"] == 1
+    assert out["read_report"]["truncated"] == 1
+
+
+def test_search_repo_indexed_read_report(tmp_path, monkeypatch):
+    monkeypatch.setenv("GROUNDED_CONTEXT_MAX_FILE_BYTES", "64")
+    (tmp_path / "a.json").write_bytes(b"\x00\x01binary")
+    (tmp_path / "b.md").write_text("hello\n" * 50)
+
+    out = search_repo("hello", root=str(tmp_path))
+
+    assert out["read_report"]["skipped_binary"] == 1
+    assert out["read_report"]["truncated"] == 1
+    assert out["results"][0]["path"] == "b.md"
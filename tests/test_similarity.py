@@ -0,0 +1,72 @@
+import pytest
+
+from grounded_context_mcp.core import similarity
+from grounded_context_mcp.core.similarity import identifier_terms, open_tfidf
+from grounded_context_mcp.tools.similar_files import similar_files
+
+
+def test_identifier_terms_split_snake_and_camel():
+    assert identifier_terms("def parseHTTPHeader(raw_value): return self") == [
+        "parsehttpheader", "parse", "http", "header", "raw_value", "raw", "value",
+    ]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "src" / "billing.py").write_text("def charge_invoice(invoice):\n    return invoice.total_amount\n")
+    (tmp_path / "tests" / "test_billing.py").write_text(
+        "from billing import charge_invoice\n\ndef test_charge():\n    assert charge_invoice(Invoice(total_amount=3))\n"
+    )
+    (tmp_path / "src" / "render.py").write_text("def draw_widget(canvas):\n    canvas.paint_pixels()\n")
+    return tmp_path
+
+
+def test_similar_files_finds_sibling_test(repo):
+    out = similar_files(path="src/billing.py", root=str(repo))
+    paths = [r["path"] for r in out["results"]]
+    assert paths[0] == "tests/test_billing.py"
+    assert "src/billing.py" not in paths
+    assert "invoice" in out["results"][0]["shared_terms"]
+
+    by_snippet = similar_files(snippet="canvas.paint_pixels()", root=str(repo))
+    assert by_snippet["results"][0]["path"] == "src/render.py"
+    assert "error" in similar_files(root=str(repo))
+
+
+def test_python_fallback_matches(repo, monkeypatch):
+    fast = open_tfidf(repo).similar(rel="src/billing.py", k=5)
+    monkeypatch.setattr(similarity, "np", None)
+    idx = open_tfidf(repo)
+    idx._vectors = None
+    slow = idx.similar(rel="src/billing.py", k=5)
+    assert [s.rel for s in slow] == [s.rel for s in fast]
+    assert [s.score for s in slow] == pytest.approx([s.score for s in fast], rel=1e-5)
+    idx._vectors = None
+
+
+def test_index_updates_incrementally(repo):
+    assert open_tfidf(repo).similar(text="zebra_stripes", k=3) == []
+    (repo / "src" / "zoo.py").write_text("zebra_stripes = 1\n")
+    hits = open_tfidf(repo).similar(text="zebra_stripes", k=3)
+    assert [h.rel for h in hits] == ["src/zoo.py"]
+
+
+@pytest.mark.skipif(similarity.np is None, reason="numpy backend")
+def test_rebuild_after_edit_reuses_unchanged_doc_arrays(repo):
+    idx = open_tfidf(repo)
+    idx.similar(rel="src/billing.py")
+    kept = idx._arrays["src/render.py"]
+
+    (repo / "src" / "billing.py").write_text("def charge_invoice(invoice, currency):\n    return invoice\n")
+    idx = open_tfidf(repo)
+    assert "src/billing.py" not in idx._arrays
+    incremental = idx.similar(rel="src/billing.py", k=5)
+    assert idx._arrays["src/render.py"] is kept
+
+    fresh = similarity.TfidfIndex(repo)
+    fresh.doc_tf, fresh.df = idx.doc_tf, idx.df
+    expected = fresh.similar(rel="src/billing.py", k=5)
+    assert [s.rel for s in incremental] == [s.rel for s in expected]
+    assert [s.score for s in incremental] == pytest.approx([s.score for s in expected], rel=1e-6)
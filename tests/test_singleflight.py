@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from grounded_context_mcp import mcp, server  # noqa: F401
+from grounded_context_mcp.core.singleflight import SingleFlight, call_key, single_flight
+
+
+def _tool(query: str, root: str = ".", max_results: int = 10) -> dict:
+    return {}
+
+
+def test_call_key_normalizes_defaults_and_root(tmp_path):
+    a = call_key("t", _tool, ("q",), {"root": str(tmp_path)})
+    b = call_key("t", _tool, (), {"query": "q", "root": str(tmp_path / "."), "max_results": 10})
+    c = call_key("t", _tool, ("q",), {"root": str(tmp_path), "max_results": 3})
+    assert a == b
+    assert a != c
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_execution():
+    sf = SingleFlight()
+    runs = 0
+    gate = asyncio.Event()
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await gate.wait()
+        return {"hits": [1, 2]}
+
+    callers = [asyncio.create_task(sf.do("k", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(*callers)
+
+    assert runs == 1 and sf.joined == 4
+    assert all(r == {"hits": [1, 2]} for r in results)
+    # Each caller owns its copy.
+    assert len({id(r) for r in results}) == 5
+    assert sf.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_work_survives_until_the_last_caller_cancels():
+    sf = SingleFlight()
+    gate = asyncio.Event()
+    stopped = asyncio.Event()
+
+    async def work():
+        try:
+            await gate.wait()
+            return "ok"
+        except asyncio.CancelledError:
+            stopped.set()
+            raise
+
+    first = asyncio.create_task(sf.do("k", work))
+    second = asyncio.create_task(sf.do("k", work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not stopped.is_set()
+    gate.set()
+    assert await second == "ok"
+
+    gate.clear()
+    only = asyncio.create_task(sf.do("k", work))
+    await asyncio.sleep(0)
+    only.cancel()
+    await asyncio.wait_for(stopped.wait(), timeout=5)
+    assert sf.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_coalesce(tmp_path):
+    (tmp_path / "a.py").write_text("needle = 1\n")
+    args = {"query": "needle", "root": str(tmp_path)}
+    before = single_flight.executions
+    outs = await asyncio.gather(*(mcp.call_tool("search_repo", args) for _ in range(3)))
+    assert single_flight.executions - before == 1
+    assert all("a.py" in str(o) for o in outs)
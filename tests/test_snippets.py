@@ -0,0 +1,27 @@
+from grounded_context_mcp.core.snippets import best_window
+
+
+def test_window_centers_on_densest_region():
+    lines = [f"# header {i}" for i in range(50)]
+    lines[10] = "token once"
+    lines[30] = "token and other"
+    lines[31] = "token again"
+    text = "\n".join(lines) + "\n"
+
+    w = best_window(text, ["token", "other"], max_lines=5)
+    assert w["start_line"] == 29
+    assert w["end_line"] == 33
+    assert w["snippet"].splitlines()[2] == "token and other"
+
+
+def test_window_falls_back_to_top_without_matches():
+    text = "a\nb\nc\n"
+    w = best_window(text, ["zzz"], max_lines=2)
+    assert w == {"snippet": "a\nb\n", "start_line": 1, "end_line": 2}
+
+
+def test_window_end_line_respects_char_cap():
+    text = "".join(f"line {i}\n" for i in range(1, 30))
+    w = best_window(text, ["line 1"], max_lines=20, max_chars=14)
+    assert w["start_line"] == 1
+    assert w["end_line"] == 2
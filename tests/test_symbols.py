@@ -0,0 +1,75 @@
+from grounded_context_mcp.core.symbols import extract_symbols, open_symbols
+from grounded_context_mcp.tools.find_symbol import find_symbol
+from grounded_context_mcp.tools.search_repo import search_repo
+
+
+def _spans(rel, text):
+    return [(s.qualname, s.kind, s.start_line, s.end_line) for s in extract_symbols(rel, text)]
+
+
+def test_python_symbols_from_ast():
+    text = (
+        "LIMIT = 3\n"
+        "\n"
+        "@dec\n"
+        "def top(a):\n"
+        "    return a\n"
+        "\n"
+        "class Box:\n"
+        "    def get(self):\n"
+        "        def inner():\n"
+        "            pass\n"
+        "        return 1\n"
+    )
+    assert _spans("m.py", text) == [
+        ("LIMIT", "variable", 1, 1),
+        ("top", "function", 3, 5),
+        ("Box", "class", 7, 11),
+        ("Box.get", "method", 8, 11),
+        ("Box.get.inner", "function", 9, 10),
+    ]
+    # Unparseable files still yield def/class lines.
+    assert _spans("bad.py", "def ok():\n    pass\nclass (:\n") == [("ok", "function", 1, 1)]
+
+
+def test_regex_extractors():
+    ts = "export async function load(x) {\n  return x;\n}\nconst run = (a) => {\n  a();\n};\ninterface Opts { a: 1 }\n"
+    assert _spans("a.ts", ts) == [
+        ("load", "function", 1, 3),
+        ("run", "function", 4, 6),
+        ("Opts", "interface", 7, 7),
+    ]
+    go = "func (s *Server) Serve() error {\n\treturn nil\n}\ntype Server struct {\n}\n"
+    assert _spans("s.go", go) == [("Serve", "function", 1, 3), ("Server", "type", 4, 5)]
+    c = "#define MAX 3\nstatic int add(int a, int b)\n{\n  return a + b;\n}\n"
+    assert _spans("m.c", c) == [("MAX", "macro", 1, 1), ("add", "function", 2, 5)]
+    md = "# Top\nx\n## Install\ny\n# Next\n"
+    assert _spans("R.md", md) == [("Top", "heading", 1, 4), ("Install", "heading", 3, 4), ("Next", "heading", 5, 5)]
+
+
+def test_index_updates_incrementally(tmp_path):
+    (tmp_path / "a.py").write_text("def alpha():\n    pass\n")
+    (tmp_path / "b.py").write_text("class Alpha:\n    pass\n")
+    idx = open_symbols(tmp_path)
+    assert [(s.rel, s.kind) for s in idx.lookup("alpha")] == [("a.py", "function")]
+    assert [s.rel for s in idx.lookup("ALPHA")] == ["b.py", "a.py"]  # case-insensitive, classes first
+
+    (tmp_path / "a.py").write_text("def beta():\n    pass\n")
+    idx = open_symbols(tmp_path)
+    assert idx.lookup("alpha")[0].rel == "b.py"
+    assert [s.rel for s in idx.lookup("beta")] == ["a.py"]
+
+
+def test_find_symbol_and_symbol_query(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "svc.py").write_text("x = 1\n\nclass Service:\n    def handle(self):\n        return 2\n")
+    (tmp_path / "notes.md").write_text("Service handle is described here\n")
+
+    out = find_symbol("Service.handle", root=str(tmp_path))
+    (hit,) = out["results"]
+    assert (hit["path"], hit["kind"], hit["start_line"], hit["end_line"]) == ("pkg/svc.py", "method", 4, 5)
+    assert hit["snippet"].startswith("    def handle")
+
+    res = search_repo("symbol:Service", root=str(tmp_path))["results"]
+    assert [(r["path"], r["start_line"], r["symbol"]["kind"]) for r in res] == [("pkg/svc.py", 3, "class")]
+    assert search_repo("symbol:Service", root=str(tmp_path), file_globs=["*.md"])["results"] == []
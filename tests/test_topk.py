@@ -0,0 +1,18 @@
+from grounded_context_mcp.core.topk import TopK
+
+
+def test_topk_matches_stable_sort():
+    scores = [1.0, 3.0, 2.0, 3.0, 0.5, 2.0, 3.0]
+    top = TopK(4)
+    for i, s in enumerate(scores):
+        top.push(s, i)
+
+    expected = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)[:4]
+    assert top.results() == [(s, i) for i, s in expected]
+    assert len(top) == 4
+
+
+def test_topk_zero_keeps_nothing():
+    top = TopK(0)
+    top.push(1.0, "a")
+    assert top.results() == []